@@ -0,0 +1 @@
+"""Standalone performance benchmarks (run from backend/: python -m benchmarks.<name>)."""
@@ -0,0 +1,179 @@
+"""Benchmark: streaming row tokenizer vs BeautifulSoup for event month pages.
+
+Usage (from backend/):
+    python -m benchmarks.events_parser [--rows 400] [--repeat 5] [--min-speedup 2.0]
+
+The input is synthetic: the event rows of the hand-written template
+events/test_data/month_listing.html (modelled on the site's table layout, not
+a saved copy of a real page) repeated ``--rows`` times. The original
+BeautifulSoup parser lives here as the reference implementation; run() fails
+when the two parsers disagree.
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import events_scraper  # noqa: E402
+
+FIXTURE = BACKEND_DIR / "events" / "test_data" / "month_listing.html"
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    garbage = ["Kliknij tutaj", "ZAKRES WYSZUKIWANIA", "->", "Dzień:", "Dzien:", "\xa0", "&nbsp;"]
+    cleaned = text
+    for g in garbage:
+        cleaned = cleaned.replace(g, "")
+    return " ".join(cleaned.split())
+
+
+def parse_date_strptime(date_str: str):
+    if not date_str:
+        return None
+    clean = re.sub(r'\(.*?\)', '', date_str).strip()
+    formats = ["%d.%m.%Y", "%Y.%m.%d", "%d-%m-%Y", "%d.%m.%y"]
+    for fmt in formats:
+        try:
+            return datetime.strptime(clean, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_events_bs4(html_content, base_url="https://www.maratonypolskie.pl/"):
+    """Original BeautifulSoup parser - reference output for the streaming tokenizer."""
+    if not html_content:
+        return []
+    soup = BeautifulSoup(html_content, "html.parser")
+    events = []
+    rows = soup.find_all("tr")
+
+    for row in rows:
+        row_text = row.get_text()
+
+        # Filtrowanie nagłówków reklamowych
+        if "ZOBACZ OFERT" in row_text.upper() or "WYDARZENIA PROMOWANE" in row_text.upper():
+            continue
+
+        cols = row.find_all("td")
+        if len(cols) < 3:
+            continue
+
+        # 1. Szukamy DATY
+        event_date = None
+        date_col_idx = -1
+
+        for idx in range(0, min(3, len(cols))):
+            txt = cols[idx].get_text(strip=True)
+            if re.search(r'\d+\.\d+', txt):
+                parsed = parse_date_strptime(txt)
+                if parsed:
+                    event_date = parsed
+                    date_col_idx = idx
+                    break
+
+        if not event_date:
+            continue
+
+        # 2. Szukamy MIEJSCA i NAZWY
+        place = ""
+        name = ""
+        url = ""
+
+        found_texts = []
+        for idx in range(date_col_idx + 1, len(cols)):
+            cell = cols[idx]
+            txt = clean_text(cell.get_text(" ", strip=True))
+            if len(txt) > 1:
+                link = cell.find("a")
+                found_texts.append({
+                    "text": txt,
+                    "has_link": bool(link),
+                    "href": link["href"] if link and link.has_attr("href") else ""
+                })
+
+        # Zazwyczaj pierwszy element to Miejsce, drugi to Nazwa
+        if len(found_texts) >= 1:
+            place = found_texts[0]["text"]
+            if len(found_texts) >= 2:
+                name = found_texts[1]["text"]
+                if found_texts[1]["href"]:
+                    url = urljoin(base_url, found_texts[1]["href"]) if not found_texts[1]["href"].startswith("http") else found_texts[1]["href"]
+
+        if name and place:
+            events.append({
+                "name": name,
+                "date": event_date,
+                "place": place,
+                "url": url,
+            })
+
+    return events
+
+
+def build_month_page(rows: int = 400, year: int = 2027, month: int = 5) -> str:
+    """The fixture template with its event rows repeated up to ``rows`` entries."""
+    template = FIXTURE.read_bytes().decode("iso-8859-2")
+    event_rows = re.findall(r"<tr><td>\{d\d\}.*?</tr>\n", template, flags=re.S)
+    body = []
+    for i in range(rows):
+        row = event_rows[i % len(event_rows)]
+        body.append(row.replace("{d1}", f"{1 + i % 28:02d}").replace("{d2}", f"{1 + i % 28:02d}")
+                    .replace("{d3}", f"{1 + i % 28:02d}").replace("{c1}", str(i)).replace("{c2}", str(i)))
+    page = template
+    for row in event_rows:
+        page = page.replace(row, "")
+    page = page.replace("</table>", "".join(body) + "</table>")
+    return page.replace("{mm}", f"{month:02d}").replace("{yyyy}", str(year))
+
+
+def best_time(fn, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(rows: int = 400, repeat: int = 5) -> dict:
+    html = build_month_page(rows)
+    fast = events_scraper._parse_events_from_html(html)
+    slow = parse_events_bs4(html)
+    if fast != slow:
+        raise AssertionError("Fast parser output differs from the BeautifulSoup parser")
+    t_fast = best_time(events_scraper._parse_events_from_html, html, repeat)
+    t_bs4 = best_time(parse_events_bs4, html, repeat)
+    return {"rows": rows, "events": len(fast), "bs4_s": t_bs4, "fast_s": t_fast, "speedup": t_bs4 / t_fast}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-speedup", type=float, default=None, help="Exit with 1 when the speedup is lower")
+    args = parser.parse_args(argv)
+    result = run(args.rows, args.repeat)
+    print(
+        f"rows={result['rows']} events={result['events']} "
+        f"bs4={result['bs4_s'] * 1000:.1f} ms fast={result['fast_s'] * 1000:.1f} ms speedup={result['speedup']:.1f}x"
+    )
+    if args.min_speedup is not None and result["speedup"] < args.min_speedup:
+        print(f"FAIL: speedup below {args.min_speedup}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Load test: concurrent virtual users against a running API server.
+
+Usage (from backend/, after `python manage.py seed_load_data --users 200`):
+    python manage.py runserver --noreload          # or uvicorn/gunicorn
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --concurrency 20 --duration 60
+    python -m benchmarks.loadtest --mix dashboard=60,analysis=15,feed=20,upload=5 --json results.json
+
+Each virtual user logs in as a random seeded user (``--prefix``/``--password``
+must match the seed command) and runs weighted scenarios in a loop:
+
+  dashboard  GET last workout, weekly summary and the workout list
+  analysis   GET the analysis of one of the user's workouts
+  feed       scroll up to three pages of the global or friends feed
+  upload     POST a synthetic FIT file (~30 min run)
+
+Prints throughput and latency percentiles per request type. Stdlib only, so
+it runs on the box under test; a single Python client tops out at a few
+hundred requests per second - use several processes for more. Run the
+server on Postgres (USE_POSTGRES=1): SQLite serializes writers and concurrent
+uploads/analyses fail with "database is locked".
+"""
+import argparse
+import gzip
+import http.cookiejar
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import synthetic  # noqa: E402
+
+DEFAULT_MIX = "dashboard=50,analysis=20,feed=25,upload=5"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-p * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        out = {}
+        with self._lock:
+            items = {k: sorted(v) for k, v in self.latencies.items()}
+            errors = dict(self.errors)
+        total = sum(len(v) for v in items.values())
+        for name, values in sorted(items.items()) + [("TOTAL", sorted(x for v in items.values() for x in v))]:
+            out[name] = {
+                "requests": len(values),
+                "errors": errors.get(name, 0) if name != "TOTAL" else sum(errors.values()),
+                "rps": len(values) / elapsed if elapsed else 0.0,
+                **{f"p{p}_ms": _ms(percentile(values, p)) for p in PERCENTILES},
+                "max_ms": _ms(values[-1] if values else None),
+            }
+        out["TOTAL"]["requests"] = total
+        return out
+
+
+def _ms(value):
+    return None if value is None else round(value * 1000, 1)
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, username: str, password: str, recorder: Recorder, rng: random.Random):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self.recorder = recorder
+        self.rng = rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.workout_ids: List[int] = []
+
+    def request(self, name: str, method: str, path: str, body: bytes = None, content_type: str = None):
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        # Jak przeglądarka: odpowiedzi JSON/GPX przychodzą skompresowane
+        req.add_header("Accept-Encoding", "gzip")
+        if content_type:
+            req.add_header("Content-Type", content_type)
+        t0 = time.perf_counter()
+        status, payload = 0, b""
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                status, payload = resp.status, resp.read()
+                if resp.headers.get("Content-Encoding") == "gzip":
+                    payload = gzip.decompress(payload)
+        except urllib.error.HTTPError as exc:
+            status, payload = exc.code, exc.read()
+        except (urllib.error.URLError, OSError):
+            status = 0
+        self.recorder.add(name, time.perf_counter() - t0, 200 <= status < 300)
+        if 200 <= status < 300 and payload[:1] in (b"{", b"["):
+            try:
+                return json.loads(payload)
+            except ValueError:
+                return None
+        return None
+
+    def login(self) -> bool:
+        body = json.dumps({"username": self.username, "password": self.password}).encode()
+        return self.request("login", "POST", "/api/login/", body, "application/json") is not None
+
+    def dashboard(self) -> None:
+        self.request("last_workout", "GET", "/api/workouts/last/")
+        self.request("weekly_summary", "GET", "/api/workouts/weekly_summary/")
+        data = self.request("list_workouts", "GET", "/api/workouts/")
+        if isinstance(data, dict):
+            self.workout_ids = [w["id"] for w in data.get("workouts", []) if w.get("gpx_file")]
+
+    def analysis(self) -> None:
+        if not self.workout_ids:
+            self.dashboard()
+        if self.workout_ids:
+            self.request("workout_analysis", "GET", f"/api/workouts/{self.rng.choice(self.workout_ids)}/analysis/")
+
+    def feed(self) -> None:
+        scope = "friends" if self.rng.random() < 0.4 else "global"
+        cursor = None
+        for page in range(self.rng.randint(1, 3)):
+            path = f"/api/social/posts/?scope={scope}&limit=20" + (f"&cursor={cursor}" if cursor else "")
+            data = self.request(f"feed_{scope}", "GET", path)
+            cursor = data.get("next_cursor") if isinstance(data, dict) else None
+            if not cursor:
+                break
+
+    def upload(self, fit_bytes: bytes) -> None:
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"load.fit\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode() + fit_bytes + f"\r\n--{boundary}--\r\n".encode()
+        self.request("upload_workout", "POST", "/api/workouts/upload/", body, f"multipart/form-data; boundary={boundary}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("dashboard", "analysis", "feed", "upload"):
+            raise ValueError(f"unknown scenario: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def run(base_url: str, concurrency: int, duration: float, mix: Dict[str, float], prefix: str,
+        password: str, users: int, seed: int = 0) -> Dict[str, dict]:
+    recorder = Recorder()
+    fit_bytes = synthetic.to_fit(synthetic.generate_track(1800, seed=seed))
+    names, weights = list(mix), list(mix.values())
+    width = max(4, len(str(users - 1)))
+    deadline = time.monotonic() + duration
+
+    def worker(n: int) -> None:
+        rng = random.Random(seed * 7919 + n)
+        vu = VirtualUser(base_url, f"{prefix}{rng.randrange(users):0{width}d}", password, recorder, rng)
+        if not vu.login():
+            return
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            if scenario == "upload":
+                vu.upload(fit_bytes)
+            else:
+                getattr(vu, scenario)()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder.summary(time.monotonic() - started)
+
+
+def print_summary(summary: Dict[str, dict]) -> None:
+    head = f"{'request':<20}{'count':>8}{'err':>6}{'rps':>8}" + "".join(f"{'p' + str(p):>9}" for p in PERCENTILES) + f"{'max':>9}"
+    print(head)
+    print("-" * len(head))
+    for name, row in summary.items():
+        cols = "".join(f"{row[f'p{p}_ms'] or 0:>9.1f}" for p in PERCENTILES)
+        print(f"{name:<20}{row['requests']:>8}{row['errors']:>6}{row['rps']:>8.1f}{cols}{row['max_ms'] or 0:>9.1f}")
+    print("(latencies in ms)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--prefix", default="load_")
+    parser.add_argument("--password", default="LoadTest!2024")
+    parser.add_argument("--users", type=int, default=100, help="Number of seeded users to pick from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as exc:
+        parser.error(str(exc))
+    summary = run(args.base_url, args.concurrency, args.duration, mix, args.prefix, args.password, args.users, args.seed)
+    print_summary(summary)
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    return 1 if summary["TOTAL"]["requests"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Benchmark: ingestion and analysis hot paths on synthetic workouts.
+
+Usage (from backend/):
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--repeat 3] [--cases parse_gpx,analyze_track]
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json [--threshold 0.25]
+
+Views are called through the Django test client against a throwaway test
+database, so the numbers include middleware, ORM and JSON serialization.
+Every case reports the best and the median of ``--repeat`` runs; --compare
+flags cases whose best time grew by more than ``--threshold`` (25% by
+default) and exits with 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks import synthetic  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.25
+
+
+class _Env:
+    """Test client logged in as a dedicated benchmark user."""
+
+    def __init__(self):
+        from django.contrib.auth.models import User
+        from django.test import Client
+
+        self.user, _ = User.objects.get_or_create(username="benchmark_user")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def workout(self, track, raw_data=None):
+        from workouts.models import Workout
+
+        workout = Workout(
+            user=self.user, title="benchmark", source="adidas", manual=True,
+            raw_data=raw_data if raw_data is not None else {},
+        )
+        workout.set_gpx(synthetic.to_gpx(track))
+        workout.save()
+        return workout
+
+
+def _expect(response, status: int):
+    if response.status_code != status:
+        raise AssertionError(f"Expected HTTP {status}, got {response.status_code}: {response.content[:200]!r}")
+    return response
+
+
+def _case_parse_gpx(env, track) -> Callable[[], object]:
+    from workout_analysis.utils import parse_gpx
+
+    data = synthetic.to_gpx(track)
+    return lambda: parse_gpx(data)
+
+
+def _case_analyze_track(env, track):
+    from workout_analysis.utils import analyze_track, parse_gpx
+
+    points = parse_gpx(synthetic.to_gpx(track))
+    return lambda: analyze_track(points)
+
+
+def _case_workout_analysis(env, track):
+    from workout_analysis import cache as analysis_cache
+
+    w = env.workout(track, raw_data=synthetic.hr_samples(track))
+    url = f"/api/workouts/{w.id}/analysis/"
+
+    def call():
+        # Liczymy analizę, nie odczyt z cache odpowiedzi
+        analysis_cache.invalidate(w.id)
+        return _expect(env.client.get(url, HTTP_ACCEPT_ENCODING="gzip"), 200)
+    return call
+
+
+def _case_workout_analysis_cached(env, track):
+    w = env.workout(track, raw_data=synthetic.hr_samples(track))
+    url = f"/api/workouts/{w.id}/analysis/"
+    _expect(env.client.get(url, HTTP_ACCEPT_ENCODING="gzip"), 200)
+    return lambda: _expect(env.client.get(url, HTTP_ACCEPT_ENCODING="gzip"), 200)
+
+
+def _case_attach_hr(env, track):
+    w = env.workout(track)
+    url = f"/api/workouts/{w.id}/attach_hr/"
+    body = json.dumps(synthetic.hr_samples(track))
+    return lambda: _expect(env.client.post(url, body, content_type="application/json"), 200)
+
+
+def _upload(env, name: str, data: bytes):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    def call():
+        upload = SimpleUploadedFile(name, data)
+        # upload_workout wypisuje fragment pliku na stdout - nie mierzymy terminala
+        with contextlib.redirect_stdout(io.StringIO()):
+            return _expect(env.client.post("/api/workouts/upload/", {"file": upload}), 201)
+    return call
+
+
+def _case_upload_fit(env, track):
+    return _upload(env, "synthetic.fit", synthetic.to_fit(track))
+
+
+def _case_upload_trackpoints(env, track):
+    return _upload(env, "location_data.json", synthetic.to_adidas_trackpoints(track))
+
+
+CASES: Dict[str, Callable] = {
+    "parse_gpx": _case_parse_gpx,
+    "analyze_track": _case_analyze_track,
+    "workout_analysis": _case_workout_analysis,
+    "workout_analysis_cached": _case_workout_analysis_cached,
+    "attach_hr": _case_attach_hr,
+    "upload_workout_fit": _case_upload_fit,
+    "upload_workout_trackpoints": _case_upload_trackpoints,
+}
+
+
+def run_benchmarks(sizes: Iterable[int] = DEFAULT_SIZES, repeat: int = 3,
+                   cases: Optional[Iterable[str]] = None, log=print) -> Dict[str, dict]:
+    """Time every case at every size. Expects a configured (test) database."""
+    env = _Env()
+    results: Dict[str, dict] = {}
+    for size in sizes:
+        track = synthetic.generate_track(size)
+        for name in cases or CASES:
+            fn = CASES[name](env, track)
+            timings: List[float] = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                timings.append(time.perf_counter() - t0)
+            key = f"{name}/{size}"
+            results[key] = {"min_s": min(timings), "median_s": statistics.median(timings), "runs": repeat}
+            if log:
+                log(f"{key:<36} best {min(timings) * 1000:10.1f} ms   median {statistics.median(timings) * 1000:10.1f} ms")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Keys whose best time is more than ``threshold`` slower than in the baseline."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base or not base.get("min_s"):
+            continue
+        if current["min_s"] > base["min_s"] * (1 + threshold):
+            regressions.append(key)
+    return regressions
+
+
+def _with_test_database(fn):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "running_analyzer.settings")
+    import django
+
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        return fn()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cases", default=None, help=f"Comma separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--save", default=None, help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",")] if args.cases else None
+    unknown = sorted(set(cases or ()) - set(CASES))
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+
+    results = _with_test_database(lambda: run_benchmarks(sizes, args.repeat, cases))
+
+    if args.save:
+        payload = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+            },
+            "results": results,
+        }
+        Path(args.save).write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["results"]
+        for key, current in results.items():
+            base = baseline.get(key)
+            if base and base.get("min_s"):
+                print(f"{key:<36} {current['min_s'] / base['min_s']:6.2f}x baseline")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"FAIL: slower than baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Deterministic synthetic workouts for benchmarks and tests.
+
+generate_track() produces a run around a loop near Wrocław with pace, HR and
+cadence variation and GPS noise; the same arguments always give the same
+track. The encoders turn it into the formats the app ingests: GPX (with
+Garmin TrackPointExtension hr/cad), FIT (file_id + record + session
+messages), Adidas activity JSON, Adidas trackpoints JSON and a Samsung/Adidas
+style flat HR sample list (as accepted by attach_hr).
+
+    python -m benchmarks.synthetic --points 5000 --format fit -o run.fit
+"""
+import argparse
+import json
+import math
+import random
+import struct
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+START = datetime(2024, 4, 12, 7, 0, tzinfo=timezone.utc)
+CENTER = (51.1079, 17.0385)
+LOOP_M = 5000.0
+_EARTH_R = 6371000.0
+
+
+def generate_track(
+    points: int = 1000,
+    sample_s: float = 1.0,
+    hr: bool = True,
+    cadence: bool = True,
+    noise_m: float = 3.0,
+    seed: int = 0,
+    start: datetime = START,
+) -> List[Dict[str, Optional[float]]]:
+    """List of samples: lat, lon, ele, ts (epoch s), dist (m), hr, cad."""
+    rng = random.Random(seed)
+    radius = LOOP_M / (2 * math.pi)
+    t0 = start.timestamp()
+    dist = 0.0
+    out = []
+    for i in range(points):
+        # Tempo ~5:00/km z wolną falą i szumem
+        speed = 3.3 + 0.4 * math.sin(i * sample_s / 300.0) + rng.gauss(0, 0.1)
+        if i:
+            dist += max(speed, 0.5) * sample_s
+        angle = dist / radius
+        # Lekko "jajowata" pętla, żeby nie była idealnym okręgiem
+        r = radius * (1 + 0.15 * math.sin(2 * angle))
+        north = r * math.cos(angle) + rng.gauss(0, noise_m)
+        east = r * math.sin(angle) + rng.gauss(0, noise_m)
+        lat = CENTER[0] + math.degrees(north / _EARTH_R)
+        lon = CENTER[1] + math.degrees(east / (_EARTH_R * math.cos(math.radians(CENTER[0]))))
+        out.append({
+            "lat": round(lat, 7),
+            "lon": round(lon, 7),
+            "ele": round(120 + 15 * math.sin(angle * 3) + rng.gauss(0, 0.5), 1),
+            "ts": t0 + i * sample_s,
+            "dist": dist,
+            "hr": float(min(195, int(95 + 50 * (1 - math.exp(-i * sample_s / 240.0)) + 8 * (speed - 3.3) + rng.gauss(0, 2)))) if hr else None,
+            "cad": float(int(165 + 6 * (speed - 3.3) + rng.gauss(0, 2))) if cadence else None,
+        })
+    return out
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def to_gpx(track) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="benchmarks.synthetic" xmlns="http://www.topografix.com/GPX/1/1" '
+        'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">'
+        "<trk><name>Synthetic run</name><trkseg>"
+    ]
+    for p in track:
+        ext = ""
+        if p["hr"] is not None or p["cad"] is not None:
+            ext = "<extensions><gpxtpx:TrackPointExtension>"
+            if p["hr"] is not None:
+                ext += f"<gpxtpx:hr>{int(p['hr'])}</gpxtpx:hr>"
+            if p["cad"] is not None:
+                ext += f"<gpxtpx:cad>{int(p['cad']) // 2}</gpxtpx:cad>"
+            ext += "</gpxtpx:TrackPointExtension></extensions>"
+        parts.append(
+            f'<trkpt lat="{p["lat"]}" lon="{p["lon"]}"><ele>{p["ele"]}</ele>'
+            f"<time>{_iso(p['ts'])}</time>{ext}</trkpt>"
+        )
+    parts.append("</trkseg></trk></gpx>")
+    return "".join(parts).encode("utf-8")
+
+
+def hr_samples(track) -> List[dict]:
+    """Flat event list like the Adidas/Samsung HR export (start_time in ms)."""
+    out = []
+    for p in track:
+        ms = int(p["ts"] * 1000)
+        if p["hr"] is not None:
+            out.append({"start_time": ms, "heart_rate": p["hr"]})
+        if p["cad"] is not None:
+            out.append({"start_time": ms + 250, "speed": 3.3, "cadence": p["cad"]})
+    return out
+
+
+def to_adidas_trackpoints(track) -> bytes:
+    return json.dumps([
+        {"latitude": p["lat"], "longitude": p["lon"], "altitude": p["ele"], "timestamp": int(p["ts"] * 1000)}
+        for p in track
+    ]).encode("utf-8")
+
+
+def to_adidas_activity(track, activity_id: str = "synthetic-run") -> bytes:
+    """Adidas Running activity export (summary features only, like the real basic file)."""
+    start_ms = int(track[0]["ts"] * 1000)
+    end_ms = int(track[-1]["ts"] * 1000)
+    hrs = [p["hr"] for p in track if p["hr"] is not None]
+    features = [
+        {"type": "initial_values", "attributes": {"start_time": start_ms}},
+        {"type": "track_metrics", "attributes": {"distance": round(track[-1]["dist"]), "elevation_gain": 40}},
+        {"type": "weather", "attributes": {"conditions": "cloudy", "temperature": 14.0, "humidity": 60.0, "wind_speed": 2.5}},
+        {"type": "origin", "attributes": {"device": {"name": "Synthetic", "vendor": "benchmarks"}}},
+    ]
+    if hrs:
+        features.append({"type": "heart_rate", "attributes": {"average": sum(hrs) / len(hrs), "maximum": max(hrs)}})
+    return json.dumps({
+        "id": activity_id,
+        "start_time": start_ms,
+        "end_time": end_ms,
+        "duration": end_ms - start_ms,
+        "features": features,
+    }).encode("utf-8")
+
+
+# ---- FIT ----
+
+_FIT_EPOCH = 631065600  # 1989-12-31T00:00:00Z
+_CRC_TABLE = (0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+              0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400)
+# (field number, struct format, FIT base type)
+_FILE_ID = (0, [(0, "B", 0x00), (1, "H", 0x84), (2, "H", 0x84), (4, "I", 0x86)])
+_RECORD = (20, [(253, "I", 0x86), (0, "i", 0x85), (1, "i", 0x85), (2, "H", 0x84), (5, "I", 0x86), (3, "B", 0x02), (4, "B", 0x02)])
+_SESSION = (18, [(253, "I", 0x86), (2, "I", 0x86), (7, "I", 0x86), (8, "I", 0x86), (9, "I", 0x86), (5, "B", 0x00), (6, "B", 0x00)])
+_INVALID = {"B": 0xFF, "H": 0xFFFF, "I": 0xFFFFFFFF, "i": 0x7FFFFFFF}
+
+
+def fit_crc(data: bytes, crc: int = 0) -> int:
+    for byte in data:
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _CRC_TABLE[byte & 0xF]
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = ((crc >> 4) & 0x0FFF) ^ tmp ^ _CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+def _definition(local: int, message) -> bytes:
+    global_num, fields = message
+    out = struct.pack("<BBBHB", 0x40 | local, 0, 0, global_num, len(fields))
+    for num, fmt, base in fields:
+        out += struct.pack("<BBB", num, struct.calcsize(fmt), base)
+    return out
+
+
+def _data(local: int, message, values) -> bytes:
+    fields = message[1]
+    fmt = "<B" + "".join(f for _, f, _ in fields)
+    return struct.pack(fmt, local, *[_INVALID[f] if v is None else v for (_, f, _), v in zip(fields, values)])
+
+
+def _semicircles(deg: float) -> int:
+    return int(round(deg * (2 ** 31) / 180.0))
+
+
+def to_fit(track) -> bytes:
+    """Activity FIT file (protocol 1.0) with one record per sample and a session summary."""
+    first_ts = int(track[0]["ts"]) - _FIT_EPOCH
+    last_ts = int(track[-1]["ts"]) - _FIT_EPOCH
+    body = bytearray()
+    body += _definition(0, _FILE_ID)
+    body += _data(0, _FILE_ID, (4, 1, 1, 12345))  # type=activity, manufacturer=garmin
+    body += _definition(1, _RECORD)
+    for p in track:
+        body += _data(1, _RECORD, (
+            int(p["ts"]) - _FIT_EPOCH,
+            _semicircles(p["lat"]),
+            _semicircles(p["lon"]),
+            int(round((p["ele"] + 500) * 5)),
+            int(round(p["dist"] * 100)),
+            None if p["hr"] is None else int(p["hr"]),
+            None if p["cad"] is None else int(p["cad"]) // 2,
+        ))
+    elapsed = last_ts - first_ts
+    body += _definition(2, _SESSION)
+    body += _data(2, _SESSION, (
+        last_ts, first_ts, elapsed * 1000, elapsed * 1000, int(round(track[-1]["dist"] * 100)), 1, 0,  # sport=running
+    ))
+    header = struct.pack("<BBHI4s", 14, 0x10, 2132, len(body), b".FIT")
+    header += struct.pack("<H", fit_crc(header))
+    data = header + bytes(body)
+    return data + struct.pack("<H", fit_crc(data))
+
+
+FORMATS = {
+    "gpx": to_gpx,
+    "fit": to_fit,
+    "adidas": to_adidas_activity,
+    "trackpoints": to_adidas_trackpoints,
+    "hr": lambda track: json.dumps(hr_samples(track)).encode("utf-8"),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--sample-s", type=float, default=1.0)
+    parser.add_argument("--no-hr", action="store_true")
+    parser.add_argument("--no-cadence", action="store_true")
+    parser.add_argument("--noise-m", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=sorted(FORMATS), default="gpx")
+    parser.add_argument("-o", "--output", default="-")
+    args = parser.parse_args(argv)
+    track = generate_track(
+        args.points, args.sample_s, hr=not args.no_hr, cadence=not args.no_cadence,
+        noise_m=args.noise_m, seed=args.seed,
+    )
+    data = FORMATS[args.format](track)
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, "wb") as fh:
+            fh.write(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Stale-while-revalidate cache around the events scraper.
+
+Entries live in Django's cache keyed by region and limit. A fresh entry is
+served as-is; a stale one is served immediately while a single background
+refresh runs (single-flight lock via cache.add). Entries are only written on
+a successful scrape and never expire, so the last known good data replaces
+the scraper's MOCK data when the site is down.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from django.core.cache import cache
+
+from events_scraper import MOCK_POLAND, MOCK_WORLD, fetch_poland_events, fetch_world_events
+
+FRESH_SECONDS = 15 * 60
+LOCK_SECONDS = 120
+# Jak długo żądanie bez żadnych danych czeka na cudze pobieranie
+COLD_WAIT_SECONDS = 10.0
+COLD_POLL_SECONDS = 0.2
+
+FETCHERS: Dict[str, Callable[..., list]] = {"poland": fetch_poland_events, "world": fetch_world_events}
+MOCKS = {"poland": MOCK_POLAND, "world": MOCK_WORLD}
+
+
+def _key(kind: str, region: str, limit: int) -> str:
+    return f"events:{kind}:{region}:{limit}"
+
+
+def _spawn(target: Callable, *args) -> None:
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+
+def _refresh(region: str, limit: int) -> Optional[List[dict]]:
+    """Scrape one region and store the result; releases the single-flight lock."""
+    try:
+        try:
+            events = FETCHERS[region](limit=limit)
+        except Exception as exc:  # sieć / parser - zostajemy przy starych danych
+            print(f"[EVENTS CACHE] refresh {region} failed: {exc}")
+            return None
+        if not events or events == MOCKS[region]:
+            return None
+        cache.set(_key("data", region, limit), {"events": events, "fetched_at": time.time()}, None)
+        return events
+    finally:
+        cache.delete(_key("lock", region, limit))
+
+
+def _acquire(region: str, limit: int) -> bool:
+    return cache.add(_key("lock", region, limit), 1, LOCK_SECONDS)
+
+
+def cached_events(region: str, limit: int) -> List[dict]:
+    """Events for a region, never scraping more than once concurrently per key."""
+    entry = cache.get(_key("data", region, limit))
+    if entry is not None:
+        if time.time() - entry["fetched_at"] > FRESH_SECONDS and _acquire(region, limit):
+            _spawn(_refresh, region, limit)
+        return entry["events"]
+
+    # Zimny start: pierwsze żądanie pobiera synchronicznie, pozostałe czekają na jego wynik
+    if _acquire(region, limit):
+        return _refresh(region, limit) or []
+    deadline = time.monotonic() + COLD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(COLD_POLL_SECONDS)
+        entry = cache.get(_key("data", region, limit))
+        if entry is not None:
+            return entry["events"]
+        if cache.get(_key("lock", region, limit)) is None:
+            break
+    return []
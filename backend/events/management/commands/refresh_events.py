@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from events.models import Event
+from events.refresh import refresh_events
+
+
+class Command(BaseCommand):
+	help = (
+		"Refresh the Event table from month listing pages that are due (schedule e.g. hourly via "
+		"cron / Task Scheduler). Unchanged pages are skipped by content hash."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--region",
+			choices=[r for r, _ in Event.REGION_CHOICES],
+			action="append",
+			help="Region to refresh (repeatable, default: all)",
+		)
+		parser.add_argument("--force", action="store_true", help="Fetch every month regardless of refresh tiers")
+
+	def handle(self, *args, **options):
+		regions = options["region"] or [r for r, _ in Event.REGION_CHOICES]
+		for region, stats in refresh_events(regions, force=options["force"]).items():
+			self.stdout.write(
+				f"{region}: pages fetched {stats['fetched']} (unchanged {stats['unchanged']}, failed {stats['failed']}), "
+				f"events +{stats['created']} ~{stats['updated']} -{stats['deleted']}"
+			)
+		self.stdout.write(self.style.SUCCESS("Events refresh complete."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(choices=[('poland', 'Polska'), ('world', 'Świat')], max_length=16)),
+                ('name', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('place', models.CharField(max_length=255)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['date', 'name'],
+                'indexes': [models.Index(fields=['region', 'date'], name='events_even_region_6de5b9_idx')],
+                'unique_together': {('region', 'name', 'date')},
+            },
+        ),
+    ]
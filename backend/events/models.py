@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class Event(models.Model):
+	"""Running event scraped from maratonypolskie.pl (filled by `manage.py refresh_events`)."""
+	REGION_POLAND = "poland"
+	REGION_WORLD = "world"
+	REGION_CHOICES = [
+		(REGION_POLAND, "Polska"),
+		(REGION_WORLD, "Świat"),
+	]
+
+	region = models.CharField(max_length=16, choices=REGION_CHOICES)
+	name = models.CharField(max_length=255)
+	date = models.DateField()
+	place = models.CharField(max_length=255)
+	url = models.URLField(max_length=500, blank=True)
+	fetched_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		unique_together = ("region", "name", "date")
+		ordering = ["date", "name"]
+		indexes = [models.Index(fields=["region", "date"])]
+
+	def __str__(self) -> str:
+		return f"{self.name} ({self.date}, {self.region})"
+
+	def to_dict(self) -> dict:
+		return {"name": self.name, "date": self.date.isoformat(), "place": self.place, "url": self.url}
+
+
+class EventPageState(models.Model):
+	"""Last fetch of one month listing page; lets refresh_events skip unchanged pages."""
+	region = models.CharField(max_length=16, choices=Event.REGION_CHOICES)
+	year = models.PositiveSmallIntegerField()
+	month = models.PositiveSmallIntegerField()
+	content_hash = models.CharField(max_length=64, blank=True)
+	event_count = models.PositiveIntegerField(default=0)
+	fetched_at = models.DateTimeField()
+
+	class Meta:
+		unique_together = ("region", "year", "month")
+
+	def __str__(self) -> str:
+		return f"EventPageState({self.region} {self.year}-{self.month:02d})"
@@ -0,0 +1,117 @@
+"""Differential refresh of the Event table (run from cron via `manage.py refresh_events`).
+
+Each (region, year, month) listing page is fetched only when its tier
+interval has passed: near-term months often, distant ones rarely. Pages
+whose content hash did not change are not reparsed, and only events that
+actually changed are written. A page that parses to no events while the
+month had some is treated like a failed fetch and leaves the table alone.
+"""
+import hashlib
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from events_scraper import events_for_month, fetch_month_pages, is_foreign_place, scrape_window
+from .models import Event, EventPageState
+
+SOURCE_NAMES = {Event.REGION_POLAND: "Polska", Event.REGION_WORLD: "Swiat"}
+# (max. odległość w miesiącach od bieżącego, interval odświeżania)
+REFRESH_TIERS = [
+	(1, timedelta(hours=6)),
+	(5, timedelta(days=1)),
+	(None, timedelta(days=7)),
+]
+
+
+def refresh_interval(today: date, year: int, month: int) -> timedelta:
+	distance = (year - today.year) * 12 + (month - today.month)
+	for max_distance, interval in REFRESH_TIERS:
+		if max_distance is None or distance <= max_distance:
+			return interval
+	return REFRESH_TIERS[-1][1]
+
+
+def due_months(region: str, now, force: bool = False) -> List[Tuple[int, int]]:
+	today = now.date()
+	states = {(s.year, s.month): s for s in EventPageState.objects.filter(region=region)}
+	due = []
+	for year, month in scrape_window(today):
+		state = states.get((year, month))
+		if force or state is None or state.fetched_at + refresh_interval(today, year, month) <= now:
+			due.append((year, month))
+	return due
+
+
+def _region_events(region: str, html: str, year: int, month: int) -> Dict[Tuple[str, date], dict]:
+	events = {}
+	for ev in events_for_month(html, year, month):
+		if is_foreign_place(ev["place"]) != (region == Event.REGION_WORLD):
+			continue
+		events.setdefault((ev["name"][:255], ev["date"]), {"place": ev["place"][:255], "url": (ev["url"] or "")[:500]})
+	return events
+
+
+def store_month(region: str, year: int, month: int, events: Dict[Tuple[str, date], dict]) -> Dict[str, int]:
+	"""Bring one month of a region in line with ``events``, writing only differences."""
+	stats = {"created": 0, "updated": 0, "deleted": 0}
+	first = date(year, month, 1)
+	next_month = date(year + month // 12, month % 12 + 1, 1)
+	existing = {
+		(e.name, e.date): e
+		for e in Event.objects.filter(region=region, date__gte=first, date__lt=next_month)
+	}
+	new_rows = []
+	for key, fields in events.items():
+		current = existing.get(key)
+		if current is None:
+			new_rows.append(Event(region=region, name=key[0], date=key[1], **fields))
+		elif (current.place, current.url) != (fields["place"], fields["url"]):
+			current.place, current.url = fields["place"], fields["url"]
+			current.save(update_fields=["place", "url", "fetched_at"])
+			stats["updated"] += 1
+	Event.objects.bulk_create(new_rows)
+	stats["created"] = len(new_rows)
+	gone = [e.id for key, e in existing.items() if key not in events]
+	if gone:
+		stats["deleted"], _ = Event.objects.filter(id__in=gone).delete()
+	return stats
+
+
+def refresh_region(region: str, now=None, force: bool = False) -> Dict[str, int]:
+	now = now or timezone.now()
+	stats = {"fetched": 0, "unchanged": 0, "failed": 0, "created": 0, "updated": 0, "deleted": 0}
+	months = due_months(region, now, force=force)
+	pages = fetch_month_pages(SOURCE_NAMES[region], months)
+	for (year, month), html in pages.items():
+		if not html:
+			# Strona nie odpowiedziała - zostawiamy dotychczasowe wydarzenia i stan
+			stats["failed"] += 1
+			continue
+		content_hash = hashlib.sha256(html.encode("utf-8", "replace")).hexdigest()
+		state = EventPageState.objects.filter(region=region, year=year, month=month).first()
+		with transaction.atomic():
+			if state is not None and state.content_hash == content_hash:
+				stats["fetched"] += 1
+				stats["unchanged"] += 1
+				EventPageState.objects.filter(pk=state.pk).update(fetched_at=now)
+				continue
+			events = _region_events(region, html, year, month)
+			if not events and state is not None and state.event_count > 0:
+				# 200 bez wydarzeń (przerwa techniczna, zmiana HTML) nie kasuje znanych wydarzeń;
+				# stan bez zmian, więc miesiąc zostanie pobrany ponownie w następnym przebiegu
+				stats["failed"] += 1
+				continue
+			stats["fetched"] += 1
+			for key, value in store_month(region, year, month, events).items():
+				stats[key] += value
+			EventPageState.objects.update_or_create(
+				region=region, year=year, month=month,
+				defaults={"content_hash": content_hash, "event_count": len(events), "fetched_at": now},
+			)
+	return stats
+
+
+def refresh_events(regions: Iterable[str] = (Event.REGION_POLAND, Event.REGION_WORLD), force: bool = False, now=None) -> Dict[str, dict]:
+	return {region: refresh_region(region, now=now, force=force) for region in regions}
@@ -0,0 +1,249 @@
+import io
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+import events_scraper
+from . import cache as events_cache
+from .models import Event, EventPageState
+from .refresh import refresh_events
+
+
+def _ev(name, days, place="Kraków"):
+    return {"name": name, "date": (timezone.now().date() + timedelta(days=days)).isoformat(), "place": place, "url": ""}
+
+
+class EventsTests(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        Event.objects.create(region="poland", name="Bieg Niepodległości", date=today + timedelta(days=10), place="Warszawa")
+        Event.objects.create(region="poland", name="Cracovia Maraton", date=today + timedelta(days=40), place="Kraków")
+        Event.objects.create(region="poland", name="Stary bieg", date=today - timedelta(days=5), place="Łódź")
+        Event.objects.create(region="world", name="Berlin Marathon", date=today + timedelta(days=20), place="Berlin (DE)")
+
+    @patch("events_scraper.requests.post", side_effect=AssertionError("no network in list_events"))
+    def test_list_events_reads_database_only(self, _post):
+        data = self.client.get("/api/events/").json()
+        self.assertEqual([e["name"] for e in data["poland"]], ["Bieg Niepodległości", "Cracovia Maraton"])
+        self.assertEqual([e["name"] for e in data["world"]], ["Berlin Marathon"])
+
+    def test_list_events_filters(self):
+        today = timezone.now().date()
+        data = self.client.get("/api/events/", {"region": "poland", "q": "krak"}).json()
+        self.assertEqual([e["name"] for e in data["poland"]], ["Cracovia Maraton"])
+        self.assertEqual(data["world"], [])
+        data = self.client.get("/api/events/", {"date_to": (today + timedelta(days=15)).isoformat()}).json()
+        self.assertEqual(len(data["poland"]) + len(data["world"]), 1)
+        self.assertEqual(self.client.get("/api/events/", {"region": "mars"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/events/", {"date_from": "jutro"}).status_code, 400)
+
+
+class _ListingStub(BaseHTTPRequestHandler):
+    """Serves test_data/month_listing.html for whatever month/year is POSTed.
+
+    The fixture is a hand-written template ({mm}/{yyyy}/{dN} placeholders)
+    modelled on the site's table layout and iso-8859-2 encoding, not a
+    recorded page: it covers the fetch/parse plumbing, not real markup drift.
+    """
+    protocol_version = "HTTP/1.1"
+    template = (Path(__file__).parent / "test_data" / "month_listing.html").read_bytes().decode("iso-8859-2")
+    months = {v: k for k, v in events_scraper.MONTHS_PL.items()}
+    requests_seen = []
+    clients = set()
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        month, year = self.months[form["czasm1"][0]], form["czasr1"][0]
+        type(self).requests_seen.append((int(year), month))
+        type(self).clients.add(self.client_address)
+        time.sleep(0.05)
+        html = self.template
+        for key, value in {"{mm}": f"{month:02d}", "{yyyy}": year, "{d1}": "05", "{d2}": "15", "{d3}": "25",
+                           "{c1}": f"{year}{month}1", "{c2}": f"{year}{month}2"}.items():
+            html = html.replace(key, value)
+        body = html.encode("iso-8859-2")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=iso-8859-2")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ScraperFetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ListingStub)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/mp_index.php"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _ListingStub.requests_seen = []
+        _ListingStub.clients = set()
+
+    def test_concurrent_fetch_reuses_connections(self):
+        with patch.object(events_scraper, "SOURCE_URL", self.url), redirect_stdout(io.StringIO()):
+            events = events_scraper.fetch_poland_events(limit=500)
+        months = len(_ListingStub.requests_seen)
+        self.assertGreaterEqual(months, 25)
+        self.assertLessEqual(len(_ListingStub.clients), events_scraper.FETCH_WORKERS)
+        self.assertTrue(all("(" not in e["place"] for e in events))
+        self.assertEqual([e["date"] for e in events], sorted(e["date"] for e in events))
+        self.assertNotIn("Bieg promowany spoza miesiąca", {e["name"] for e in events})
+        self.assertTrue(events[0]["url"].startswith("https://www.maratonypolskie.pl/mp_index.php?"))
+
+    def test_fetch_stops_once_enough_events_collected(self):
+        with patch.object(events_scraper, "SOURCE_URL", self.url), patch.object(events_scraper, "FETCH_BUFFER", 0), \
+                redirect_stdout(io.StringIO()):
+            events_scraper._fetch_events_generic("Polska", limit=4, workers=2)
+        self.assertEqual(len(_ListingStub.requests_seen), 2)
+
+
+class EventsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+        self.results = [[_ev("Bieg A", 3)]]
+
+    def _fetch(self, limit):
+        self.calls.append(limit)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _patched(self):
+        return patch.dict(events_cache.FETCHERS, {"poland": self._fetch})
+
+    def test_fresh_entry_is_served_without_scraping(self):
+        with self._patched():
+            self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+            self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+        self.assertEqual(self.calls, [10])
+
+    def test_stale_entry_served_while_single_refresh_runs(self):
+        spawned = []
+        self.results.append([_ev("Bieg B", 4)])
+        with self._patched(), patch.object(events_cache, "_spawn", lambda fn, *args: spawned.append((fn, args))):
+            events_cache.cached_events("poland", 10)
+            with patch.object(events_cache, "FRESH_SECONDS", -1):
+                self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+                self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+            self.assertEqual(len(spawned), 1)  # lock held -> no duplicate refresh
+            fn, args = spawned[0]
+            fn(*args)
+            self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg B")
+
+    def test_last_known_good_replaces_mock_when_site_is_down(self):
+        self.results += [ConnectionError("down"), events_cache.MOCKS["poland"]]
+        with self._patched(), patch.object(events_cache, "_spawn", lambda fn, *args: fn(*args)), \
+                patch.object(events_cache, "FRESH_SECONDS", -1), redirect_stdout(io.StringIO()):
+            events_cache.cached_events("poland", 10)
+            self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+            self.assertEqual(events_cache.cached_events("poland", 10)[0]["name"], "Bieg A")
+        self.assertEqual(len(self.calls), 3)
+
+    def test_list_events_uses_cache_when_table_is_empty(self):
+        with self._patched():
+            data = self.client.get("/api/events/", {"region": "poland", "limit": 10}).json()
+        self.assertEqual([e["name"] for e in data["poland"]], ["Bieg A"])
+
+
+class EventParserTests(TestCase):
+    # Szybkość sprawdza benchmarks/events_parser.py --min-speedup; tu tylko zgodność wyników
+    def test_fast_parser_matches_bs4(self):
+        from benchmarks import events_parser
+
+        html = events_parser.build_month_page(rows=200)
+        events = events_scraper._parse_events_from_html(html)
+        self.assertGreater(len(events), 150)
+        self.assertEqual(events, events_parser.parse_events_bs4(html))
+
+    def test_date_regex_matches_strptime_formats(self):
+        from benchmarks import events_parser
+
+        for text in ["05.05.2025(sob)", "2025.5.1", "5-5-2025", "05.05.25", "31.02.2025", "05.05.70", "12.12.2025 (1.5)", "x"]:
+            self.assertEqual(events_scraper._parse_date_fast(text), events_parser.parse_date_strptime(text), text)
+
+
+def _render_month(year, month, place="Kraków"):
+    html = (Path(__file__).parent / "test_data" / "month_listing.html").read_bytes().decode("iso-8859-2")
+    for key, value in {"{mm}": f"{month:02d}", "{yyyy}": str(year), "{d1}": "05", "{d2}": "15", "{d3}": "25",
+                       "{c1}": "1", "{c2}": "2", "Kraków": place}.items():
+        html = html.replace(key, value)
+    return html
+
+
+class EventRefreshTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.requested = []
+        self.overrides = {}
+
+    def _pages(self, mapa_nazwa, months, workers=None):
+        months = list(months)
+        self.requested.append(months)
+        return {ym: self.overrides.get(ym, _render_month(*ym)) for ym in months}
+
+    def _refresh(self, **kwargs):
+        with patch("events.refresh.fetch_month_pages", self._pages):
+            return refresh_events(["poland"], now=kwargs.pop("now", self.now), **kwargs)["poland"]
+
+    def test_refresh_tiers_and_unchanged_pages(self):
+        first = self._refresh()
+        months = len(self.requested[0])
+        self.assertEqual(first["fetched"], months)
+        self.assertEqual(first["created"], 2 * months)
+        self.assertEqual(EventPageState.objects.filter(region="poland").count(), months)
+
+        self.assertEqual(self._refresh()["fetched"], 0)  # nothing due yet
+        near = self._refresh(now=self.now + timedelta(hours=7))
+        self.assertEqual(near["fetched"], 2)  # only current and next month
+        self.assertEqual(near["unchanged"], 2)
+        self.assertEqual(near["created"] + near["updated"] + near["deleted"], 0)
+
+    def test_only_changed_month_is_written(self):
+        self._refresh()
+        ym = (self.now.year + 1, 3)
+        self.overrides[ym] = _render_month(*ym, place="Kraków, Rynek")
+        self.overrides[(self.now.year + 1, 4)] = None  # source error keeps stored events
+        stats = self._refresh(force=True)
+        self.assertEqual((stats["updated"], stats["created"], stats["deleted"], stats["failed"]), (1, 0, 0, 1))
+        self.assertEqual(Event.objects.filter(place="Kraków, Rynek").count(), 1)
+        self.assertEqual(Event.objects.filter(date__year=self.now.year + 1, date__month=4).count(), 2)
+
+    def test_empty_page_does_not_wipe_known_events(self):
+        self._refresh()
+        ym = (self.now.year + 1, 3)
+        state = EventPageState.objects.get(region="poland", year=ym[0], month=ym[1])
+        self.overrides[ym] = "<html><body><h1>Przerwa techniczna</h1></body></html>"
+        stats = self._refresh(force=True)
+        self.assertEqual((stats["failed"], stats["deleted"]), (1, 0))
+        self.assertEqual(Event.objects.filter(date__year=ym[0], date__month=ym[1]).count(), 2)
+        self.assertEqual(EventPageState.objects.get(pk=state.pk).content_hash, state.content_hash)
+
+    def test_refresh_command_runs(self):
+        out = io.StringIO()
+        with patch("events.refresh.fetch_month_pages", self._pages):
+            call_command("refresh_events", "--region", "world", stdout=out)
+        self.assertTrue(Event.objects.filter(region="world", place="Berlin (DE)").exists())
+        self.assertFalse(Event.objects.filter(region="world", place="Kraków").exists())
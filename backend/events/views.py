@@ -1,39 +1,93 @@
+import asyncio
+from datetime import date
+
+from asgiref.sync import sync_to_async
+
+from django.db.models import Q
 from django.http import JsonResponse, HttpRequest
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
-from events_scraper import fetch_poland_events, fetch_world_events
+from .cache import cached_events
+from .models import Event
+
+# Domyślne limity jak w scraperze (200 dla Polski i 60 dla Świata)
+DEFAULT_LIMITS = {Event.REGION_POLAND: 200, Event.REGION_WORLD: 60}
+MAX_LIMIT = 1000
+
+
+def _parse_day(value):
+    if not value:
+        return None
+    return date.fromisoformat(value)
+
 
 @csrf_exempt
-def list_events(request: HttpRequest) -> JsonResponse:
-    """Return upcoming running events for Poland and World."""
+async def list_events(request: HttpRequest) -> JsonResponse:
+    """Return upcoming running events for Poland and World from the Event table.
+
+    Query params (all optional): date_from / date_to (YYYY-MM-DD, date_from
+    defaults to today), region ("poland" | "world"), q (name or place text),
+    limit (per region). The table is filled by `manage.py refresh_events`,
+    so this never waits on the remote site; regions are queried concurrently
+    with the async ORM.
+    """
     if request.method != "GET":
         return JsonResponse({"error": "Only GET allowed"}, status=405)
 
-    poland = []
-    world = []
-    
+    try:
+        date_from = _parse_day(request.GET.get("date_from")) or timezone.now().date()
+        date_to = _parse_day(request.GET.get("date_to"))
+    except ValueError:
+        return JsonResponse({"error": "Dates must be YYYY-MM-DD"}, status=400)
+
+    region = (request.GET.get("region") or "").strip().lower()
+    regions = [r for r, _ in Event.REGION_CHOICES]
+    if region and region not in regions:
+        return JsonResponse({"error": f"region must be one of: {', '.join(regions)}"}, status=400)
+
     # Sprawdzamy, czy w URL podano konkretny limit (np. ?limit=10 dla testów)
-    limit_param = request.GET.get("limit")
     custom_limit = None
-    
+    limit_param = request.GET.get("limit")
     if limit_param:
         try:
-            custom_limit = int(limit_param)
+            custom_limit = max(1, min(MAX_LIMIT, int(limit_param)))
         except (TypeError, ValueError):
             pass
 
-    try:
-        if custom_limit:
-            # Jeśli ktoś ręcznie wpisał limit w URL, używamy go dla obu list
-            poland = fetch_poland_events(limit=custom_limit)
-            world = fetch_world_events(limit=custom_limit)
-        else:
-            # Jeśli nie ma parametru w URL, używamy domyślnych wartości ze scrapera
-            # (czyli 200 dla Polski i 60 dla Świata)
-            poland = fetch_poland_events()
-            world = fetch_world_events()
-            
-    except Exception as exc:  # pragma: no cover - defensive
-        return JsonResponse({"error": f"Failed to fetch events: {exc}"}, status=502)
-
-    return JsonResponse({"poland": poland, "world": world})
\ No newline at end of file
+    qs = Event.objects.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    text = (request.GET.get("q") or "").strip()
+    if text:
+        qs = qs.filter(Q(name__icontains=text) | Q(place__icontains=text))
+
+    result = {r: [] for r in regions}
+    wanted = [region] if region else regions
+    found = await asyncio.gather(*(
+        _region_events(qs, r, custom_limit or DEFAULT_LIMITS[r], date_from, date_to, text) for r in wanted
+    ))
+    result.update(zip(wanted, found))
+    return JsonResponse(result)
+
+
+async def _region_events(qs, region, limit, date_from, date_to, text):
+    if await Event.objects.filter(region=region).aexists():
+        return [e.to_dict() async for e in qs.filter(region=region)[:limit]]
+    # Tabela jeszcze nie wypełniona (refresh_events nie był uruchamiany) - cache scrapera.
+    # Zimny start może scrapować, więc poza wątkiem ORM, żeby nie blokować drugiego regionu.
+    events = await sync_to_async(cached_events, thread_sensitive=False)(region, limit)
+    return _filter_cached(events, date_from, date_to, text)
+
+
+def _filter_cached(events, date_from, date_to, text):
+    """Apply the list_events filters to cached scraper output (ISO dates compare as strings)."""
+    text = text.lower()
+    out = []
+    for ev in events:
+        if ev["date"] < date_from.isoformat() or (date_to and ev["date"] > date_to.isoformat()):
+            continue
+        if text and text not in ev["name"].lower() and text not in ev["place"].lower():
+            continue
+        out.append(ev)
+    return out
@@ -1,9 +1,12 @@
 import requests
-from bs4 import BeautifulSoup
+import requests.adapters
 from datetime import datetime, date
+from html.parser import HTMLParser
 from urllib.parse import urljoin
+import os
 import re
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 # Wyłączenie ostrzeżeń SSL
 import urllib3
@@ -20,151 +23,214 @@ MONTHS_PL = {
     9: "wrzesien", 10: "pazdziernik", 11: "listopad", 12: "grudzien",
 }
 
-def _clean_text(text: str) -> str:
-    if not text:
-        return ""
-    garbage = ["Kliknij tutaj", "ZAKRES WYSZUKIWANIA", "->", "Dzień:", "Dzien:", "\xa0", "&nbsp;"]
-    cleaned = text
-    for g in garbage:
-        cleaned = cleaned.replace(g, "")
-    return " ".join(cleaned.split())
-
-def _parse_date(date_str: str):
-    if not date_str:
-        return None
-    clean = re.sub(r'\(.*?\)', '', date_str).strip()
-    formats = ["%d.%m.%Y", "%Y.%m.%d", "%d-%m-%Y", "%d.%m.%y"]
-    for fmt in formats:
-        try:
-            return datetime.strptime(clean, fmt).date()
-        except ValueError:
-            continue
-    return None
+# Adres źródła można nadpisać (np. lokalny stub w testach)
+SOURCE_URL = os.environ.get("EVENTS_SOURCE_URL", "https://www.maratonypolskie.pl/mp_index.php")
+FETCH_WORKERS = 6
+FETCH_TIMEOUT = 8
+# Zapas wydarzeń ponad limit, po którym przestajemy pobierać kolejne miesiące
+FETCH_BUFFER = 200
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Content-Type": "application/x-www-form-urlencoded"
+}
 
-def _fetch_html(params):
-    url = "https://www.maratonypolskie.pl/mp_index.php"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Content-Type": "application/x-www-form-urlencoded"
-    }
+def _make_session(pool_size: int = FETCH_WORKERS) -> requests.Session:
+    """Sesja keep-alive współdzielona przez wątki pobierające miesiące (jedno połączenie TLS na wątek)."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def _fetch_html(params, session=None):
+    url = SOURCE_URL
     try:
-        resp = requests.post(url, data=params, headers=headers, timeout=8, verify=False)
+        if session is not None:
+            resp = session.post(url, data=params, timeout=FETCH_TIMEOUT, verify=False)
+        else:
+            resp = requests.post(url, data=params, headers=HEADERS, timeout=FETCH_TIMEOUT, verify=False)
         resp.encoding = "iso-8859-2"
         return resp.text if resp.status_code == 200 else None
     except Exception as e:
         print(f"DEBUG: Wyjątek sieciowy: {e}")
         return None
 
+# --- SZYBKA ŚCIEŻKA: strumieniowy tokenizer wierszy + jedna skompilowana regex dla dat ---
+_HAS_DAY_MONTH = re.compile(r'\d+\.\d+')
+_PARENS = re.compile(r'\(.*?\)')
+# Odpowiedniki formatów strptime: %d.%m.%Y, %Y.%m.%d, %d-%m-%Y, %d.%m.%y
+# (parser referencyjny: benchmarks/events_parser.py)
+_DATE_RE = re.compile(
+    r'(?:(?P<d1>\d{1,2})\.(?P<m1>\d{1,2})\.(?P<y1>\d{4}|\d{2})'
+    r'|(?P<y2>\d{4})\.(?P<m2>\d{1,2})\.(?P<d2>\d{1,2})'
+    r'|(?P<d3>\d{1,2})-(?P<m3>\d{1,2})-(?P<y3>\d{4}))'
+)
+_GARBAGE_RE = re.compile("|".join(re.escape(g) for g in ["Kliknij tutaj", "ZAKRES WYSZUKIWANIA", "->", "Dzień:", "Dzien:", "\xa0", "&nbsp;"]))
+
+
+def _parse_date_fast(date_str: str):
+    m = _DATE_RE.fullmatch(_PARENS.sub('', date_str).strip())
+    if not m:
+        return None
+    g = m.groupdict()
+    if g["d1"]:
+        day, month, year = int(g["d1"]), int(g["m1"]), g["y1"]
+        # %y: 69-99 -> 19xx, 00-68 -> 20xx (jak strptime)
+        year = int(year) if len(year) == 4 else (1900 + int(year) if int(year) >= 69 else 2000 + int(year))
+    elif g["y2"]:
+        day, month, year = int(g["d2"]), int(g["m2"]), int(g["y2"])
+    else:
+        day, month, year = int(g["d3"]), int(g["m3"]), int(g["y3"])
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+class _RowTokenizer(HTMLParser):
+    """Zbiera wiersze <tr> jak soup.find_all("tr"): każdy wiersz dostaje wszystkie
+    zagnieżdżone <td>, a tekst trafia do wszystkich otwartych komórek i wierszy."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._stack = []  # otwarte ("tr", row) / ("td", cell)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            row = {"text": [], "cells": []}
+            self.rows.append(row)
+            self._stack.append(("tr", row))
+        elif tag == "td":
+            cell = {"parts": [], "link": None}
+            for kind, obj in self._stack:
+                if kind == "tr":
+                    obj["cells"].append(cell)
+            self._stack.append(("td", cell))
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            for kind, obj in self._stack:
+                if kind == "td" and obj["link"] is None:
+                    obj["link"] = href or ""
+
+    def handle_endtag(self, tag):
+        if tag not in ("tr", "td"):
+            return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                del self._stack[i:]
+                return
+
+    def handle_data(self, data):
+        stripped = data.strip()
+        for kind, obj in self._stack:
+            if kind == "tr":
+                obj["text"].append(data)
+            elif stripped:
+                obj["parts"].append(stripped)
+
+
 def _parse_events_from_html(html_content, base_url="https://www.maratonypolskie.pl/"):
     if not html_content:
         return []
-    soup = BeautifulSoup(html_content, "html.parser")
+    tokenizer = _RowTokenizer()
+    tokenizer.feed(html_content)
+    tokenizer.close()
     events = []
-    rows = soup.find_all("tr")
-    
-    for row in rows:
-        row_text = row.get_text()
-        
+
+    for row in tokenizer.rows:
+        row_text = "".join(row["text"]).upper()
         # Filtrowanie nagłówków reklamowych
-        if "ZOBACZ OFERT" in row_text.upper() or "WYDARZENIA PROMOWANE" in row_text.upper():
+        if "ZOBACZ OFERT" in row_text or "WYDARZENIA PROMOWANE" in row_text:
             continue
-            
-        cols = row.find_all("td")
+        cols = row["cells"]
         if len(cols) < 3:
             continue
-            
+
         # 1. Szukamy DATY
         event_date = None
         date_col_idx = -1
-        
         for idx in range(0, min(3, len(cols))):
-            txt = cols[idx].get_text(strip=True)
-            if re.search(r'\d+\.\d+', txt):
-                parsed = _parse_date(txt)
+            txt = "".join(cols[idx]["parts"])
+            if _HAS_DAY_MONTH.search(txt):
+                parsed = _parse_date_fast(txt)
                 if parsed:
                     event_date = parsed
                     date_col_idx = idx
                     break
-        
         if not event_date:
             continue
 
-        # 2. Szukamy MIEJSCA i NAZWY
-        place = ""
-        name = ""
-        url = ""
-        
-        found_texts = []
-        for idx in range(date_col_idx + 1, len(cols)):
-            cell = cols[idx]
-            txt = _clean_text(cell.get_text(" ", strip=True))
+        # 2. Zazwyczaj pierwszy niepusty tekst to Miejsce, drugi to Nazwa
+        found = []
+        for cell in cols[date_col_idx + 1:]:
+            txt = " ".join(_GARBAGE_RE.sub("", " ".join(cell["parts"])).split())
             if len(txt) > 1:
-                link = cell.find("a")
-                found_texts.append({
-                    "text": txt,
-                    "has_link": bool(link),
-                    "href": link["href"] if link and link.has_attr("href") else ""
-                })
-
-        # Zazwyczaj pierwszy element to Miejsce, drugi to Nazwa
-        if len(found_texts) >= 1:
-            place = found_texts[0]["text"]
-            if len(found_texts) >= 2:
-                name = found_texts[1]["text"]
-                if found_texts[1]["href"]:
-                     url = urljoin(base_url, found_texts[1]["href"]) if not found_texts[1]["href"].startswith("http") else found_texts[1]["href"]
-
-        if name and place:
-            events.append({
-                "name": name,
-                "date": event_date,
-                "place": place,
-                "url": url,
-            })
-            
+                found.append((txt, cell["link"] or ""))
+                if len(found) == 2:
+                    break
+        if len(found) < 2:
+            continue
+        (place, _), (name, href) = found
+        url = (href if href.startswith("http") else urljoin(base_url, href)) if href else ""
+        events.append({"name": name, "date": event_date, "place": place, "url": url})
+
     return events
 
-def _fetch_events_generic(mapa_nazwa: str, limit: int) -> list[dict]:
+def _month_params(mapa_nazwa: str, year: int, month: int) -> dict:
+    return {
+        "dzienp1": "1", "dzienk1": "31",
+        "czasm1": MONTHS_PL[month], "czasr1": str(year),
+        "mapa_nazwa": mapa_nazwa,
+        "mapa_tryb2": "Tekstowo",
+        "grp": "13", "wielkosc": "2", "dzial": "3", "action": "1"
+    }
+
+def _fetch_month(session, mapa_nazwa: str, year: int, month: int) -> list[dict]:
+    html = _fetch_html(_month_params(mapa_nazwa, year, month), session=session)
+    if not html:
+        return []
+    # --- KLUCZOWA POPRAWKA: ŚCISŁA KONTROLA DATY ---
+    return events_for_month(html, year, month)
+
+def scrape_window(today=None) -> list[tuple[int, int]]:
+    """(rok, miesiąc) odpytywane przez scraper: bieżący miesiąc do końca roku + 2 kolejne lata."""
+    today = today or datetime.now().date()
+    return [
+        (year, m)
+        for year in (today.year, today.year + 1, today.year + 2)
+        for m in range(today.month if year == today.year else 1, 13)
+    ]
+
+def fetch_month_pages(mapa_nazwa: str, months, workers: int = FETCH_WORKERS) -> dict:
+    """Surowy HTML wybranych miesięcy {(rok, miesiąc): html | None}, pobierany równolegle jedną sesją."""
+    months = list(months)
+    if not months:
+        return {}
+    with _make_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        pages = pool.map(lambda ym: _fetch_html(_month_params(mapa_nazwa, *ym), session=session), months)
+        return dict(zip(months, pages))
+
+def events_for_month(html: str, year: int, month: int) -> list[dict]:
+    # Odrzucamy "promowane" biegi z inną datą niż aktualnie odpytywany miesiąc
+    return [ev for ev in _parse_events_from_html(html) if ev['date'].year == year and ev['date'].month == month]
+
+def _fetch_events_generic(mapa_nazwa: str, limit: int, workers: int = FETCH_WORKERS) -> list[dict]:
     print(f"\n[SCRAPER] Pobieranie: {mapa_nazwa} (limit: {limit})")
     today = datetime.now().date()
-    current_year = today.year
-    
     # Pobieramy bieżący rok i 2 kolejne
-    years = [current_year, current_year + 1, current_year + 2]
+    months = scrape_window(today)
     all_events = []
-
-    for year in years:
-        start_month = today.month if year == current_year else 1
-        
-        for m in range(start_month, 13):
-            # Zwiększony bufor bezpieczeństwa
-            if len(all_events) >= limit + 200: 
+    # Miesiące pobieramy falami po `workers` równoległych zapytań; kolejna fala
+    # startuje tylko, jeśli wciąż brakuje wydarzeń (zwiększony bufor bezpieczeństwa)
+    with _make_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(months), workers):
+            if len(all_events) >= limit + FETCH_BUFFER:
                 break
-                
-            print(f"DEBUG: Pobieram {year}-{m}...")
-            params = {
-                "dzienp1": "1", "dzienk1": "31",
-                "czasm1": MONTHS_PL[m], "czasr1": str(year),
-                "mapa_nazwa": mapa_nazwa,
-                "mapa_tryb2": "Tekstowo",
-                "grp": "13", "wielkosc": "2", "dzial": "3", "action": "1"
-            }
-            html = _fetch_html(params)
-            
-            if html:
-                found = _parse_events_from_html(html)
-                
-                # --- KLUCZOWA POPRAWKA: ŚCISŁA KONTROLA DATY ---
-                # Odrzucamy "promowane" biegi z inną datą niż aktualnie odpytywany miesiąc
-                valid_for_month = []
-                for ev in found:
-                    if ev['date'].year == year and ev['date'].month == m:
-                        valid_for_month.append(ev)
-                
-                all_events.extend(valid_for_month)
-
-        if len(all_events) >= limit + 200:
-            break
+            wave = months[start:start + workers]
+            for found in pool.map(lambda ym: _fetch_month(session, mapa_nazwa, *ym), wave):
+                all_events.extend(found)
 
     unique = []
     seen = set()
@@ -181,12 +247,18 @@ def _fetch_events_generic(mapa_nazwa: str, limit: int) -> list[dict]:
     print(f"[SCRAPER] Wynik {mapa_nazwa}: {len(unique)} unikalnych przyszłych.")
     return unique
 
+_COUNTRY_CODE = re.compile(r'\([A-Z]{2,3}\)')
+
+def is_foreign_place(place: str) -> bool:
+    """Wydarzenia zagraniczne mają w miejscu kod kraju, np. "Berlin (DE)"."""
+    return bool(_COUNTRY_CODE.search(place))
+
 # --- ZMIANA LIMITU DOMYŚLNEGO DLA POLSKI NA 200 ---
 def fetch_poland_events(limit: int = 200) -> list[dict]:
     raw = _fetch_events_generic("Polska", limit)
     clean = []
     for ev in raw:
-        if re.search(r'\([A-Z]{2,3}\)', ev["place"]):
+        if is_foreign_place(ev["place"]):
             continue
         clean.append(ev)
     return clean[:limit]
@@ -199,9 +271,7 @@ def fetch_world_events(limit: int = 60) -> list[dict]:
     
     for ev in raw:
         place = ev["place"]
-        has_country_code = bool(re.search(r'\([A-Z]{2,3}\)', place))
-        
-        if has_country_code:
+        if is_foreign_place(place):
             clean.append(ev)
             
     if not clean:
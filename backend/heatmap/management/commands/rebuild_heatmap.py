@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from heatmap.models import HeatmapTile
+from heatmap.tiles import apply_track
+from segments.models import TrackGeometry
+
+
+class Command(BaseCommand):
+    help = "Rebuild heatmap tiles from stored track geometry (run index_track_geometry first for old workouts)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild tiles of this user id")
+
+    def handle(self, *args, **options):
+        tiles = HeatmapTile.objects.all()
+        geometries = TrackGeometry.objects.order_by("id")
+        if options["user"]:
+            tiles = tiles.filter(user_id=options["user"])
+            geometries = geometries.filter(user_id=options["user"])
+        tiles.delete()
+
+        ids = list(geometries.values_list("id", flat=True))
+        self.stdout.write(f"Rebuilding heatmap from {len(ids)} tracks...")
+        for geometry_id in ids:
+            user_id, points = TrackGeometry.objects.values_list("user_id", "points").get(id=geometry_id)
+            apply_track(user_id, points, sign=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Heatmap rebuilt. {HeatmapTile.objects.count()} tiles stored."))
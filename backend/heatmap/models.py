@@ -0,0 +1,24 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class HeatmapTile(models.Model):
+    """Pass counts for one slippy-map tile (z/x/y) of a user's heatmap.
+
+    ``counts`` holds TILE_GRID x TILE_GRID little-endian uint16 values (see
+    heatmap.tiles); ``version`` is bumped on every change and used as ETag.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="heatmap_tiles")
+    z = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    counts = models.BinaryField()
+    max_count = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "z", "x", "y")
+
+    def __str__(self):
+        return f"HeatmapTile(user={self.user_id}, {self.z}/{self.x}/{self.y})"
@@ -0,0 +1,100 @@
+import io
+from datetime import datetime, timedelta, timezone as dt_tz
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from workouts.models import Workout
+from .models import HeatmapTile
+from .tiles import MAX_ZOOM, MIN_ZOOM, _load_counts, _project, TILE_GRID
+
+
+def _gpx(lon: float = 19.94) -> bytes:
+    t0 = datetime(2024, 6, 1, 6, 0, tzinfo=dt_tz.utc)
+    pts = "".join(
+        f'<trkpt lat="{50.06 + i * 0.0001:.6f}" lon="{lon:.6f}"><time>{(t0 + timedelta(seconds=3 * i)).isoformat()}</time></trkpt>'
+        for i in range(100)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+        f"<trk><trkseg>{pts}</trkseg></trk></gpx>"
+    ).encode("utf-8")
+
+
+def _tile_xy(lat: float, lon: float, z: int):
+    x, y = _project(lat, lon, z)
+    return int(x) // TILE_GRID, int(y) // TILE_GRID
+
+
+class HeatmapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="heat", password="pass12345")
+        self.client.login(username="heat", password="pass12345")
+
+    def _upload(self, gpx: bytes) -> Workout:
+        w = Workout.objects.create(user=self.user, title="Run", source="manual", raw_data={})
+        self.client.post(f"/api/workouts/{w.id}/gpx/", {"file": SimpleUploadedFile("run.gpx", gpx)})
+        return w
+
+    def _peak(self, z: int = MAX_ZOOM) -> int:
+        x, y = _tile_xy(50.065, 19.94, z)
+        tile = HeatmapTile.objects.get(user=self.user, z=z, x=x, y=y)
+        return max(_load_counts(tile.counts))
+
+    def test_upload_adds_and_delete_removes_counts(self):
+        first = self._upload(_gpx())
+        self.assertEqual(self._peak(), 1)
+        self.assertEqual(HeatmapTile.objects.filter(user=self.user, z=MIN_ZOOM).count(), 1)
+        self._upload(_gpx())
+        self.assertEqual(self._peak(), 2)
+
+        self.client.delete(f"/api/workouts/{first.id}/")
+        self.assertEqual(self._peak(), 1)
+
+    def test_reupload_replaces_previous_track(self):
+        w = self._upload(_gpx())
+        self.client.post(f"/api/workouts/{w.id}/gpx/", {"file": SimpleUploadedFile("run.gpx", _gpx())})
+        self.assertEqual(self._peak(), 1)
+
+    def test_tile_endpoint_serves_png_with_etag(self):
+        self._upload(_gpx())
+        x, y = _tile_xy(50.065, 19.94, 13)
+        resp = self.client.get(f"/api/heatmap/13/{x}/{y}.png")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "image/png")
+        self.assertTrue(resp.content.startswith(b"\x89PNG"))
+        self.assertIn("max-age", resp["Cache-Control"])
+
+        cached = self.client.get(f"/api/heatmap/13/{x}/{y}.png", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        # Wiersz kafla bez bloba, potem sam blob - bez ponownego pobierania całego wiersza
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(f"/api/heatmap/13/{x}/{y}.png")
+        tile_sql = [q["sql"] for q in ctx.captured_queries if "heatmap_heatmaptile" in q["sql"]]
+        self.assertEqual(len(tile_sql), 2)
+        self.assertNotIn('"counts"', tile_sql[0])
+        self.assertNotIn('"version"', tile_sql[1])
+
+        self._upload(_gpx())
+        changed = self.client.get(f"/api/heatmap/13/{x}/{y}.png", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_deep_zoom_and_empty_tiles(self):
+        self._upload(_gpx())
+        x, y = _tile_xy(50.065, 19.94, MAX_ZOOM + 2)
+        self.assertEqual(self.client.get(f"/api/heatmap/{MAX_ZOOM + 2}/{x}/{y}.png").status_code, 200)
+        empty = self.client.get("/api/heatmap/10/0/0.png")
+        self.assertEqual(empty.status_code, 200)
+        self.assertEqual(self.client.get("/api/heatmap/2/0/0.png").status_code, 404)
+
+    def test_rebuild_command_matches_incremental_tiles(self):
+        self._upload(_gpx())
+        self._upload(_gpx(lon=19.95))
+        before = {(t.z, t.x, t.y): bytes(t.counts) for t in HeatmapTile.objects.all()}
+        call_command("rebuild_heatmap", stdout=io.StringIO())
+        after = {(t.z, t.x, t.y): bytes(t.counts) for t in HeatmapTile.objects.all()}
+        self.assertEqual(before, after)
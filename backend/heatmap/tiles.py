@@ -0,0 +1,159 @@
+"""Rasterize tracks into per-zoom heatmap tiles and render them as PNG.
+
+Each stored tile is a TILE_GRID x TILE_GRID grid of uint16 pass counts in Web
+Mercator tile coordinates. A workout adds 1 to every cell its track crosses
+(once per workout), so tiles are updated incrementally on upload and
+decremented on delete instead of being rebuilt from all GPX data.
+"""
+import io
+import math
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import HeatmapTile
+
+MIN_ZOOM = 5
+MAX_ZOOM = 14
+TILE_GRID = 128
+TILE_PX = 256
+# Segments longer than this are GPS gaps and are not drawn as lines
+MAX_JUMP_M = 1000.0
+MAX_COUNT = 0xFFFF
+_EARTH_M = 40075016.686
+
+
+def _project(lat: float, lon: float, z: int) -> Tuple[float, float]:
+    """Web Mercator position in heatmap cells (TILE_GRID cells per tile) at zoom z."""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    n = (1 << z) * TILE_GRID
+    x = (lon + 180.0) / 360.0 * n
+    rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def rasterize(coords: Sequence[Sequence[float]], z: int) -> Dict[Tuple[int, int], Set[int]]:
+    """Cells crossed by a track at zoom z, grouped by tile: {(tx, ty): {cell_index}}."""
+    n = (1 << z) * TILE_GRID
+    cell_m = _EARTH_M / n
+    cells: Set[Tuple[int, int]] = set()
+    prev = None
+    for c in coords:
+        x, y = _project(c[0], c[1], z)
+        if prev is not None:
+            dx, dy = x - prev[0], y - prev[1]
+            span = max(abs(dx), abs(dy))
+            if span > 1 and span * cell_m * math.cos(math.radians(c[0])) <= MAX_JUMP_M:
+                steps = int(span)
+                for k in range(1, steps + 1):
+                    f = k / (steps + 1)
+                    cells.add((int(prev[0] + dx * f), int(prev[1] + dy * f)))
+        cells.add((int(x), int(y)))
+        prev = (x, y)
+
+    tiles: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+    limit = n - 1
+    for cx, cy in cells:
+        cx = min(max(cx, 0), limit)
+        cy = min(max(cy, 0), limit)
+        tiles[(cx // TILE_GRID, cy // TILE_GRID)].add((cy % TILE_GRID) * TILE_GRID + (cx % TILE_GRID))
+    return tiles
+
+
+def _load_counts(data) -> array:
+    counts = array("H")
+    if data:
+        counts.frombytes(bytes(data))
+    if len(counts) != TILE_GRID * TILE_GRID:
+        counts = array("H", bytes(2 * TILE_GRID * TILE_GRID))
+    return counts
+
+
+def apply_track(user_id: int, coords: Sequence[Sequence[float]], sign: int = 1, zooms: Optional[Iterable[int]] = None) -> int:
+    """Add (sign=1) or remove (sign=-1) one track from the user's tiles. Returns tiles touched."""
+    if len(coords) < 1:
+        return 0
+    touched = 0
+    with transaction.atomic():
+        for z in zooms or range(MIN_ZOOM, MAX_ZOOM + 1):
+            grouped = rasterize(coords, z)
+            if not grouped:
+                continue
+            existing = {
+                (t.x, t.y): t
+                for t in HeatmapTile.objects.select_for_update().filter(
+                    user_id=user_id, z=z, x__in={k[0] for k in grouped}, y__in={k[1] for k in grouped}
+                )
+            }
+            to_create = []
+            for (tx, ty), idxs in grouped.items():
+                tile = existing.get((tx, ty))
+                if tile is None and sign < 0:
+                    continue
+                counts = _load_counts(tile.counts if tile else None)
+                for i in idxs:
+                    counts[i] = max(0, min(MAX_COUNT, counts[i] + sign))
+                peak = max(counts)
+                if tile is None:
+                    to_create.append(HeatmapTile(user_id=user_id, z=z, x=tx, y=ty, counts=counts.tobytes(), max_count=peak))
+                elif peak == 0:
+                    tile.delete()
+                else:
+                    HeatmapTile.objects.filter(pk=tile.pk).update(
+                        counts=counts.tobytes(), max_count=peak, version=F("version") + 1
+                    )
+                touched += 1
+            HeatmapTile.objects.bulk_create(to_create)
+    return touched
+
+
+def _ramp(v: float) -> Tuple[int, int, int, int]:
+    """Transparent -> red -> yellow -> white for v in (0, 1]."""
+    if v < 0.5:
+        return 255, int(510 * v), 0, int(120 + 270 * v)
+    return 255, 255, int(510 * (v - 0.5)), 255
+
+
+def render_png(counts_data, max_count: int, region: Optional[Tuple[int, int, int]] = None) -> bytes:
+    """Render stored counts as a TILE_PX x TILE_PX RGBA PNG (log-scaled intensity).
+
+    ``region`` = (dz, ox, oy) renders the sub-tile ``dz`` zoom levels deeper
+    (used to serve zooms above MAX_ZOOM from the deepest stored tile).
+    """
+    from PIL import Image
+
+    counts = _load_counts(counts_data)
+    scale = math.log1p(max(1, max_count))
+    palette = {}
+    pixels = bytearray(4 * TILE_GRID * TILE_GRID)
+    for i, c in enumerate(counts):
+        if not c:
+            continue
+        rgba = palette.get(c)
+        if rgba is None:
+            rgba = palette[c] = _ramp(math.log1p(c) / scale)
+        pixels[4 * i:4 * i + 4] = bytes(rgba)
+    img = Image.frombytes("RGBA", (TILE_GRID, TILE_GRID), bytes(pixels))
+    if region is not None:
+        dz, ox, oy = region
+        size = TILE_GRID >> dz
+        img = img.crop((ox * size, oy * size, (ox + 1) * size, (oy + 1) * size))
+    if img.size != (TILE_PX, TILE_PX):
+        img = img.resize((TILE_PX, TILE_PX), Image.NEAREST)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
+
+
+@lru_cache(maxsize=1)
+def empty_png() -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGBA", (TILE_PX, TILE_PX), (0, 0, 0, 0)).save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
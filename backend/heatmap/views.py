@@ -0,0 +1,41 @@
+from django.contrib.auth.decorators import login_required
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+from .models import HeatmapTile
+from .tiles import MAX_ZOOM, MIN_ZOOM, empty_png, render_png
+
+# Powyżej MAX_ZOOM kafle są wycinane z najgłębszego zapisanego poziomu
+MAX_SERVED_ZOOM = MAX_ZOOM + 3
+TILE_CACHE_SECONDS = 300
+
+
+def _png_response(body: bytes, etag: str) -> HttpResponse:
+    resp = HttpResponse(body, content_type="image/png")
+    resp["ETag"] = etag
+    resp["Cache-Control"] = f"private, max-age={TILE_CACHE_SECONDS}"
+    return resp
+
+
+@login_required
+def heatmap_tile(request: HttpRequest, z: int, x: int, y: int) -> HttpResponse:
+    """Kafel heatmapy użytkownika (PNG 256x256) w układzie z/x/y (Web Mercator)."""
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+    if z < MIN_ZOOM or z > MAX_SERVED_ZOOM or x >= (1 << z) or y >= (1 << z):
+        return JsonResponse({"error": "Tile out of range"}, status=404)
+
+    dz = max(0, z - MAX_ZOOM)
+    # Bez bloba liczników - przy 304 nie jest potrzebny, przy renderze doczytujemy tylko jego
+    tile = HeatmapTile.objects.filter(user=request.user, z=z - dz, x=x >> dz, y=y >> dz).defer("counts").first()
+    etag = f'W/"{tile.id}-{tile.version}-{dz}"' if tile else 'W/"empty"'
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponse(status=304)
+        resp["ETag"] = etag
+        resp["Cache-Control"] = f"private, max-age={TILE_CACHE_SECONDS}"
+        return resp
+
+    if tile is None:
+        return _png_response(empty_png(), etag)
+
+    region = (dz, x & ((1 << dz) - 1), y & ((1 << dz) - 1)) if dz else None
+    return _png_response(render_png(tile.counts, tile.max_count, region), etag)
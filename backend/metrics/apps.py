@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'metrics'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from .middleware import install_query_timer
+
+        # Każde połączenie (również te otwierane w wątkach sync_to_async) dostaje licznik zapytań
+        connection_created.connect(install_query_timer, dispatch_uid="metrics_query_timer")
+        for conn in connections.all(initialized_only=True):
+            install_query_timer(None, conn)
@@ -0,0 +1,115 @@
+"""Per-request timing, SQL and size metrics.
+
+request_metrics_middleware measures every request and feeds the registry; with
+METRICS_SERVER_TIMING enabled it also adds a ``Server-Timing`` header, e.g.
+``app;dur=41.2, db;dur=12.5;desc="18 queries"``, visible in browser devtools.
+
+Queries are counted by an execute wrapper installed on every DB connection.
+It records into a ContextVar, so it works for sync views, async views and
+ORM calls made through sync_to_async (which copies the request's context).
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from .registry import registry
+
+# Widok endpointu /metrics nie jest liczony, żeby scrapowanie nie zaszumiało wyników
+SKIP_VIEWS = {"metrics"}
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "db_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _query_timer(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - start
+        stats.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs) -> None:
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _query_timer)
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+
+def _response_size(response) -> Optional[int]:
+    if getattr(response, "streaming", False):
+        length = response.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+def _finish(request, response, stats: RequestStats):
+    duration = time.perf_counter() - stats.started
+    view = _view_name(request)
+    if view not in SKIP_VIEWS:
+        registry.observe_request(
+            view, request.method, response.status_code, duration,
+            stats.db_seconds, stats.queries, _response_size(response),
+        )
+    if getattr(settings, "METRICS_SERVER_TIMING", settings.DEBUG):
+        timing = (
+            f"app;dur={duration * 1000:.1f}, "
+            f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+        )
+        # Widoki mogą dodać własne metryki (np. etapy analizy) - dopisujemy się do nich
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = f"{timing}, {existing}" if existing else timing
+    return response
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    if not getattr(settings, "METRICS_ENABLED", True):
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            stats = RequestStats()
+            token = _current.set(stats)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(request, response, stats)
+    else:
+        def middleware(request):
+            stats = RequestStats()
+            token = _current.set(stats)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(request, response, stats)
+    return middleware
@@ -0,0 +1,114 @@
+"""In-process per-endpoint histograms exported in Prometheus text format.
+
+Each worker process keeps its own counts; Prometheus scrapes every worker (or
+sums them with ``sum by (le, view)``) and computes percentiles with
+``histogram_quantile``.
+"""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Wall time of the request", DURATION_BUCKETS),
+    "http_request_db_seconds": ("Total time spent in SQL queries", DURATION_BUCKETS),
+    "http_request_db_queries": ("Number of SQL queries", QUERY_COUNT_BUCKETS),
+    "http_response_size_bytes": ("Response body size", SIZE_BUCKETS),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # ostatni = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._requests: Dict[Labels, int] = {}
+
+    def observe_request(self, view: str, method: str, status: int, duration_s: float,
+                        db_s: float, db_queries: int, size_bytes=None) -> None:
+        labels = (("view", view), ("method", method))
+        values = {
+            "http_request_duration_seconds": duration_s,
+            "http_request_db_seconds": db_s,
+            "http_request_db_queries": db_queries,
+        }
+        if size_bytes is not None:
+            values["http_response_size_bytes"] = size_bytes
+        with self._lock:
+            for name, value in values.items():
+                key = (name, labels)
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = Histogram(HISTOGRAMS[name][1])
+                hist.observe(value)
+            counter_labels = labels + (("status", str(status)),)
+            self._requests[counter_labels] = self._requests.get(counter_labels, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = sorted(
+                ((name, labels, list(h.counts), h.total, h.count, h.buckets)
+                 for (name, labels), h in self._histograms.items()),
+                key=lambda item: (item[0], item[1]),
+            )
+            requests = sorted(self._requests.items())
+
+        lines: List[str] = [
+            "# HELP http_requests_total Requests by view, method and status",
+            "# TYPE http_requests_total counter",
+        ]
+        lines.extend(f"http_requests_total{_fmt_labels(labels)} {n}" for labels, n in requests)
+        current = None
+        for name, labels, counts, total, count, buckets in histograms:
+            if name != current:
+                lines.append(f"# HELP {name} {HISTOGRAMS[name][0]}")
+                lines.append(f"# TYPE {name} histogram")
+                current = name
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                le = bound if isinstance(bound, str) else _fmt_number(bound)
+                lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {_fmt_number(total)}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+registry = Registry()
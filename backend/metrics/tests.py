@@ -0,0 +1,55 @@
+import re
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from events.models import Event
+from workouts.models import Workout
+from .registry import Histogram, registry
+
+
+class HistogramTests(TestCase):
+    def test_bucket_edges_are_inclusive(self):
+        h = Histogram((1, 5))
+        for v in (0.5, 1, 3, 5, 9):
+            h.observe(v)
+        self.assertEqual(h.counts, [2, 2, 1])
+        self.assertEqual(h.count, 5)
+
+
+@override_settings(METRICS_SERVER_TIMING=True)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user("metric", password="pass12345")
+        self.client.force_login(self.user)
+        for i in range(3):
+            Workout.objects.create(user=self.user, title=f"W{i}", raw_data={})
+
+    def test_server_timing_counts_queries(self):
+        res = self.client.get("/api/workouts/")
+        self.assertEqual(res.status_code, 200)
+        m = re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="(\d+) queries"', res["Server-Timing"])
+        self.assertIsNotNone(m)
+        self.assertGreater(int(m.group(1)), 0)
+
+    def test_async_view_queries_are_counted(self):
+        Event.objects.create(region="poland", name="Bieg", date=timezone.now().date(), place="Gdańsk")
+        res = self.client.get("/api/events/?region=poland")
+        self.assertEqual(res.status_code, 200)
+        queries = int(re.search(r'desc="(\d+) queries"', res["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+
+    def test_metrics_endpoint_exports_histograms(self):
+        self.client.get("/api/workouts/")
+        self.client.get("/api/workouts/")
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_duration_seconds_count{view="workouts_list",method="GET"} 2', body)
+        self.assertIn('http_request_db_queries_bucket{view="workouts_list",method="GET",le="+Inf"} 2', body)
+        self.assertIn('http_requests_total{view="workouts_list",method="GET",status="200"} 2', body)
+        self.assertNotIn('view="metrics"', body)
+
+    def test_metrics_endpoint_is_local_only(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.1.2.3").status_code, 404)
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+
+from .registry import registry
+
+DEFAULT_ALLOWED_IPS = ("127.0.0.1", "::1")
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Prometheus scrape endpoint; only reachable from METRICS_ALLOWED_IPS (localhost by default)."""
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", DEFAULT_ALLOWED_IPS)
+    if request.META.get("REMOTE_ADDR") not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from payments.models import Payment
 
@@ -11,8 +11,8 @@ class PaymentsTests(TestCase):
         self.user = User.objects.create_user(username="payuser", email="payer@example.com", password="password")
         self.client.force_login(self.user)
 
-    @patch("payments.views.stripe.checkout.Session.create")
-    @patch("payments.views.stripe.Price.list")
+    @patch("payments.views.stripe.checkout.Session.create_async", new_callable=AsyncMock)
+    @patch("payments.views.stripe.Price.list_async", new_callable=AsyncMock)
     def test_create_checkout_session_creates_payment_and_returns_session(self, mock_price_list, mock_session_create):
         # Mock Stripe price lookup and session creation
         mock_price_list.return_value = MagicMock(data=[MagicMock(id="price_123")])
@@ -12,7 +12,8 @@ PRODUCT_ID_PLANS = os.environ.get("STRIPE_PLANS_PRODUCT_ID", "prod_TSp2YZ7iQygNL
 
 @login_required
 @csrf_exempt
-def create_checkout_session(request: HttpRequest) -> JsonResponse:
+async def create_checkout_session(request: HttpRequest) -> JsonResponse:
+    """Create a Stripe Checkout Session; Stripe is called via the SDK's async (httpx) methods."""
     if request.method != "POST":
         return JsonResponse({"error": "POST required"}, status=405)
     if not stripe.api_key:
@@ -28,8 +29,9 @@ def create_checkout_session(request: HttpRequest) -> JsonResponse:
     # Simplify: treat product_id as a Price ID if it starts with 'price_'
 
     # Create Payment record
-    payment = Payment.objects.create(
-        user=request.user,
+    user = await request.auser()
+    payment = await Payment.objects.acreate(
+        user=user,
         product_id=product_id,
         status="created",
     )
@@ -41,7 +43,7 @@ def create_checkout_session(request: HttpRequest) -> JsonResponse:
         if product_id.startswith("price_"):
             price_id = product_id
         else:
-            prices = stripe.Price.list(product=product_id, active=True, limit=1)
+            prices = await stripe.Price.list_async(product=product_id, active=True, limit=1)
             if prices.data:
                 price_id = prices.data[0].id
     except Exception:
@@ -50,24 +52,24 @@ def create_checkout_session(request: HttpRequest) -> JsonResponse:
         return JsonResponse({"error": "Nie znaleziono aktywnej ceny dla produktu Stripe."}, status=400)
 
     try:
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = await stripe.checkout.Session.create_async(
             mode="payment",  # adjust to 'subscription' if price is recurring
             payment_method_types=["card"],
             line_items=[{"price": price_id, "quantity": 1}],
-            customer_email=request.user.email or None,
+            customer_email=user.email or None,
             success_url=f"{os.environ.get('FRONTEND_REDIRECT_URL','http://127.0.0.1:3000/#plans')}?success=1&session_id={{CHECKOUT_SESSION_ID}}",
             cancel_url=f"{os.environ.get('FRONTEND_REDIRECT_URL','http://127.0.0.1:3000/#plans')}?canceled=1",
-            metadata={"user_id": str(request.user.id), "payment_id": str(payment.id)},
+            metadata={"user_id": str(user.id), "payment_id": str(payment.id)},
         )
     except Exception as exc:
         payment.status = "failed"
         payment.metadata = {"error": str(exc)}
-        payment.save(update_fields=["status", "metadata"])
+        await payment.asave(update_fields=["status", "metadata"])
         return JsonResponse({"error": "Stripe session create failed", "details": str(exc)}, status=502)
 
     payment.stripe_session_id = checkout_session.id
     payment.metadata = {"price_id": price_id}
-    payment.save(update_fields=["stripe_session_id", "metadata"])
+    await payment.asave(update_fields=["stripe_session_id", "metadata"])
 
     return JsonResponse({"url": checkout_session.url, "session_id": checkout_session.id})
 
@@ -0,0 +1,167 @@
+"""gzip / brotli response compression.
+
+``compression_middleware`` compresses JSON, GPX/XML and text responses for
+clients that send ``Accept-Encoding`` (brotli when the ``brotli`` package is
+installed, gzip otherwise). Responses that already carry ``Content-Encoding``
+pass through untouched, so views can store a body compressed once and send
+it as-is with :func:`precompressed_response` - GPX blobs (see
+``Workout.set_gpx``) and cached analysis payloads do that instead of paying
+the compressor on every request.
+
+Levels: on-the-fly compression uses fast settings (gzip 5 / brotli 4, ~80 ms
+and ~5x smaller for a 2.5 MB analysis payload); stored artifacts are
+compressed once and can afford more.
+"""
+import gzip
+import zlib
+from typing import Dict, Iterable, Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IDENTITY = "identity"
+# Kolejność = preferencja serwera przy równym q
+SUPPORTED = ("br", "gzip") if brotli is not None else ("gzip",)
+DYNAMIC_LEVELS = {"gzip": 5, "br": 4}
+STORED_LEVELS = {"gzip": 9, "br": 9}
+MIN_SIZE = 1024
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/gpx+xml",
+    "application/geo+json",
+    "application/xml",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "gzip":
+        # mtime=0: ten sam wejściowy plik daje identyczne bajty (ETag, testy)
+        return gzip.compress(data, compresslevel=DYNAMIC_LEVELS["gzip"] if level is None else level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=DYNAMIC_LEVELS["br"] if level is None else level)
+    if encoding == IDENTITY:
+        return data
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding or encoding == IDENTITY:
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(data)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def compress_variants(data: bytes, levels: Dict[str, int] = STORED_LEVELS) -> Dict[str, bytes]:
+    """``data`` in every supported encoding, for storing next to (or instead of) the original."""
+    return {enc: compress(data, enc, levels.get(enc)) for enc in SUPPORTED}
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse ``Accept-Encoding`` into {coding: q}; q=0 marks a refused coding."""
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str, available: Iterable[str] = SUPPORTED) -> Optional[str]:
+    """Best of ``available`` (in server preference order) accepted by the client, or None."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted[coding] if coding in accepted else accepted.get("*", 0.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def precompressed_response(request, encoded: Dict[str, bytes], content_type: str, **kwargs) -> HttpResponse:
+    """Send one of the stored encodings of a body as-is.
+
+    ``encoded`` maps a content coding (``gzip``, ``br`` or ``identity``) to the
+    body in that coding. A client accepting none of the compressed ones gets
+    the identity body (decompressed here if it is not stored).
+    """
+    coding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), [c for c in encoded if c != IDENTITY])
+    if coding is None:
+        if IDENTITY in encoded:
+            body = encoded[IDENTITY]
+        else:
+            stored = next(iter(encoded))
+            body = decompress(encoded[stored], stored)
+        response = HttpResponse(body, content_type=content_type, **kwargs)
+    else:
+        response = HttpResponse(encoded[coding], content_type=content_type, **kwargs)
+        response["Content-Encoding"] = coding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def _is_compressible(response) -> bool:
+    content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress_response(request, response):
+    if getattr(response, "streaming", False) or response.has_header("Content-Encoding") or not _is_compressible(response):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < MIN_SIZE:
+        return response
+    coding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if coding is None:
+        return response
+    try:
+        compressed = compress(response.content, coding)
+    except (zlib.error, ValueError):
+        return response
+    if len(compressed) >= len(response.content):
+        return response
+    response.content = compressed
+    response["Content-Length"] = str(len(compressed))
+    response["Content-Encoding"] = coding
+    # Skompresowana treść to inna reprezentacja - silny ETag byłby nieprawdziwy
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    return response
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    if not getattr(settings, "RESPONSE_COMPRESSION", True):
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return _compress_response(request, await get_response(request))
+    else:
+        def middleware(request):
+            return _compress_response(request, get_response(request))
+    return middleware
@@ -0,0 +1,106 @@
+"""Fast JSON responses for large payloads.
+
+``FastJsonResponse`` is a drop-in ``JsonResponse`` for endpoints returning
+big documents (workout analysis, workout lists, training load series). It
+serializes with orjson when installed: datetimes, UUIDs and NumPy arrays
+natively, anything else (Decimal, lazy strings, timedelta) through
+DjangoJSONEncoder. Without orjson it falls back to the stdlib encoder with
+compact separators.
+
+Floats can be rounded to ``JSON_FLOAT_PRECISION`` decimal places (or a
+per-response ``float_precision``) - analysis charts carry tens of thousands
+of values whose last digits are noise. Rounding is an extra pass over the
+payload in Python (several times the orjson time for a full track), so it is off
+by default and meant for bandwidth-bound clients; keep it at 5-6 digits,
+coordinates need them (1e-5 deg ~ 1 m).
+"""
+import json
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_FROM_SETTINGS = object()
+_django_default = DjangoJSONEncoder().default
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def round_floats(obj: Any, ndigits: int) -> Any:
+    """Copy of ``obj`` with every float (also inside dicts, lists and float arrays) rounded.
+
+    round(x * 10**n) / 10**n is ~2x faster than round(x, n) and prints the same
+    shortest repr; non-finite values are left alone.
+    """
+    scale = 10.0 ** ndigits
+
+    def value(v):
+        t = type(v)
+        if t is dict:
+            out = {}
+            for k, x in v.items():
+                if type(x) is float:
+                    try:
+                        out[k] = round(x * scale) / scale
+                    except (OverflowError, ValueError):
+                        out[k] = x
+                else:
+                    out[k] = value(x)
+            return out
+        if t is list or t is tuple:
+            return [value(x) for x in v]
+        if isinstance(v, float):
+            try:
+                return round(float(v) * scale) / scale
+            except (OverflowError, ValueError):
+                return v
+        if numpy is not None and isinstance(v, numpy.ndarray) and v.dtype.kind == "f":
+            return v.round(ndigits)
+        return v
+
+    return value(obj)
+
+
+def dumps(data: Any, float_precision: Optional[int] = None) -> bytes:
+    """Serialize ``data`` to JSON bytes, optionally rounding floats first."""
+    if float_precision is not None:
+        data = round_floats(data, float_precision)
+    if orjson is not None:
+        return orjson.dumps(data, default=_django_default, option=_ORJSON_OPTIONS)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+
+
+class FastJsonResponse(JsonResponse):
+    """JsonResponse serialized by :func:`dumps` (orjson when available).
+
+    ``encoder`` and ``json_dumps_params`` behave as in JsonResponse; orjson has
+    no equivalent, so passing either serializes with ``json.dumps`` instead.
+    """
+
+    def __init__(self, data, encoder=None, safe: bool = True, json_dumps_params=None,
+                 float_precision=_FROM_SETTINGS, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        if float_precision is _FROM_SETTINGS:
+            float_precision = getattr(settings, "JSON_FLOAT_PRECISION", None)
+        kwargs.setdefault("content_type", "application/json")
+        if encoder is None and json_dumps_params is None:
+            content = dumps(data, float_precision)
+        else:
+            if float_precision is not None:
+                data = round_floats(data, float_precision)
+            content = json.dumps(data, cls=encoder or DjangoJSONEncoder, **(json_dumps_params or {}))
+        # Pomijamy JsonResponse.__init__ (json.dumps) - treść jest już gotowa
+        HttpResponse.__init__(self, content=content, **kwargs)
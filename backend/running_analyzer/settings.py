@@ -49,9 +49,16 @@ INSTALLED_APPS = [
     'workout_analysis',
     'payments',
     'social',
+    'segments',
+    'heatmap',
+    'metrics',
 ]
 
 MIDDLEWARE = [
+    # Pierwszy, żeby czas obejmował cały stos middleware
+    'metrics.middleware.request_metrics_middleware',
+    # gzip/brotli - przed wszystkim, co czyta lub zmienia treść odpowiedzi
+    'running_analyzer.compression.compression_middleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -111,6 +118,51 @@ else:
         }
     }
 
+# Cache
+# Local memory by default; set DJANGO_CACHE_DIR to share the cache between worker processes via files.
+# Used e.g. for per-user friend-id sets (social.models.Friendship.friend_ids_for).
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+            'TIMEOUT': 3600,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'running-analyzer',
+            'TIMEOUT': 3600,
+        }
+    }
+
+# Request metrics (metrics app): Prometheus text at /metrics for local scrapers,
+# Server-Timing response header with app/db time (defaults to DEBUG).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
+# Analysis stage timings (workout_analysis.profiling): Server-Timing entries per stage
+# and `_timings` in the response with ?timings=1. Optional sampled cProfile dumps
+# of slow analysis requests into ANALYSIS_PROFILE_DIR.
+ANALYSIS_TIMINGS = os.environ.get('ANALYSIS_TIMINGS', '1' if DEBUG else '0') == '1'
+ANALYSIS_PROFILE_DIR = os.environ.get('ANALYSIS_PROFILE_DIR') or None
+ANALYSIS_PROFILE_SAMPLE_RATE = float(os.environ.get('ANALYSIS_PROFILE_SAMPLE_RATE', '0'))
+ANALYSIS_PROFILE_MIN_MS = float(os.environ.get('ANALYSIS_PROFILE_MIN_MS', '500'))
+
+# Large JSON responses (running_analyzer.responses.FastJsonResponse): round floats to
+# this many decimal places to shrink analysis payloads; unset keeps full precision.
+JSON_FLOAT_PRECISION = int(os.environ['JSON_FLOAT_PRECISION']) if os.environ.get('JSON_FLOAT_PRECISION') else None
+
+# Response compression (running_analyzer.compression): gzip, plus brotli when the package is installed.
+# Analysis payloads are cached already compressed for ANALYSIS_CACHE_SECONDS (0 disables the cache).
+# Invalidation on workout/profile changes only reaches the process holding the cache, so with the
+# per-process LocMemCache other workers would serve stale analyses until expiry - the cache is off by
+# default unless DJANGO_CACHE_DIR (a cache shared by all workers) is set.
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') == '1'
+ANALYSIS_CACHE_SECONDS = int(os.environ.get('ANALYSIS_CACHE_SECONDS', str(24 * 3600) if os.environ.get('DJANGO_CACHE_DIR') else '0'))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,73 @@
+"""Test helpers for query-count regressions.
+
+A view that is fine on a developer database can still issue one query per
+row (N+1) and fall over on a real one. ``QueryScalingMixin`` grows the data
+in steps and, at every size, measures the same requests; it fails when the
+number of SQL queries of a request changes with the size:
+
+    class FeedQueryTests(QueryScalingMixin, TestCase):
+        def feed(self):
+            return lambda: self.client.get("/api/social/posts/")
+
+        def test_feed(self):
+            self.assertQueriesIndependentOfSize(lambda n: make_posts(self.user, n), {"feed": self.feed})
+
+A case is a setup callable returning the request to measure, so objects the
+request consumes (a workout to delete, a post to react to) are created
+outside the measured block. The cache is cleared before every request:
+counts are for the cold path.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+DEFAULT_SIZES = (2, 6)
+
+
+def capture_queries(fn: Callable, using: str = DEFAULT_DB_ALIAS):
+    """Run ``fn()`` with a cold cache; returns (result, list of executed SQL)."""
+    cache.clear()
+    with CaptureQueriesContext(connections[using]) as ctx:
+        result = fn()
+    return result, [q["sql"] for q in ctx.captured_queries]
+
+
+def format_query_report(label: str, by_size: Dict[int, List[str]]) -> str:
+    """Count per size and the SQL of the largest run."""
+    sizes = sorted(by_size)
+    lines = [f"{label}: " + ", ".join(f"n={n}: {len(by_size[n])} queries" for n in sizes)]
+    lines += [f"    {sql[:300]}" for sql in by_size[sizes[-1]]]
+    return "\n".join(lines)
+
+
+class QueryScalingMixin:
+    """TestCase mixin asserting that request query counts do not depend on row counts."""
+
+    query_sizes: Iterable[int] = DEFAULT_SIZES
+
+    def assertQueriesIndependentOfSize(self, grow: Callable[[int], None], cases: Dict[str, Callable],
+                                       sizes: Iterable[int] = None) -> Dict[str, Dict[int, int]]:
+        """``grow(n)`` brings the data to size n; ``cases`` maps a label to a setup returning the request.
+
+        Every request must answer with a status below 400. Returns {label: {size: query count}}.
+        """
+        captured = defaultdict(dict)
+        for n in sizes or self.query_sizes:
+            grow(n)
+            for label, setup in cases.items():
+                request = setup()
+                response, queries = capture_queries(request)
+                status = getattr(response, "status_code", 200)
+                self.assertLess(status, 400, f"{label} at n={n}: HTTP {status} {getattr(response, 'content', b'')[:200]!r}")
+                captured[label][n] = queries
+        failures = [
+            format_query_report(label, by_size)
+            for label, by_size in captured.items()
+            if len({len(q) for q in by_size.values()}) > 1
+        ]
+        if failures:
+            self.fail("Query count depends on data size:\n" + "\n".join(failures))
+        return {label: {n: len(q) for n, q in by_size.items()} for label, by_size in captured.items()}
@@ -0,0 +1,535 @@
+import contextlib
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_tz
+from decimal import Decimal
+from itertools import count
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse, JsonResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+from benchmarks import synthetic
+from events.models import Event
+from heatmap.tiles import MAX_ZOOM, TILE_GRID, _project
+from payments.models import Payment
+from social import timeline
+from social.models import FriendRequest, Friendship, Post, PostComment, PostReaction
+from users.models import ActivityLog, UserProfile
+from workout_analysis import records as personal_records
+from workout_analysis import training_load
+from workouts.models import Workout
+
+from . import responses
+from .compression import choose_encoding, compress, compression_middleware, precompressed_response
+from .responses import FastJsonResponse
+from .testing import QueryScalingMixin
+
+# Nazwa URL -> przypadki (metody case_<nazwa>); każdy nazwany URL musi tu być albo w EXEMPT_URLS
+CASES = {
+    "metrics": ["metrics"],
+    "session": ["session"],
+    "register": ["register"],
+    "check_username": ["check_username"],
+    "check_email": ["check_email"],
+    "login": ["login"],
+    "logout": ["logout"],
+    "recent_activity": ["recent_activity"],
+    "delete_activity": ["delete_activity"],
+    "strava_status": ["strava_status"],
+    "strava_connect_json": ["strava_connect_json"],
+    "strava_login": ["strava_login"],
+    "strava_callback": ["strava_callback"],
+    "workouts_list": ["workouts_list"],
+    "workouts_last": ["workouts_last"],
+    "workouts_weekly_summary": ["workouts_weekly_summary"],
+    "workouts_training_load": ["workouts_training_load"],
+    "workouts_personal_records": ["workouts_personal_records"],
+    "workouts_upload": ["workouts_upload"],
+    "workouts_delete": ["workouts_delete"],
+    "workouts_upload_gpx": ["workouts_download_gpx", "workouts_upload_gpx"],
+    "workouts_attach_hr": ["workouts_attach_hr"],
+    "workouts_import_strava": ["workouts_import_strava"],
+    "segments": ["segments_list", "segments_create"],
+    "segment_detail": ["segment_detail"],
+    "heatmap_tile": ["heatmap_tile"],
+    "events_list": ["events_list"],
+    "workout_analysis": ["workout_analysis"],
+    "profile": ["profile", "profile_update"],
+    "create_checkout_session": ["create_checkout_session"],
+    "confirm_session": ["confirm_session"],
+    "social_posts": ["feed_global", "feed_friends", "create_post"],
+    "social_post_reaction": ["social_post_reaction"],
+    "social_post_comments": ["post_comments", "add_comment"],
+    "social_post_comment_delete": ["social_post_comment_delete"],
+    "social_post_delete": ["social_post_delete"],
+    "social_search_users": ["social_search_users"],
+    "social_friend_requests": ["friend_requests", "send_friend_request"],
+    "social_friend_request_respond": ["social_friend_request_respond"],
+    "social_friends": ["social_friends"],
+    "social_unfriend": ["social_unfriend"],
+    # Zmieniają stan całego konta - na końcu, żeby nie wpływały na pozostałe przypadki
+    "strava_unlink": ["strava_unlink"],
+    "clear_activity": ["clear_activity"],
+}
+EXEMPT_URLS = {
+    "social_post_like": "likes were removed; constant 410",
+}
+
+PASSWORD = "Runner!2024"
+
+
+def _named_urls(resolver=None, namespace=""):
+    names = set()
+    for p in (resolver or get_resolver()).url_patterns:
+        if isinstance(p, URLResolver):
+            if p.namespace == "admin":
+                continue
+            names |= _named_urls(p, f"{namespace}{p.namespace}:" if p.namespace else namespace)
+        elif isinstance(p, URLPattern) and p.name:
+            names.add(namespace + p.name)
+    return names
+
+
+def _strava_client(handler):
+    return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class QueryCountScalingTests(QueryScalingMixin, TestCase):
+    """Every endpoint issues the same number of SQL queries whether the account has 2 or 6 of everything."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="runner", email="runner@example.com", password=PASSWORD)
+        self.profile = UserProfile.objects.create(user=self.user, height_cm=180, weight_kg=72)
+        self.client.force_login(self.user)
+        self.seq = count()
+        self.size = 0
+        self.strava_ids = []
+        self.tile = self._tile_of(synthetic.CENTER)
+        points = synthetic.generate_track(200, hr=False, cadence=False, noise_m=0)
+        resp = self.client.post("/api/segments/", json.dumps({
+            "name": "Pętla", "points": [[p["lat"], p["lon"]] for p in points],
+        }), content_type="application/json")
+        self.segment_id = resp.json()["id"]
+
+    @staticmethod
+    def _tile_of(latlon):
+        x, y = _project(latlon[0], latlon[1], MAX_ZOOM)
+        return MAX_ZOOM, int(x) // TILE_GRID, int(y) // TILE_GRID
+
+    # ---- dane ----
+
+    def grow(self, n):
+        while self.size < n:
+            self._add_row(self.size)
+            self.size += 1
+
+    def _new_user(self, prefix):
+        return User.objects.create_user(username=f"{prefix}{next(self.seq)}", password=PASSWORD)
+
+    def _workout(self, days_ago=0, seed=0):
+        track = synthetic.generate_track(240, seed=seed, start=timezone.now() - timedelta(days=days_ago, hours=1))
+        w = Workout.objects.create(
+            user=self.user, title="Bieg", source="manual", manual=True,
+            performed_at=timezone.now() - timedelta(days=days_ago),
+            distance_m=track[-1]["dist"], duration_ms=int(track[-1]["ts"] - track[0]["ts"]) * 1000,
+            raw_data={},
+        )
+        # Przez endpoint: geometria, efforty segmentów i heatmapa jak w produkcji
+        self.client.post(f"/api/workouts/{w.id}/gpx/", {"file": SimpleUploadedFile("run.gpx", synthetic.to_gpx(track))})
+        return w
+
+    def _add_row(self, i):
+        w = self._workout(days_ago=i, seed=i)
+        self.client.get(f"/api/workouts/{w.id}/analysis/")  # rekordy życiowe
+        self.strava_ids.append(f"9{i:05d}")
+        Workout.objects.create(user=self.user, source="strava", external_id=self.strava_ids[-1], title="Strava", raw_data={})
+        ActivityLog.objects.create(user=self.user, action="login")
+        Payment.objects.create(user=self.user, product_id="price_x", status="created", stripe_session_id=f"old_{i}")
+
+        friend = self._new_user("friend")
+        Friendship.objects.create(user1=min(self.user, friend, key=lambda u: u.id), user2=max(self.user, friend, key=lambda u: u.id))
+        timeline.backfill_friendship(self.user.id, friend.id)
+        for author, is_global in ((friend, False), (friend, True), (self.user, False), (self.user, True)):
+            post = Post.objects.create(
+                user=author, text=f"Post {i}", is_global=is_global, privacy="public" if is_global else "friends",
+                workout=w if author == self.user else None,
+            )
+            timeline.fan_out_post(post)
+            other = self.user if author == friend else friend
+            PostComment.objects.create(post=post, user=other, text="Brawo!")
+            PostReaction.objects.create(post=post, user=other, reaction_type="fire")
+            Post.objects.filter(id=post.id).update(comments_count=1, fire_count=1)
+        # Wszystkie komentarze trafiają też do pierwszego posta - lista komentarzy rośnie z n
+        first = Post.objects.filter(user=self.user).order_by("id").first()
+        PostComment.objects.create(post=first, user=friend, text=f"Komentarz {i}")
+
+        FriendRequest.objects.create(from_user=self._new_user("requester"), to_user=self.user)
+        FriendRequest.objects.create(from_user=self.user, to_user=self._new_user("invitee"))
+        for region in ("poland", "world"):
+            Event.objects.create(region=region, name=f"Bieg {i}", date=timezone.now().date() + timedelta(days=i + 1), place="Wrocław")
+
+    def _first_workout(self):
+        return Workout.objects.filter(user=self.user, gpx_size__isnull=False).order_by("id").first()
+
+    def _first_post(self):
+        return Post.objects.filter(user=self.user).order_by("id").first()
+
+    # ---- przypadki: każdy przygotowuje dane i zwraca żądanie do zmierzenia ----
+
+    def case_metrics(self):
+        return lambda: self.client.get("/metrics")
+
+    def case_session(self):
+        return lambda: self.client.get("/api/session/")
+
+    def case_register(self):
+        n = next(self.seq)
+        body = json.dumps({
+            "username": f"new{n}", "email": f"new{n}@example.com", "password": PASSWORD,
+            "height_cm": 170, "weight_kg": 60, "first_name": "Anna",
+        })
+        return lambda: Client().post("/api/register/", body, content_type="application/json")
+
+    def case_check_username(self):
+        return lambda: self.client.get("/api/check_username/?username=runner")
+
+    def case_check_email(self):
+        return lambda: self.client.get("/api/check_email/?email=runner@example.com")
+
+    def case_login(self):
+        body = json.dumps({"username": "runner", "password": PASSWORD})
+        return lambda: Client().post("/api/login/", body, content_type="application/json")
+
+    def case_logout(self):
+        client = Client()
+        client.force_login(self.user)
+        return lambda: client.post("/api/logout/")
+
+    def case_recent_activity(self):
+        return lambda: self.client.get("/api/activity/recent/?limit=50")
+
+    def case_clear_activity(self):
+        return lambda: self.client.post("/api/activity/clear_all/")
+
+    def case_delete_activity(self):
+        log = ActivityLog.objects.create(user=self.user, action="login")
+        return lambda: self.client.delete(f"/api/activity/{log.id}/")
+
+    def case_strava_status(self):
+        return lambda: self.client.get("/api/strava/status/")
+
+    def case_strava_connect_json(self):
+        def request():
+            with patch("users.views.STRAVA_CLIENT_ID", "123"):
+                return self.client.get("/api/strava/connect/")
+        return request
+
+    def case_strava_unlink(self):
+        UserProfile.objects.filter(user=self.user).update(strava_access_token="acc", strava_refresh_token="ref")
+        return lambda: self.client.post("/api/strava/unlink/")
+
+    def case_strava_login(self):
+        def request():
+            with patch("users.views.STRAVA_CLIENT_ID", "123"):
+                return self.client.get("/oauth/strava/login/")
+        return request
+
+    def case_strava_callback(self):
+        UserProfile.objects.filter(user=self.user).update(strava_athlete_id="777")
+        token = {"access_token": "acc", "refresh_token": "ref", "expires_at": 1900000000, "athlete": {"id": 777}}
+
+        def request():
+            with patch("users.views.STRAVA_CLIENT_ID", "123"), patch("users.views.STRAVA_CLIENT_SECRET", "secret"), \
+                    patch("users.strava.client", _strava_client(lambda req: httpx.Response(200, json=token))):
+                return self.client.get("/oauth/strava/callback/?code=abc")
+        return request
+
+    def case_workouts_list(self):
+        return lambda: self.client.get("/api/workouts/")
+
+    def case_workouts_last(self):
+        return lambda: self.client.get("/api/workouts/last/")
+
+    def case_workouts_weekly_summary(self):
+        return lambda: self.client.get("/api/workouts/weekly_summary/?period=year")
+
+    def case_workouts_training_load(self):
+        # Przeliczenie od tej samej daty przy każdym rozmiarze (jak po wgraniu treningu sprzed tygodnia)
+        self.client.get("/api/workouts/training_load/")
+        training_load.mark_dirty(self.user.id, timezone.now().date() - timedelta(days=7))
+        return lambda: self.client.get("/api/workouts/training_load/?days=30")
+
+    def case_workouts_personal_records(self):
+        return lambda: self.client.get("/api/workouts/records/")
+
+    def case_workouts_upload(self):
+        start = timezone.now() - timedelta(hours=2)
+        data = synthetic.to_fit(synthetic.generate_track(120, seed=next(self.seq), start=start))
+
+        def request():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return self.client.post("/api/workouts/upload/", {"file": SimpleUploadedFile("run.fit", data)})
+        return request
+
+    def case_workouts_delete(self):
+        w = self._workout(seed=next(self.seq))
+        # Usuwany trening trzyma rekord na 400 m - zawsze ścieżka z przeliczeniem rekordów
+        personal_records.record_best_efforts(w, {400: 60.0})
+        return lambda: self.client.delete(f"/api/workouts/{w.id}/")
+
+    def case_workouts_download_gpx(self):
+        w = self._first_workout()
+        return lambda: self.client.get(f"/api/workouts/{w.id}/gpx/")
+
+    def case_workouts_upload_gpx(self):
+        w = Workout.objects.create(user=self.user, title="Bieg", source="manual", raw_data={})
+        gpx = synthetic.to_gpx(synthetic.generate_track(240, seed=next(self.seq)))
+        return lambda: self.client.post(f"/api/workouts/{w.id}/gpx/", {"file": SimpleUploadedFile("run.gpx", gpx)})
+
+    def case_workouts_attach_hr(self):
+        w = self._first_workout()
+        body = json.dumps(synthetic.hr_samples(synthetic.generate_track(240)))
+        return lambda: self.client.post(f"/api/workouts/{w.id}/attach_hr/", body, content_type="application/json")
+
+    def case_workouts_import_strava(self):
+        UserProfile.objects.filter(user=self.user).update(
+            strava_access_token="acc", strava_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        # Strona z już zaimportowanymi i n nowymi aktywnościami
+        fresh = [f"8{next(self.seq):05d}" for _ in range(self.size)]
+        activities = [
+            {"id": sid, "type": "Run", "distance": 5000.0, "moving_time": 1500, "start_date": "2024-05-01T06:00:00Z"}
+            for sid in self.strava_ids + fresh
+        ]
+
+        def request():
+            with patch.dict("os.environ", {"STRAVA_CLIENT_ID": "123", "STRAVA_CLIENT_SECRET": "secret"}), \
+                    patch("users.strava.client", _strava_client(lambda req: httpx.Response(200, json=activities))):
+                return self.client.post("/api/workouts/import_strava/")
+        return request
+
+    def case_segments_list(self):
+        return lambda: self.client.get("/api/segments/")
+
+    def case_segments_create(self):
+        points = synthetic.generate_track(120, hr=False, cadence=False, noise_m=0)
+        body = json.dumps({"name": f"Odcinek {next(self.seq)}", "points": [[p["lat"], p["lon"]] for p in points]})
+        return lambda: self.client.post("/api/segments/", body, content_type="application/json")
+
+    def case_segment_detail(self):
+        return lambda: self.client.get(f"/api/segments/{self.segment_id}/")
+
+    def case_heatmap_tile(self):
+        z, x, y = self.tile
+        return lambda: self.client.get(f"/api/heatmap/{z}/{x}/{y}.png")
+
+    def case_events_list(self):
+        return lambda: self.client.get("/api/events/")
+
+    def case_workout_analysis(self):
+        w = self._first_workout()
+        return lambda: self.client.get(f"/api/workouts/{w.id}/analysis/")
+
+    def case_profile(self):
+        return lambda: self.client.get("/api/profile/")
+
+    def case_profile_update(self):
+        body = json.dumps({"first_name": "Jan", "height_cm": 181})
+        return lambda: self.client.post("/api/profile/", body, content_type="application/json")
+
+    def case_create_checkout_session(self):
+        def request():
+            with patch("payments.views.stripe.api_key", "sk_test"), \
+                    patch("payments.views.stripe.Price.list_async", new_callable=AsyncMock) as prices, \
+                    patch("payments.views.stripe.checkout.Session.create_async", new_callable=AsyncMock) as create:
+                prices.return_value = MagicMock(data=[MagicMock(id="price_123")])
+                create.return_value = MagicMock(id=f"sess_{next(self.seq)}", url="https://checkout.test/")
+                return self.client.post("/api/payments/create-checkout-session/", b"{}", content_type="application/json")
+        return request
+
+    def case_confirm_session(self):
+        session_id = f"sess_confirm_{next(self.seq)}"
+        Payment.objects.create(user=self.user, product_id="price_123", status="created", stripe_session_id=session_id)
+
+        def request():
+            with patch("payments.views.stripe.api_key", "sk_test"), \
+                    patch("payments.views.stripe.checkout.Session.retrieve", return_value={"payment_status": "paid"}):
+                return self.client.get(f"/api/payments/confirm/?session_id={session_id}")
+        return request
+
+    def case_feed_global(self):
+        return lambda: self.client.get("/api/social/posts/?scope=global&limit=50")
+
+    def case_feed_friends(self):
+        return lambda: self.client.get("/api/social/posts/?scope=friends&limit=50")
+
+    def case_create_post(self):
+        body = json.dumps({"text": "Nowy", "is_global": False, "workout_id": self._first_workout().id})
+        return lambda: self.client.post("/api/social/posts/", body, content_type="application/json")
+
+    def case_social_post_reaction(self):
+        post = Post.objects.create(user=self.user, text="Reakcje", is_global=True)
+        return lambda: self.client.post(f"/api/social/posts/{post.id}/reactions/", json.dumps({"type": "love"}),
+                                        content_type="application/json")
+
+    def case_post_comments(self):
+        post = self._first_post()
+        return lambda: self.client.get(f"/api/social/posts/{post.id}/comments/?limit=50")
+
+    def case_add_comment(self):
+        post = self._first_post()
+        return lambda: self.client.post(f"/api/social/posts/{post.id}/comments/", json.dumps({"text": "Super"}),
+                                        content_type="application/json")
+
+    def case_social_post_comment_delete(self):
+        post = self._first_post()
+        comment = PostComment.objects.create(post=post, user=self.user, text="Do usunięcia")
+        return lambda: self.client.delete(f"/api/social/posts/{post.id}/comments/{comment.id}/")
+
+    def case_social_post_delete(self):
+        post = Post.objects.create(user=self.user, text="Do usunięcia", is_global=False, privacy="friends")
+        timeline.fan_out_post(post)
+        return lambda: self.client.delete(f"/api/social/posts/{post.id}/delete/")
+
+    def case_social_search_users(self):
+        return lambda: self.client.get("/api/social/search_users/?q=friend")
+
+    def case_friend_requests(self):
+        return lambda: self.client.get("/api/social/friend_requests/")
+
+    def case_send_friend_request(self):
+        target = self._new_user("target")
+        return lambda: self.client.post("/api/social/friend_requests/", json.dumps({"username": target.username}),
+                                        content_type="application/json")
+
+    def case_social_friend_request_respond(self):
+        fr = FriendRequest.objects.create(from_user=self._new_user("asker"), to_user=self.user)
+        return lambda: self.client.post(f"/api/social/friend_requests/{fr.id}/respond/", json.dumps({"action": "accept"}),
+                                        content_type="application/json")
+
+    def case_social_friends(self):
+        return lambda: self.client.get("/api/social/friends/")
+
+    def case_social_unfriend(self):
+        other = self._new_user("exfriend")
+        Friendship.objects.create(user1=self.user, user2=other)
+        return lambda: self.client.delete(f"/api/social/friends/{other.id}/")
+
+    # ---- testy ----
+
+    def test_every_named_url_has_a_case(self):
+        missing = _named_urls() - set(CASES) - set(EXEMPT_URLS)
+        self.assertFalse(missing, f"Add a query-count case for: {', '.join(sorted(missing))}")
+        self.assertFalse(set(CASES) - _named_urls(), "CASES lists URL names that no longer exist")
+
+    def test_query_counts_do_not_depend_on_data_size(self):
+        cases = {variant: getattr(self, f"case_{variant}") for variants in CASES.values() for variant in variants}
+        counts = self.assertQueriesIndependentOfSize(self.grow, cases)
+        self.assertEqual(set(counts), set(cases))
+
+
+class FastJsonResponseTests(TestCase):
+    PAYLOAD = {
+        "when": datetime(2024, 4, 12, 7, 0, 0, 123456, tzinfo=dt_tz.utc),
+        "weight": Decimal("72.50"),
+        "series": [1.23456789, 2.5, None, float("inf")],
+        "nested": {1: (0.333333333, "x")},
+    }
+
+    def test_matches_json_response_values(self):
+        res = FastJsonResponse(self.PAYLOAD)
+        self.assertEqual(res["Content-Type"], "application/json")
+        data = json.loads(res.content)
+        self.assertEqual(data["weight"], "72.50")
+        self.assertEqual(data["nested"], {"1": [0.333333333, "x"]})
+        self.assertEqual(datetime.fromisoformat(data["when"].replace("Z", "+00:00")), self.PAYLOAD["when"])
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+        self.assertEqual(json.loads(FastJsonResponse([1, 2], safe=False).content), [1, 2])
+
+    def test_float_precision(self):
+        with override_settings(JSON_FLOAT_PRECISION=2):
+            data = json.loads(FastJsonResponse(self.PAYLOAD).content)
+        self.assertEqual(data["series"][:3], [1.23, 2.5, None])
+        self.assertEqual(data["nested"]["1"][0], 0.33)
+        data = json.loads(FastJsonResponse(self.PAYLOAD, float_precision=None).content)
+        self.assertEqual(data["series"][0], 1.23456789)
+
+    def test_accepts_json_response_arguments(self):
+        class UpperEncoder(json.JSONEncoder):
+            def default(self, o):
+                return str(o).upper() if isinstance(o, Decimal) else super().default(o)
+
+        res = FastJsonResponse({"a": Decimal("1e3"), "b": 1.23456}, encoder=UpperEncoder,
+                               json_dumps_params={"indent": 2}, float_precision=2)
+        self.assertIn(b'\n  "a": "1E+3"', res.content)
+        self.assertEqual(json.loads(res.content)["b"], 1.23)
+        self.assertEqual(res.content, JsonResponse({"a": Decimal("1e3"), "b": 1.23}, encoder=UpperEncoder,
+                                                   json_dumps_params={"indent": 2}).content)
+
+    def test_stdlib_fallback_without_orjson(self):
+        with patch.object(responses, "orjson", None):
+            body = FastJsonResponse(self.PAYLOAD, float_precision=3).content
+        data = json.loads(body)
+        self.assertEqual(data["series"][0], 1.235)
+        self.assertEqual(data["weight"], "72.50")
+
+
+class CompressionTests(TestCase):
+    BIG = {"track": [{"lat": 50.0 + i * 1e-5, "lon": 20.0, "hr": 140} for i in range(500)]}
+
+    def _get(self, accept=None):
+        headers = {"HTTP_ACCEPT_ENCODING": accept} if accept is not None else {}
+        return RequestFactory().get("/", **headers)
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate, br", ["br", "gzip"]), "br")
+        self.assertEqual(choose_encoding("br;q=0.5, gzip", ["br", "gzip"]), "gzip")
+        self.assertEqual(choose_encoding("*", ["br", "gzip"]), "br")
+        self.assertIsNone(choose_encoding("gzip;q=0, *", ["gzip"]))
+        self.assertIsNone(choose_encoding("", ["gzip"]))
+        self.assertIsNone(choose_encoding("deflate", ["gzip"]))
+
+    def test_middleware_compresses_large_json_only(self):
+        middleware = compression_middleware(lambda request: JsonResponse(self.BIG))
+        res = middleware(self._get("gzip"))
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res["Vary"], "Accept-Encoding")
+        self.assertEqual(int(res["Content-Length"]), len(res.content))
+        self.assertEqual(json.loads(gzip.decompress(res.content)), json.loads(JsonResponse(self.BIG).content))
+
+        res = middleware(self._get())
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertEqual(res["Vary"], "Accept-Encoding")
+        self.assertFalse(compression_middleware(lambda r: JsonResponse({"ok": True}))(self._get("gzip")).has_header("Content-Encoding"))
+        png = compression_middleware(lambda r: HttpResponse(b"\0" * 4096, content_type="image/png"))(self._get("gzip"))
+        self.assertFalse(png.has_header("Content-Encoding"))
+
+    def test_precompressed_response_is_sent_as_is(self):
+        body = json.dumps(self.BIG).encode()
+        stored = {"gzip": compress(body, "gzip", 9)}
+        res = compression_middleware(lambda r: precompressed_response(r, stored, "application/json"))(self._get("gzip, br"))
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res.content, stored["gzip"])
+        # Klient bez gzip dostaje treść rozpakowaną
+        res = precompressed_response(self._get("identity"), stored, "application/json")
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertEqual(res.content, body)
+
+    def test_api_responses_are_compressed_end_to_end(self):
+        user = User.objects.create_user("gz", password="GoodP@ss1")
+        Workout.objects.bulk_create([
+            Workout(user=user, title=f"Bieg {i}", source="adidas", manual=True, raw_data={}) for i in range(30)
+        ])
+        client = Client()
+        client.force_login(user)
+        res = client.get("/api/workouts/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(res.content))["workouts"]), 30)
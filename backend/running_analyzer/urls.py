@@ -23,9 +23,13 @@ from django.conf.urls.static import static
 from workouts import views as workout_views
 from events import views as events_views
 from workout_analysis import views as analysis_views
+from segments import views as segment_views
+from heatmap import views as heatmap_views
+from metrics import views as metrics_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_views.metrics, name='metrics'),
     path('api/session/', user_views.session, name='session'),
     path('api/register/', user_views.register, name='register'),
     path('api/check_username/', user_views.check_username, name='check_username'),
@@ -43,11 +47,16 @@ urlpatterns = [
     path('api/workouts/', workout_views.list_workouts, name='workouts_list'),
     path('api/workouts/last/', workout_views.last_workout, name='workouts_last'),
     path('api/workouts/weekly_summary/', workout_views.weekly_summary, name='workouts_weekly_summary'),
+    path('api/workouts/training_load/', analysis_views.training_load, name='workouts_training_load'),
+    path('api/workouts/records/', analysis_views.personal_records, name='workouts_personal_records'),
     path('api/workouts/upload/', workout_views.upload_workout, name='workouts_upload'),
     path('api/workouts/<int:workout_id>/', workout_views.delete_workout, name='workouts_delete'),
     path('api/workouts/<int:workout_id>/gpx/', workout_views.upload_gpx, name='workouts_upload_gpx'),
     path('api/workouts/<int:workout_id>/attach_hr/', workout_views.attach_hr, name='workouts_attach_hr'),
     path('api/workouts/import_strava/', workout_views.import_strava_workouts, name='workouts_import_strava'),
+    path('api/segments/', segment_views.segments, name='segments'),
+    path('api/segments/<int:segment_id>/', segment_views.segment_detail, name='segment_detail'),
+    path('api/heatmap/<int:z>/<int:x>/<int:y>.png', heatmap_views.heatmap_tile, name='heatmap_tile'),
     path('api/events/', events_views.list_events, name='events_list'),
     path('api/workouts/<int:workout_id>/analysis/', analysis_views.workout_analysis, name='workout_analysis'),
     path('api/profile/', user_views.profile, name='profile'),
@@ -57,10 +66,12 @@ urlpatterns = [
     path('api/social/posts/<int:post_id>/likes/', social_views.toggle_like, name='social_post_like'),
     path('api/social/posts/<int:post_id>/reactions/', social_views.toggle_reaction, name='social_post_reaction'),
     path('api/social/posts/<int:post_id>/comments/', social_views.comments, name='social_post_comments'),
+    path('api/social/posts/<int:post_id>/comments/<int:comment_id>/', social_views.delete_comment, name='social_post_comment_delete'),
     path('api/social/posts/<int:post_id>/delete/', social_views.delete_post, name='social_post_delete'),
     path('api/social/search_users/', social_views.search_users, name='social_search_users'),
     path('api/social/friend_requests/', social_views.friend_requests, name='social_friend_requests'),
     path('api/social/friend_requests/<int:fr_id>/respond/', social_views.respond_friend_request, name='social_friend_request_respond'),
     path('api/social/friends/', social_views.friends_list, name='social_friends'),
+    path('api/social/friends/<int:user_id>/', social_views.unfriend, name='social_unfriend'),
 ]
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
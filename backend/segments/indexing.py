@@ -0,0 +1,107 @@
+"""Maintain the track geometry index and segment efforts.
+
+index_workout() runs once per GPX upload: it stores thinned geometry plus grid
+cells, adds the track to the heatmap tiles and matches the workout against
+nearby segments only. match_new_segment() finds candidate workouts via the
+cell index and bounding boxes and never touches GPX blobs.
+"""
+from datetime import datetime, timezone as dt_timezone
+from typing import List, Optional
+
+from django.db import transaction
+
+from heatmap.tiles import apply_track
+from workouts.models import Workout
+from workout_analysis.utils import parse_gpx
+from .models import Segment, SegmentEffort, TrackCell, TrackGeometry
+from .utils import bbox, cells_for_path, cells_near, match_segment, thin_track
+
+
+def _started_at(ts: Optional[float]):
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+def _match_effort(segment: Segment, geometry: TrackGeometry) -> Optional[SegmentEffort]:
+    """Unsaved effort of ``geometry`` on ``segment`` (None when the track does not cover it)."""
+    match = match_segment(segment.points, geometry.points, segment.distance_m)
+    if match is None:
+        return None
+    return SegmentEffort(
+        segment=segment,
+        workout_id=geometry.workout_id,
+        elapsed_s=match["elapsed_s"],
+        started_at=_started_at(match["start_ts"]),
+    )
+
+
+def _overlapping(qs, min_lat, max_lat, min_lon, max_lon):
+    return qs.filter(
+        min_lat__lte=max_lat, max_lat__gte=min_lat,
+        min_lon__lte=max_lon, max_lon__gte=min_lon,
+    )
+
+
+@transaction.atomic
+def index_workout(workout: Workout) -> Optional[TrackGeometry]:
+    """(Re)build geometry and cells for a workout and match it against nearby segments."""
+    points = parse_gpx(workout.gpx_bytes()) if workout.gpx_data else []
+    track = thin_track(points)
+    previous = TrackGeometry.objects.filter(workout=workout).values_list("points", flat=True).first()
+    if previous:
+        apply_track(workout.user_id, previous, sign=-1)
+    TrackCell.objects.filter(workout=workout).delete()
+    if len(track) < 2:
+        TrackGeometry.objects.filter(workout=workout).delete()
+        SegmentEffort.objects.filter(workout=workout).delete()
+        return None
+
+    min_lat, max_lat, min_lon, max_lon = bbox(track)
+    geometry, _ = TrackGeometry.objects.update_or_create(
+        workout=workout,
+        defaults={
+            "user_id": workout.user_id,
+            "min_lat": min_lat, "max_lat": max_lat,
+            "min_lon": min_lon, "max_lon": max_lon,
+            "points": track,
+        },
+    )
+    TrackCell.objects.bulk_create([
+        TrackCell(workout=workout, user_id=workout.user_id, cell=c)
+        for c in sorted(cells_for_path(track))
+    ])
+
+    apply_track(workout.user_id, track, sign=1)
+
+    # Stare efforty są usuwane, więc nowe idą jednym INSERT-em niezależnie od liczby segmentów
+    SegmentEffort.objects.filter(workout=workout).delete()
+    segments = _overlapping(Segment.objects.filter(user_id=workout.user_id), min_lat, max_lat, min_lon, max_lon)
+    efforts = [_match_effort(segment, geometry) for segment in segments]
+    SegmentEffort.objects.bulk_create([e for e in efforts if e is not None])
+    return geometry
+
+
+def unindex_workout(workout: Workout) -> None:
+    """Remove a workout's track from the heatmap before the workout is deleted."""
+    previous = TrackGeometry.objects.filter(workout=workout).values_list("points", flat=True).first()
+    if previous:
+        apply_track(workout.user_id, previous, sign=-1)
+
+
+def candidate_geometries(segment: Segment):
+    """Geometries whose tracks pass through both end cells of the segment and overlap its bbox."""
+    start = cells_near(segment.points[0][0], segment.points[0][1])
+    end = cells_near(segment.points[-1][0], segment.points[-1][1])
+    near_start = TrackCell.objects.filter(user_id=segment.user_id, cell__in=start).values("workout_id")
+    near_end = TrackCell.objects.filter(user_id=segment.user_id, cell__in=end).values("workout_id")
+    qs = TrackGeometry.objects.filter(
+        user_id=segment.user_id, workout_id__in=near_start,
+    ).filter(workout_id__in=near_end)
+    return _overlapping(qs, segment.min_lat, segment.max_lat, segment.min_lon, segment.max_lon)
+
+
+def match_new_segment(segment: Segment) -> List[SegmentEffort]:
+    """Efforts of a freshly created segment (no existing rows, so a single bulk insert)."""
+    efforts = [_match_effort(segment, geometry) for geometry in candidate_geometries(segment)]
+    return SegmentEffort.objects.bulk_create([e for e in efforts if e is not None])
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from workouts.models import Workout
+from segments.indexing import index_workout
+
+
+class Command(BaseCommand):
+    help = "Build stored track geometry and grid cells for workouts with GPX (one-off backfill for segment matching)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only index workouts of this user id")
+        parser.add_argument("--missing-only", action="store_true", help="Skip workouts that already have geometry")
+
+    def handle(self, *args, **options):
+        qs = Workout.objects.exclude(gpx_data__isnull=True).order_by("id")
+        if options["user"]:
+            qs = qs.filter(user_id=options["user"])
+        if options["missing_only"]:
+            qs = qs.filter(geometry__isnull=True)
+        ids = list(qs.values_list("id", flat=True))
+        self.stdout.write(f"Indexing track geometry for {len(ids)} workouts...")
+
+        indexed = 0
+        for workout_id in ids:
+            workout = Workout.objects.get(id=workout_id)
+            if index_workout(workout) is not None:
+                indexed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Indexing complete. {indexed}/{len(ids)} workouts have geometry."))
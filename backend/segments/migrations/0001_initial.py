@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workouts', '0008_remove_workout_gpx_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Segment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('points', models.JSONField()),
+                ('distance_m', models.FloatField()),
+                ('min_lat', models.FloatField()),
+                ('max_lat', models.FloatField()),
+                ('min_lon', models.FloatField()),
+                ('max_lon', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('source_workout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='derived_segments', to='workouts.workout')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SegmentEffort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('elapsed_s', models.FloatField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('segment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='efforts', to='segments.segment')),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_efforts', to='workouts.workout')),
+            ],
+            options={
+                'ordering': ['elapsed_s'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrackCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=32)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_cells', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_cells', to='workouts.workout')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrackGeometry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_lat', models.FloatField()),
+                ('max_lat', models.FloatField()),
+                ('min_lon', models.FloatField()),
+                ('max_lon', models.FloatField()),
+                ('points', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_geometries', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='geometry', to='workouts.workout')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='segment',
+            index=models.Index(fields=['user', 'min_lat', 'max_lat'], name='segments_se_user_id_5df02c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='segmenteffort',
+            index=models.Index(fields=['segment', 'elapsed_s'], name='segments_se_segment_804c1d_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='segmenteffort',
+            unique_together={('segment', 'workout')},
+        ),
+        migrations.AddIndex(
+            model_name='trackcell',
+            index=models.Index(fields=['user', 'cell'], name='segments_tr_user_id_caa7c8_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trackcell',
+            unique_together={('workout', 'cell')},
+        ),
+        migrations.AddIndex(
+            model_name='trackgeometry',
+            index=models.Index(fields=['user', 'min_lat', 'max_lat'], name='segments_tr_user_id_90214b_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import models
+from django.contrib.auth.models import User
+from workouts.models import Workout
+
+
+class TrackGeometry(models.Model):
+	"""Thinned track of a workout ([lat, lon, ts] every ~10 m) with its bounding box.
+
+	Built once when GPX is attached, so segment matching never reparses GPX blobs.
+	"""
+	workout = models.OneToOneField(Workout, on_delete=models.CASCADE, related_name="geometry")
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="track_geometries")
+	min_lat = models.FloatField()
+	max_lat = models.FloatField()
+	min_lon = models.FloatField()
+	max_lon = models.FloatField()
+	points = models.JSONField()
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		indexes = [models.Index(fields=["user", "min_lat", "max_lat"])]
+
+	def __str__(self):
+		return f"TrackGeometry(workout={self.workout_id}, points={len(self.points or [])})"
+
+
+class TrackCell(models.Model):
+	"""Grid cell (see segments.utils.GRID_DEG) crossed by a workout track."""
+	workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name="track_cells")
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="track_cells")
+	cell = models.CharField(max_length=32)
+
+	class Meta:
+		unique_together = ("workout", "cell")
+		indexes = [models.Index(fields=["user", "cell"])]
+
+	def __str__(self):
+		return f"TrackCell({self.cell}, workout={self.workout_id})"
+
+
+class Segment(models.Model):
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="segments")
+	name = models.CharField(max_length=255)
+	points = models.JSONField()
+	distance_m = models.FloatField()
+	min_lat = models.FloatField()
+	max_lat = models.FloatField()
+	min_lon = models.FloatField()
+	max_lon = models.FloatField()
+	source_workout = models.ForeignKey(Workout, on_delete=models.SET_NULL, null=True, blank=True, related_name="derived_segments")
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ["-created_at"]
+		indexes = [models.Index(fields=["user", "min_lat", "max_lat"])]
+
+	def __str__(self):
+		return f"Segment(id={self.id}, name={self.name})"
+
+
+class SegmentEffort(models.Model):
+	"""Fastest pass of a workout over a segment."""
+	segment = models.ForeignKey(Segment, on_delete=models.CASCADE, related_name="efforts")
+	workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name="segment_efforts")
+	elapsed_s = models.FloatField()
+	started_at = models.DateTimeField(blank=True, null=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		unique_together = ("segment", "workout")
+		ordering = ["elapsed_s"]
+		indexes = [models.Index(fields=["segment", "elapsed_s"])]
+
+	def __str__(self):
+		return f"SegmentEffort(segment={self.segment_id}, workout={self.workout_id}, {self.elapsed_s:.0f} s)"
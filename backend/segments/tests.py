@@ -0,0 +1,116 @@
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_tz
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from workouts.models import Workout
+from .models import Segment, SegmentEffort, TrackCell, TrackGeometry
+from .utils import cell_key, cells_for_path, match_segment, path_length_m
+
+
+def _loop_gpx(seconds_per_point: int = 3, lat0: float = 50.0, n_points: int = 200) -> bytes:
+    """Straight track heading north, ~11 m between points."""
+    t0 = datetime(2024, 5, 1, 6, 0, tzinfo=dt_tz.utc)
+    pts = []
+    for i in range(n_points):
+        ts = (t0 + timedelta(seconds=i * seconds_per_point)).isoformat()
+        pts.append(f'<trkpt lat="{lat0 + i * 0.0001:.6f}" lon="20.000000"><time>{ts}</time></trkpt>')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>'
+        + "".join(pts)
+        + "</trkseg></trk></gpx>"
+    ).encode("utf-8")
+
+
+SEGMENT_POINTS = [[50.005, 20.0], [50.010, 20.0], [50.015, 20.0]]
+
+
+class SegmentUtilsTests(TestCase):
+    def test_cells_for_path_walks_long_edges(self):
+        cells = cells_for_path([[50.0, 20.0], [50.05, 20.0]])
+        self.assertIn(cell_key(50.025, 20.0), cells)
+        self.assertEqual(len(cells), 6)
+
+    def test_match_segment_times_the_pass(self):
+        track = [[50.0 + i * 0.0001, 20.0, i * 2.0] for i in range(200)]
+        match = match_segment(SEGMENT_POINTS, track)
+        self.assertIsNotNone(match)
+        self.assertAlmostEqual(match["elapsed_s"], 200.0)
+
+    def test_match_segment_rejects_other_route(self):
+        track = [[50.0 + i * 0.0001, 20.001 + (0.004 if 60 < i < 140 else 0.0), i * 2.0] for i in range(200)]
+        self.assertIsNone(match_segment(SEGMENT_POINTS, track))
+
+
+class SegmentApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="seg", password="pass12345")
+        self.client.login(username="seg", password="pass12345")
+
+    def _upload(self, gpx: bytes, title: str) -> Workout:
+        w = Workout.objects.create(user=self.user, title=title, source="manual", raw_data={})
+        resp = self.client.post(
+            f"/api/workouts/{w.id}/gpx/",
+            {"file": SimpleUploadedFile("run.gpx", gpx, content_type="application/gpx+xml")},
+        )
+        self.assertEqual(resp.status_code, 200)
+        return w
+
+    def test_upload_indexes_geometry(self):
+        w = self._upload(_loop_gpx(), "Run")
+        geometry = TrackGeometry.objects.get(workout=w)
+        self.assertGreater(len(geometry.points), 100)
+        self.assertTrue(TrackCell.objects.filter(workout=w).exists())
+
+    def test_new_segment_matches_existing_workouts_without_reparsing(self):
+        fast = self._upload(_loop_gpx(seconds_per_point=3), "Fast")
+        slow = self._upload(_loop_gpx(seconds_per_point=4), "Slow")
+        self._upload(_loop_gpx(lat0=51.0), "Elsewhere")
+        Workout.objects.update(gpx_data=None)  # matching must use stored geometry only
+
+        resp = self.client.post("/api/segments/", json.dumps({"name": "Prosta", "points": SEGMENT_POINTS}), content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.json()["efforts_count"], 2)
+
+        detail = self.client.get(f"/api/segments/{resp.json()['id']}/").json()
+        self.assertEqual([e["workout_id"] for e in detail["efforts"]], [fast.id, slow.id])
+        self.assertAlmostEqual(detail["efforts"][0]["elapsed_s"], 300.0)
+
+    def test_new_workout_is_matched_against_nearby_segments(self):
+        segment = Segment.objects.create(
+            user=self.user, name="S", points=SEGMENT_POINTS, distance_m=path_length_m(SEGMENT_POINTS),
+            min_lat=50.005, max_lat=50.015, min_lon=20.0, max_lon=20.0,
+        )
+        w = self._upload(_loop_gpx(), "Run")
+        self.assertTrue(SegmentEffort.objects.filter(segment=segment, workout=w).exists())
+
+    def test_segment_from_workout_range(self):
+        w = self._upload(_loop_gpx(), "Run")
+        resp = self.client.post(
+            "/api/segments/",
+            json.dumps({"name": "Z treningu", "workout_id": w.id, "start_m": 500, "end_m": 1500}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertAlmostEqual(resp.json()["distance_m"], 1000, delta=30)
+        self.assertEqual(resp.json()["efforts_count"], 1)
+
+    def test_segment_validation_and_ownership(self):
+        resp = self.client.post("/api/segments/", json.dumps({"points": [[50.0, 20.0]]}), content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+        other = User.objects.create_user(username="other", password="pass12345")
+        segment = Segment.objects.create(
+            user=other, name="S", points=SEGMENT_POINTS, distance_m=1000,
+            min_lat=50.005, max_lat=50.015, min_lon=20.0, max_lon=20.0,
+        )
+        self.assertEqual(self.client.get(f"/api/segments/{segment.id}/").status_code, 404)
+
+    def test_index_command_backfills_geometry(self):
+        w = Workout.objects.create(user=self.user, title="Old", source="manual", raw_data={}, gpx_data=_loop_gpx())
+        call_command("index_track_geometry", stdout=io.StringIO())
+        self.assertTrue(TrackGeometry.objects.filter(workout=w).exists())
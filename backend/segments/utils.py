@@ -0,0 +1,173 @@
+"""Geometry helpers for route segments: grid cells, bounding boxes and matching.
+
+Tracks are lists of [lat, lon, ts] (ts in epoch seconds or None); segments
+are lists of [lat, lon]. Everything here is pure Python without Django.
+"""
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from workout_analysis.utils import _haversine_m
+
+# Grid cell size in degrees (~1.1 km north-south)
+GRID_DEG = 0.01
+# Minimum spacing between stored track points
+TRACK_SPACING_M = 10.0
+# Max distance of the track from segment start/end and from its shape
+MATCH_RADIUS_M = 25.0
+SHAPE_TOLERANCE_M = 35.0
+# Accepted ratio of matched track length to segment length
+MIN_LENGTH_RATIO = 0.8
+MAX_LENGTH_RATIO = 1.3
+SHAPE_SAMPLES = 20
+
+
+def cell_key(lat: float, lon: float) -> str:
+    return f"{math.floor(lat / GRID_DEG)}:{math.floor(lon / GRID_DEG)}"
+
+
+def cells_near(lat: float, lon: float, radius_m: float = MATCH_RADIUS_M) -> Set[str]:
+    """Cells that may hold track points within ``radius_m`` of (lat, lon)."""
+    dlat = radius_m / 110540.0
+    dlon = radius_m / (111320.0 * max(math.cos(math.radians(lat)), 1e-6))
+    return {cell_key(lat + sy * dlat, lon + sx * dlon) for sy in (-1, 1) for sx in (-1, 1)}
+
+
+def cells_for_path(coords: Iterable[Sequence[float]]) -> Set[str]:
+    """Grid cells touched by a polyline (long edges are walked in sub-cell steps)."""
+    cells: Set[str] = set()
+    prev = None
+    for c in coords:
+        lat, lon = c[0], c[1]
+        if prev is not None:
+            steps = int(max(abs(lat - prev[0]), abs(lon - prev[1])) / (GRID_DEG / 2))
+            for k in range(1, steps + 1):
+                f = k / (steps + 1)
+                cells.add(cell_key(prev[0] + (lat - prev[0]) * f, prev[1] + (lon - prev[1]) * f))
+        cells.add(cell_key(lat, lon))
+        prev = (lat, lon)
+    return cells
+
+
+def bbox(coords: Iterable[Sequence[float]]) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lon, max_lon)."""
+    lats = []
+    lons = []
+    for c in coords:
+        lats.append(c[0])
+        lons.append(c[1])
+    return min(lats), max(lats), min(lons), max(lons)
+
+
+def path_length_m(coords: Sequence[Sequence[float]]) -> float:
+    return sum(
+        _haversine_m(coords[i - 1][0], coords[i - 1][1], coords[i][0], coords[i][1])
+        for i in range(1, len(coords))
+    )
+
+
+def thin_track(points: List[Dict[str, Optional[float]]], spacing_m: float = TRACK_SPACING_M) -> List[list]:
+    """Reduce parsed GPX points to [lat, lon, ts] at least ``spacing_m`` apart."""
+    pts = sorted(points, key=lambda p: (p.get("ts") is None, p.get("ts")))
+    out: List[list] = []
+    for p in pts:
+        if out and _haversine_m(out[-1][0], out[-1][1], p["lat"], p["lon"]) < spacing_m:
+            continue
+        out.append([p["lat"], p["lon"], p.get("ts")])
+    if pts and out and (out[-1][0], out[-1][1]) != (pts[-1]["lat"], pts[-1]["lon"]):
+        out.append([pts[-1]["lat"], pts[-1]["lon"], pts[-1].get("ts")])
+    return out
+
+
+def _dist_to_polyline_m(lat: float, lon: float, poly: Sequence[Sequence[float]]) -> float:
+    """Distance from a point to a polyline using a local equirectangular projection."""
+    kx = 111320.0 * math.cos(math.radians(lat))
+    ky = 110540.0
+    best = math.inf
+    for i in range(len(poly)):
+        ax, ay = (poly[i][1] - lon) * kx, (poly[i][0] - lat) * ky
+        if i == 0:
+            d2 = ax * ax + ay * ay
+        else:
+            bx, by = (poly[i - 1][1] - lon) * kx, (poly[i - 1][0] - lat) * ky
+            dx, dy = ax - bx, ay - by
+            len2 = dx * dx + dy * dy
+            t = 0.0 if len2 == 0 else max(0.0, min(1.0, -(bx * dx + by * dy) / len2))
+            qx, qy = bx + t * dx, by + t * dy
+            d2 = qx * qx + qy * qy
+        if d2 < best:
+            best = d2
+    return math.sqrt(best)
+
+
+def _closest_in_runs(track: Sequence[Sequence[float]], lat: float, lon: float, radius_m: float) -> List[int]:
+    """Indices of the closest track point in each consecutive run within ``radius_m``."""
+    picks: List[int] = []
+    run_best: Optional[Tuple[float, int]] = None
+    for i, p in enumerate(track):
+        d = _haversine_m(p[0], p[1], lat, lon)
+        if d <= radius_m:
+            if run_best is None or d < run_best[0]:
+                run_best = (d, i)
+        elif run_best is not None:
+            picks.append(run_best[1])
+            run_best = None
+    if run_best is not None:
+        picks.append(run_best[1])
+    return picks
+
+
+def match_segment(segment: Sequence[Sequence[float]], track: Sequence[Sequence[float]], segment_m: Optional[float] = None) -> Optional[dict]:
+    """Find the fastest pass of ``track`` over ``segment``.
+
+    A pass starts and ends within MATCH_RADIUS_M of the segment ends, covers a
+    comparable distance and stays within SHAPE_TOLERANCE_M of the segment
+    shape. Returns {"start_idx", "end_idx", "elapsed_s", "start_ts"} or None.
+    """
+    if len(segment) < 2 or len(track) < 2:
+        return None
+    segment_m = segment_m or path_length_m(segment)
+    starts = _closest_in_runs(track, segment[0][0], segment[0][1], MATCH_RADIUS_M)
+    if not starts:
+        return None
+    ends = _closest_in_runs(track, segment[-1][0], segment[-1][1], MATCH_RADIUS_M)
+    if not ends:
+        return None
+
+    cum = [0.0]
+    for i in range(1, len(track)):
+        cum.append(cum[-1] + _haversine_m(track[i - 1][0], track[i - 1][1], track[i][0], track[i][1]))
+
+    step = max(1, len(segment) // SHAPE_SAMPLES)
+    samples = list(segment[::step]) + [segment[-1]]
+    best = None
+    for s in starts:
+        for e in ends:
+            if e <= s:
+                continue
+            length = cum[e] - cum[s]
+            if length < MIN_LENGTH_RATIO * segment_m:
+                continue
+            if length > MAX_LENGTH_RATIO * segment_m:
+                break
+            ts_s, ts_e = track[s][2], track[e][2]
+            if ts_s is None or ts_e is None or ts_e <= ts_s:
+                break
+            sub = track[s:e + 1]
+            if all(_dist_to_polyline_m(p[0], p[1], sub) <= SHAPE_TOLERANCE_M for p in samples):
+                elapsed = ts_e - ts_s
+                if best is None or elapsed < best["elapsed_s"]:
+                    best = {"start_idx": s, "end_idx": e, "elapsed_s": elapsed, "start_ts": ts_s}
+            break
+    return best
+
+
+def sub_track_by_distance(track: Sequence[Sequence[float]], start_m: float, end_m: float) -> List[list]:
+    """Part of a track between two cumulative distances, as [lat, lon] pairs."""
+    out: List[list] = []
+    cum = 0.0
+    for i, p in enumerate(track):
+        if i:
+            cum += _haversine_m(track[i - 1][0], track[i - 1][1], p[0], p[1])
+        if start_m <= cum <= end_m:
+            out.append([p[0], p[1]])
+    return out
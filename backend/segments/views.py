@@ -0,0 +1,139 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from running_analyzer.responses import FastJsonResponse
+from workouts.models import Workout
+from workout_analysis.utils import parse_gpx
+from .indexing import index_workout, match_new_segment
+from .models import Segment, SegmentEffort, TrackGeometry
+from .utils import bbox, path_length_m, sub_track_by_distance, thin_track
+
+MIN_SEGMENT_M = 100.0
+MAX_SEGMENT_POINTS = 5000
+
+
+def _segment_to_dict(segment: Segment, with_points: bool = False) -> dict:
+    data = {
+        "id": segment.id,
+        "name": segment.name,
+        "distance_m": segment.distance_m,
+        "source_workout_id": segment.source_workout_id,
+        "created_at": segment.created_at,
+    }
+    if with_points:
+        data["points"] = segment.points
+    return data
+
+
+def _points_from_request(request: HttpRequest, user):
+    """Resolve segment geometry from JSON points, a workout range or an uploaded GPX.
+
+    Returns (name, points, source_workout) or a JsonResponse with an error.
+    """
+    file = request.FILES.get("file")
+    if file is not None:
+        track = thin_track(parse_gpx(file.read()))
+        name = request.POST.get("name") or getattr(file, "name", None) or "Segment"
+        return name, [[p[0], p[1]] for p in track], None
+
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    name = (payload.get("name") or "Segment").strip()[:255] or "Segment"
+
+    if payload.get("workout_id") is not None:
+        try:
+            workout = Workout.objects.get(id=payload["workout_id"], user=user)
+        except (Workout.DoesNotExist, ValueError, TypeError):
+            return JsonResponse({"error": "Workout not found"}, status=404)
+        try:
+            start_m = float(payload.get("start_m", 0))
+            end_m = float(payload["end_m"])
+        except (KeyError, TypeError, ValueError):
+            return JsonResponse({"error": "start_m and end_m are required"}, status=400)
+        geometry = TrackGeometry.objects.filter(workout=workout).first() or index_workout(workout)
+        if geometry is None:
+            return JsonResponse({"error": "Workout has no GPS track"}, status=400)
+        return name, sub_track_by_distance(geometry.points, start_m, end_m), workout
+
+    points = payload.get("points")
+    if not isinstance(points, list):
+        return JsonResponse({"error": "Provide points, workout_id or a GPX file"}, status=400)
+    try:
+        coords = [[float(p[0]), float(p[1])] for p in points]
+    except (TypeError, ValueError, IndexError):
+        return JsonResponse({"error": "Points must be [lat, lon] pairs"}, status=400)
+    return name, coords, None
+
+
+@csrf_exempt
+@login_required
+def segments(request: HttpRequest) -> JsonResponse:
+    """GET: lista segmentów użytkownika. POST: nowy segment + dopasowanie istniejących treningów."""
+    if request.method == "GET":
+        qs = Segment.objects.filter(user=request.user)
+        return JsonResponse({"segments": [_segment_to_dict(s) for s in qs]})
+    if request.method != "POST":
+        return JsonResponse({"error": "Only GET or POST allowed"}, status=405)
+
+    resolved = _points_from_request(request, request.user)
+    if isinstance(resolved, JsonResponse):
+        return resolved
+    name, points, source_workout = resolved
+
+    if len(points) < 2 or len(points) > MAX_SEGMENT_POINTS:
+        return JsonResponse({"error": f"Segment needs 2-{MAX_SEGMENT_POINTS} points"}, status=400)
+    if any(not (-90 <= lat <= 90 and -180 <= lon <= 180) for lat, lon in points):
+        return JsonResponse({"error": "Coordinates out of range"}, status=400)
+    distance_m = path_length_m(points)
+    if distance_m < MIN_SEGMENT_M:
+        return JsonResponse({"error": f"Segment must be at least {MIN_SEGMENT_M:.0f} m long"}, status=400)
+
+    min_lat, max_lat, min_lon, max_lon = bbox(points)
+    segment = Segment.objects.create(
+        user=request.user,
+        name=name,
+        points=points,
+        distance_m=distance_m,
+        min_lat=min_lat, max_lat=max_lat,
+        min_lon=min_lon, max_lon=max_lon,
+        source_workout=source_workout,
+    )
+    efforts = match_new_segment(segment)
+    data = _segment_to_dict(segment, with_points=True)
+    data["efforts_count"] = len(efforts)
+    return JsonResponse(data, status=201)
+
+
+@csrf_exempt
+@login_required
+def segment_detail(request: HttpRequest, segment_id: int) -> JsonResponse:
+    """GET: segment z rankingiem przejść (najszybsze pierwsze). DELETE: usuń segment."""
+    try:
+        segment = Segment.objects.get(id=segment_id, user=request.user)
+    except Segment.DoesNotExist:
+        return JsonResponse({"error": "Segment not found"}, status=404)
+
+    if request.method == "DELETE":
+        segment.delete()
+        return JsonResponse({"ok": True})
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET or DELETE allowed"}, status=405)
+
+    efforts = SegmentEffort.objects.filter(segment=segment).select_related("workout")
+    data = _segment_to_dict(segment, with_points=True)
+    data["efforts"] = [
+        {
+            "workout_id": e.workout_id,
+            "workout_title": e.workout.title,
+            "elapsed_s": e.elapsed_s,
+            "pace_s": e.elapsed_s / (segment.distance_m / 1000.0) if segment.distance_m else None,
+            "started_at": e.started_at.isoformat() if e.started_at else None,
+        }
+        for e in efforts
+    ]
+    return FastJsonResponse(data)
@@ -0,0 +1,40 @@
+"""Recompute denormalized Post counters from PostComment / PostReaction rows."""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Post, PostComment, PostReaction
+
+
+def _count_subquery(model, **filters):
+    rows = (
+        model.objects.filter(post=OuterRef("pk"), **filters)
+        .order_by()
+        .values("post")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def _real_counts() -> dict:
+    counts = {"comments_count": _count_subquery(PostComment)}
+    for rtype in Post.REACTION_TYPES:
+        counts[Post.reaction_counter(rtype)] = _count_subquery(PostReaction, reaction_type=rtype)
+    return counts
+
+
+def drifted_posts(queryset=None):
+    """Posts whose stored counters differ from the source tables."""
+    qs = Post.objects.all() if queryset is None else queryset
+    real = _real_counts()
+    qs = qs.annotate(**{f"real_{field}": expr for field, expr in real.items()})
+    mismatch = Q()
+    for field in real:
+        mismatch |= ~Q(**{field: F(f"real_{field}")})
+    return qs.filter(mismatch)
+
+
+def recompute_post_counters(queryset=None) -> int:
+    """Overwrite counters of the given posts (all posts by default). Returns rows updated."""
+    qs = Post.objects.all() if queryset is None else queryset
+    return qs.update(**_real_counts())
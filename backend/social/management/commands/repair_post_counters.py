@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from social.counters import drifted_posts, recompute_post_counters
+from social.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comments_count and per-type reaction counters from PostComment/PostReaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report posts with wrong counters")
+        parser.add_argument("--all", action="store_true", help="Rewrite counters of every post, not only drifted ones")
+
+    def handle(self, *args, **options):
+        drifted_ids = list(drifted_posts().values_list("id", flat=True))
+        self.stdout.write(f"Posts with drifted counters: {len(drifted_ids)}")
+        if options["dry_run"]:
+            return
+        qs = Post.objects.all() if options["all"] else Post.objects.filter(id__in=drifted_ids)
+        updated = recompute_post_counters(qs)
+        self.stdout.write(self.style.SUCCESS(f"Counters repaired for {updated} posts."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:30
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('social', 'Post')
+    for post in Post.objects.annotate(
+        n_comments=Count('comments', distinct=True),
+        n_love=Count('reactions', filter=Q(reactions__reaction_type='love'), distinct=True),
+        n_fire=Count('reactions', filter=Q(reactions__reaction_type='fire'), distinct=True),
+        n_party=Count('reactions', filter=Q(reactions__reaction_type='party'), distinct=True),
+    ).iterator():
+        Post.objects.filter(pk=post.pk).update(
+            comments_count=post.n_comments,
+            love_count=post.n_love,
+            fire_count=post.n_fire,
+            party_count=post.n_party,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0004_delete_postlike'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='fire_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='love_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='party_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
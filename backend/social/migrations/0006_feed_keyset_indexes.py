@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0005_post_counters'),
+        ('workouts', '0008_remove_workout_gpx_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_global', 'created_at', 'id'], name='post_global_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['user', 'is_global', 'created_at', 'id'], name='post_user_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='postcomment_post_page_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    Post = apps.get_model('social', 'Post')
+    Friendship = apps.get_model('social', 'Friendship')
+    FriendRequest = apps.get_model('social', 'FriendRequest')
+    TimelineEntry = apps.get_model('social', 'TimelineEntry')
+
+    friends = {}
+    for u1, u2 in Friendship.objects.values_list('user1_id', 'user2_id'):
+        friends.setdefault(u1, set()).add(u2)
+        friends.setdefault(u2, set()).add(u1)
+    for a, b in FriendRequest.objects.filter(status='accepted').values_list('from_user_id', 'to_user_id'):
+        friends.setdefault(a, set()).add(b)
+        friends.setdefault(b, set()).add(a)
+
+    batch = []
+    for post in Post.objects.filter(is_global=False).only('id', 'user_id', 'created_at').iterator():
+        for owner_id in friends.get(post.user_id, set()) | {post.user_id}:
+            batch.append(TimelineEntry(owner_id=owner_id, post_id=post.id, post_user_id=post.user_id, created_at=post.created_at))
+        if len(batch) >= 1000:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0006_feed_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='social.post')),
+                ('post_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'created_at', 'id'], name='timeline_owner_page_idx'), models.Index(fields=['owner', 'post_user'], name='timeline_owner_author_idx')],
+                'unique_together': {('owner', 'post')},
+            },
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
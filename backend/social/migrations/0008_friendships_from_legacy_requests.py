@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def legacy_requests_to_friendships(apps, schema_editor):
+    """Accepted FriendRequest rows created before Friendship existed become Friendship rows."""
+    FriendRequest = apps.get_model('social', 'FriendRequest')
+    Friendship = apps.get_model('social', 'Friendship')
+    existing = set(Friendship.objects.values_list('user1_id', 'user2_id'))
+    missing = set()
+    for a, b in FriendRequest.objects.filter(status='accepted').values_list('from_user_id', 'to_user_id'):
+        pair = tuple(sorted((a, b)))
+        if pair[0] != pair[1] and pair not in existing:
+            missing.add(pair)
+    Friendship.objects.bulk_create(
+        [Friendship(user1_id=u1, user2_id=u2) for u1, u2 in sorted(missing)],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0007_timeline_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(legacy_requests_to_friendships, migrations.RunPython.noop),
+    ]
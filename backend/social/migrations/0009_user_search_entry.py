@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_search_entries(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserSearchEntry = apps.get_model('social', 'UserSearchEntry')
+    UserSearchEntry.objects.bulk_create(
+        [UserSearchEntry(user_id=uid, username_lower=name.lower()) for uid, name in User.objects.values_list('id', 'username')],
+        batch_size=1000,
+    )
+
+
+def create_trigram_index(apps, schema_editor):
+    # Indeks trigramowy tylko pod PostgreSQL (SQLite korzysta z indeksu B-tree na username_lower)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS social_usersearch_trgm_idx '
+        'ON social_usersearchentry USING gin (username_lower gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS social_usersearch_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0008_friendships_from_legacy_requests'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username_lower', models.CharField(db_index=True, max_length=150)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(fill_search_entries, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
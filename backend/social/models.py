@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from workouts.models import Workout
 
+FRIEND_IDS_CACHE_SECONDS = 3600
+
 
 class Post(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
@@ -11,13 +13,30 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     privacy = models.CharField(max_length=16, default="public")
     is_global = models.BooleanField(default=True)
+    # Zdenormalizowane liczniki (aktualizowane przez F() w widokach, naprawa: repair_post_counters)
+    comments_count = models.PositiveIntegerField(default=0)
+    love_count = models.PositiveIntegerField(default=0)
+    fire_count = models.PositiveIntegerField(default=0)
+    party_count = models.PositiveIntegerField(default=0)
+
+    # Typy reakcji - każdy ma licznik <typ>_count (reaction_counter); "like" wycofany
+    REACTION_TYPES = ("love", "fire", "party")
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination feedów po (created_at, id)
+            models.Index(fields=["is_global", "created_at", "id"], name="post_global_feed_idx"),
+            models.Index(fields=["user", "is_global", "created_at", "id"], name="post_user_feed_idx"),
+        ]
 
     def __str__(self):
         return f"Post(id={self.id}, user={self.user.username})"
 
+    @staticmethod
+    def reaction_counter(reaction_type: str) -> str:
+        return f"{reaction_type}_count"
+
 # TUTAJ USUNĄŁEM KLASĘ PostLike CAŁKOWICIE
 
 class PostComment(models.Model):
@@ -28,6 +47,7 @@ class PostComment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [models.Index(fields=["post", "created_at", "id"], name="postcomment_post_page_idx")]
 
     def __str__(self):
         return f"PostComment(id={self.id}, post={self.post_id}, user={self.user.username})"
@@ -74,12 +94,16 @@ class FriendRequest(models.Model):
         self.save(update_fields=["status", "responded_at"])
         u1, u2 = sorted([self.from_user_id, self.to_user_id])
         Friendship.objects.get_or_create(user1_id=u1, user2_id=u2)
+        Friendship.invalidate_friend_ids(u1, u2)
+        from .timeline import backfill_friendship
+        backfill_friendship(u1, u2)
 
     def reject(self):
         from django.utils import timezone
         self.status = "rejected"
         self.responded_at = timezone.now()
         self.save(update_fields=["status", "responded_at"])
+        Friendship.invalidate_friend_ids(self.from_user_id, self.to_user_id)
 
 
 class Friendship(models.Model):
@@ -94,12 +118,71 @@ class Friendship(models.Model):
     def __str__(self):
         return f"Friendship({self.user1.username},{self.user2.username})"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Friendship.invalidate_friend_ids(self.user1_id, self.user2_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        Friendship.invalidate_friend_ids(self.user1_id, self.user2_id)
+        return result
+
+    @staticmethod
+    def _cache_key(user_id: int) -> str:
+        return f"social:friend_ids:{user_id}"
+
     @staticmethod
-    def friend_ids_for(user: User):
+    def friend_ids_for(user) -> set:
+        """Friend ids of a user (User or id), cached until the friendship set changes."""
+        from django.core.cache import cache
         from django.db.models import Q
+        user_id = user if isinstance(user, int) else user.id
+        key = Friendship._cache_key(user_id)
+        cached = cache.get(key)
+        if cached is not None:
+            return set(cached)
         ids = set()
-        for fr in Friendship.objects.filter(Q(user1=user) | Q(user2=user)).select_related("user1", "user2"):
-            ids.add(fr.user1_id if fr.user1_id != user.id else fr.user2_id)
-            ids.add(fr.user2_id if fr.user2_id != user.id else fr.user1_id)
-        ids.discard(user.id)
-        return ids
\ No newline at end of file
+        for u1, u2 in Friendship.objects.filter(Q(user1_id=user_id) | Q(user2_id=user_id)).values_list("user1_id", "user2_id"):
+            ids.add(u2 if u1 == user_id else u1)
+        ids.discard(user_id)
+        cache.set(key, sorted(ids), FRIEND_IDS_CACHE_SECONDS)
+        return ids
+
+    @staticmethod
+    def invalidate_friend_ids(*user_ids: int) -> None:
+        """Drop cached friend ids once the current transaction commits (immediately outside one).
+
+        Deleting earlier would let a concurrent request re-cache the pre-commit
+        friendships for the full FRIEND_IDS_CACHE_SECONDS.
+        """
+        from django.core.cache import cache
+        from django.db import transaction
+        keys = [Friendship._cache_key(uid) for uid in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+class TimelineEntry(models.Model):
+    """Materialized friends feed: one row per (viewer, friends-only post) written on post creation."""
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="timeline_entries")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="timeline_entries")
+    # Kopia post.user / post.created_at, żeby odczyt i sprzątanie nie wymagały JOIN
+    post_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("owner", "post")
+        indexes = [
+            models.Index(fields=["owner", "created_at", "id"], name="timeline_owner_page_idx"),
+            models.Index(fields=["owner", "post_user"], name="timeline_owner_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"TimelineEntry(owner={self.owner_id}, post={self.post_id})"
+
+
+class UserSearchEntry(models.Model):
+    """Lowercased username side table for indexed user search (kept in sync by social.signals)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="search_entry")
+    username_lower = models.CharField(max_length=150, db_index=True)
+
+    def __str__(self):
+        return f"UserSearchEntry({self.username_lower})"
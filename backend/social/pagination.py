@@ -0,0 +1,56 @@
+"""Keyset (cursor) pagination on (created_at, id).
+
+Cursors are opaque URL-safe strings; a page never uses OFFSET, so deep
+scrolling costs the same as the first page.
+"""
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, pk: int) -> str:
+    raw = f"{created_at.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (UnicodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def page_size(value: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        size = int(value) if value else default
+    except ValueError:
+        size = default
+    return max(1, min(MAX_PAGE_SIZE, size))
+
+
+def keyset_page(qs, cursor: Optional[str], limit: int, descending: bool = True):
+    """Return (items, next_cursor) for qs ordered by (created_at, id)."""
+    if descending:
+        qs = qs.order_by("-created_at", "-id")
+    else:
+        qs = qs.order_by("created_at", "id")
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        if descending:
+            qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    items = list(qs[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
@@ -0,0 +1,58 @@
+"""Indexed username search over UserSearchEntry.
+
+Prefix matches come first: a startswith (LIKE 'q%') lookup on username_lower,
+served by its index (under PostgreSQL db_index also creates the
+varchar_pattern_ops index LIKE needs, whatever the database collation).
+Remaining slots are filled with substring matches: trigram similarity under
+PostgreSQL (GIN index from migration 0009), a bounded contains scan elsewhere.
+Queries shorter than MIN_SUBSTRING_QUERY match prefixes only.
+"""
+from typing import List, Optional
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from .models import UserSearchEntry
+
+SEARCH_LIMIT = 10
+# Krótsze zapytania szukają wyłącznie po prefiksie
+MIN_SUBSTRING_QUERY = 3
+TRIGRAM_THRESHOLD = 0.2
+
+
+def _prefix(q: str) -> Q:
+    # Nie zakres >= q AND < q + U+FFFF - przy kolacjach innych niż C (en_US, pl_PL) myli prefiksy
+    return Q(username_lower__startswith=q)
+
+
+def search_usernames(query: str, exclude_user_id: Optional[int] = None, limit: int = SEARCH_LIMIT) -> List[dict]:
+    q = (query or "").strip().lower()
+    if not q:
+        return []
+    base = UserSearchEntry.objects.all()
+    if exclude_user_id is not None:
+        base = base.exclude(user_id=exclude_user_id)
+
+    prefix = list(
+        base.filter(_prefix(q))
+        .order_by(Length("username_lower"), "username_lower")
+        .values_list("user_id", "user__username")[:limit]
+    )
+    results = [{"id": uid, "username": name} for uid, name in prefix]
+    if len(results) >= limit or len(q) < MIN_SUBSTRING_QUERY:
+        return results
+
+    rest = base.exclude(_prefix(q)).exclude(user_id__in=[r["id"] for r in results])
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        rest = (
+            rest.filter(username_lower__contains=q)
+            .annotate(similarity=TrigramSimilarity("username_lower", q))
+            .order_by("-similarity", "username_lower")
+        )
+    else:
+        rest = rest.filter(username_lower__contains=q).order_by(Length("username_lower"), "username_lower")
+    results += [{"id": uid, "username": name} for uid, name in rest.values_list("user_id", "user__username")[:limit - len(results)]]
+    return results
@@ -0,0 +1,13 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import UserSearchEntry
+
+
+@receiver(post_save, sender=User)
+def sync_user_search_entry(sender, instance: User, raw=False, update_fields=None, **kwargs):
+    # Logowanie zapisuje tylko last_login - wtedy nie ma czego synchronizować
+    if raw or (update_fields is not None and "username" not in update_fields):
+        return
+    UserSearchEntry.objects.update_or_create(user=instance, defaults={"username_lower": instance.username.lower()})
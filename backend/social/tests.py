@@ -1,12 +1,16 @@
+import io
 import json
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth.models import User
 
-from social.models import FriendRequest, Friendship, Post, PostReaction, PostComment
+from social.models import FriendRequest, Friendship, Post, PostReaction, PostComment, TimelineEntry
 
 
 class SocialAppTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pw")
         self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pw")
 
@@ -118,3 +122,139 @@ class SocialAppTests(TestCase):
         self.assertEqual(resp_comments.status_code, 200)
         texts = [c["text"] for c in resp_comments.json().get("comments", [])]
         self.assertIn("Nice run!", texts)
+
+    def test_feed_query_count_does_not_scale_with_posts(self):
+        carol = User.objects.create_user(username="carol", email="carol@example.com", password="pw")
+        for i in range(20):
+            post = Post.objects.create(user=self.bob, text=f"p{i}", is_global=True, comments_count=1, love_count=1, fire_count=2)
+            PostComment.objects.create(post=post, user=carol, text="c")
+            PostReaction.objects.create(post=post, user=self.alice, reaction_type="fire")
+            PostReaction.objects.create(post=post, user=carol, reaction_type="fire")
+            PostReaction.objects.create(post=post, user=carol, reaction_type="love")
+        self.client.force_login(self.alice)
+        self.client.get("/api/social/posts/?scope=global")  # warm session/auth
+        with self.assertNumQueries(4):
+            resp = self.client.get("/api/social/posts/?scope=global")
+        post = resp.json()["posts"][0]
+        self.assertEqual(post["comments_count"], 1)
+        self.assertEqual(post["reaction_counts"], {"love": 1, "fire": 2, "party": 0})
+        self.assertEqual(post["user_reactions"], ["fire"])
+
+    def test_counters_follow_reactions_and_comments(self):
+        post = Post.objects.create(user=self.bob, text="x", is_global=True)
+        self.client.force_login(self.alice)
+        url = f"/api/social/posts/{post.id}/reactions/"
+        self.client.post(url, data=json.dumps({"type": "fire"}), content_type="application/json")
+        resp = self.client.post(f"/api/social/posts/{post.id}/comments/", data=json.dumps({"text": "hej"}), content_type="application/json")
+        comment_id = resp.json()["comment"]["id"]
+        post.refresh_from_db()
+        self.assertEqual((post.fire_count, post.comments_count), (1, 1))
+
+        toggled = self.client.post(url, data=json.dumps({"type": "fire"}), content_type="application/json").json()
+        self.assertFalse(toggled["active"])
+        self.assertEqual(toggled["reaction_counts"]["fire"], 0)
+
+        self.client.force_login(self.bob)  # post owner may remove comments
+        resp = self.client.delete(f"/api/social/posts/{post.id}/comments/{comment_id}/")
+        self.assertEqual(resp.status_code, 200)
+        post.refresh_from_db()
+        self.assertEqual((post.fire_count, post.comments_count), (0, 0))
+
+    def test_repair_command_recomputes_counters(self):
+        post = Post.objects.create(user=self.bob, text="x", is_global=True, comments_count=7, party_count=3)
+        PostComment.objects.create(post=post, user=self.alice, text="c")
+        PostReaction.objects.create(post=post, user=self.alice, reaction_type="love")
+        call_command("repair_post_counters", stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.comments_count, post.love_count, post.fire_count, post.party_count), (1, 1, 0, 0))
+
+    def test_feed_and_comments_keyset_pagination(self):
+        post_ids = [Post.objects.create(user=self.bob, text=f"p{i}", is_global=True).id for i in range(7)]
+        self.client.force_login(self.alice)
+        seen, cursor = [], None
+        while True:
+            url = "/api/social/posts/?scope=global&limit=3" + (f"&cursor={cursor}" if cursor else "")
+            data = self.client.get(url).json()
+            seen += [p["id"] for p in data["posts"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(seen, sorted(post_ids, reverse=True))
+
+        post = Post.objects.get(id=post_ids[0])
+        for i in range(5):
+            PostComment.objects.create(post=post, user=self.alice, text=f"c{i}")
+        first = self.client.get(f"/api/social/posts/{post.id}/comments/?limit=2").json()
+        rest = self.client.get(f"/api/social/posts/{post.id}/comments/?limit=10&cursor={first['next_cursor']}").json()
+        self.assertEqual([c["text"] for c in first["comments"] + rest["comments"]], [f"c{i}" for i in range(5)])
+        self.assertIsNone(rest["next_cursor"])
+
+        self.assertEqual(self.client.get("/api/social/posts/?cursor=%%%").status_code, 400)
+
+    def test_friends_timeline_fan_out_backfill_and_unfriend(self):
+        self.client.force_login(self.bob)
+        early = self.client.post("/api/social/posts/", data=json.dumps({"text": "before", "is_global": False}), content_type="application/json").json()["post"]
+        self.assertEqual(list(TimelineEntry.objects.values_list("owner_id", flat=True)), [self.bob.id])
+
+        fr = FriendRequest.objects.create(from_user=self.alice, to_user=self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/social/friend_requests/{fr.id}/respond/", data=json.dumps({"action": "accept"}), content_type="application/json")
+        later = self.client.post("/api/social/posts/", data=json.dumps({"text": "after", "is_global": False}), content_type="application/json").json()["post"]
+
+        self.client.force_login(self.alice)
+        with self.assertNumQueries(4):
+            feed = self.client.get("/api/social/posts/?scope=friends").json()
+        self.assertEqual([p["id"] for p in feed["posts"]], [later["id"], early["id"]])
+
+        self.client.force_login(self.bob)
+        self.client.post(f"/api/social/posts/{later['id']}/delete/")
+        self.client.force_login(self.alice)
+        self.assertEqual([p["id"] for p in self.client.get("/api/social/posts/?scope=friends").json()["posts"]], [early["id"]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.delete(f"/api/social/friends/{self.bob.id}/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get("/api/social/posts/?scope=friends").json()["posts"], [])
+        self.assertFalse(Friendship.objects.exists())
+        self.assertEqual(self.client.delete(f"/api/social/friends/{self.bob.id}/").status_code, 404)
+
+    def test_friend_ids_are_cached_and_invalidated(self):
+        fr = FriendRequest.objects.create(from_user=self.alice, to_user=self.bob)
+        self.assertEqual(Friendship.friend_ids_for(self.alice), set())
+        with self.assertNumQueries(0):
+            Friendship.friend_ids_for(self.alice)
+        with self.captureOnCommitCallbacks() as callbacks:
+            fr.accept()
+            # Przed commitem cache wciąż trzyma stary zbiór - nie może go odświeżyć równoległe żądanie
+            self.assertEqual(Friendship.friend_ids_for(self.alice), set())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(Friendship.friend_ids_for(self.alice), {self.bob.id})
+
+        self.assertEqual(Friendship.friend_ids_for(self.bob), {self.alice.id})
+        self.client.force_login(self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/social/friends/{self.bob.id}/")
+        self.assertEqual(Friendship.friend_ids_for(self.bob), set())
+
+    def test_search_users_ranks_prefix_matches_first(self):
+        for name in ["Bobby", "jakbob", "xbobx", "ab"]:
+            User.objects.create_user(username=name, password="pw")
+        self.client.force_login(self.alice)
+        names = [r["username"] for r in self.client.get("/api/social/search_users/?q=BOB").json()["results"]]
+        self.assertEqual(names, ["bob", "Bobby", "xbobx", "jakbob"])
+        self.assertEqual([r["username"] for r in self.client.get("/api/social/search_users/?q=al").json()["results"]], [])
+
+        self.bob.username = "zbyszek"
+        self.bob.save()
+        names = [r["username"] for r in self.client.get("/api/social/search_users/?q=zby").json()["results"]]
+        self.assertEqual(names, ["zbyszek"])
+
+    def test_search_prefix_treats_punctuation_literally(self):
+        for name in ["jan_k", "jank", "jan.k", "janek_"]:
+            User.objects.create_user(username=name, password="pw")
+        self.client.force_login(self.alice)
+        names = [r["username"] for r in self.client.get("/api/social/search_users/?q=jan_").json()["results"]]
+        self.assertEqual(names, ["jan_k"])
+        names = [r["username"] for r in self.client.get("/api/social/search_users/?q=ja").json()["results"]]
+        self.assertEqual(names, ["jank", "jan.k", "jan_k", "janek_"])
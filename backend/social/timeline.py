@@ -0,0 +1,56 @@
+"""Fan-out-on-write friends timeline.
+
+A friends-only post is copied into the TimelineEntry rows of its author and
+every friend at creation time; accepting a friendship backfills both
+timelines and unfriending removes the other user's entries. Post deletion
+cascades. Reading the friends feed is then a range scan on one owner.
+"""
+from typing import Iterable, Set
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from .models import Friendship, Post, TimelineEntry
+
+
+def friend_ids(user_id: int) -> Set[int]:
+    return Friendship.friend_ids_for(user_id)
+
+
+def _entries(owner_ids: Iterable[int], posts) -> list:
+    return [
+        TimelineEntry(owner_id=owner_id, post_id=p.id, post_user_id=p.user_id, created_at=p.created_at)
+        for owner_id in owner_ids
+        for p in posts
+    ]
+
+
+def fan_out_post(post: Post) -> int:
+    """Write a friends-only post into the timelines of its author and friends."""
+    if post.is_global:
+        return 0
+    owners = friend_ids(post.user_id) | {post.user_id}
+    TimelineEntry.objects.bulk_create(_entries(owners, [post]), ignore_conflicts=True)
+    return len(owners)
+
+
+def backfill_friendship(user_a_id: int, user_b_id: int) -> None:
+    """Copy each user's existing friends-only posts into the other's timeline."""
+    for owner_id, author_id in ((user_a_id, user_b_id), (user_b_id, user_a_id)):
+        posts = Post.objects.filter(user_id=author_id, is_global=False).only("id", "user_id", "created_at")
+        TimelineEntry.objects.bulk_create(_entries([owner_id], posts), ignore_conflicts=True, batch_size=500)
+
+
+def remove_friendship(user_a_id: int, user_b_id: int) -> None:
+    TimelineEntry.objects.filter(
+        Q(owner_id=user_a_id, post_user_id=user_b_id) | Q(owner_id=user_b_id, post_user_id=user_a_id)
+    ).delete()
+
+
+def rebuild_for_user(user: User) -> int:
+    """Rebuild one user's timeline from scratch (repair / initial fill)."""
+    TimelineEntry.objects.filter(owner=user).delete()
+    authors = friend_ids(user.id) | {user.id}
+    posts = Post.objects.filter(user_id__in=authors, is_global=False).only("id", "user_id", "created_at")
+    created = TimelineEntry.objects.bulk_create(_entries([user.id], posts), batch_size=500)
+    return len(created)
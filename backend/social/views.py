@@ -4,12 +4,20 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import F, Q
 from workouts.models import Workout
-from .models import Post, PostComment, FriendRequest, Friendship, PostReaction
-
-
-def _serialize_post(p: Post, user) -> dict:
+from .models import Post, PostComment, FriendRequest, Friendship, PostReaction, TimelineEntry
+from .pagination import keyset_page, page_size
+from . import timeline
+from .search import search_usernames
+
+
+def _serialize_post(p: Post, user, viewer_reactions=None) -> dict:
+    """Serializuje post; liczniki są kolumnami Post, a reakcje widza dla feedu pochodzą z _viewer_reactions()."""
+    if viewer_reactions is None:
+        user_reactions = _user_reactions(p, user)
+    else:
+        user_reactions = viewer_reactions.get(p.id, [])
     return {
         "id": p.id,
         "user": p.user.username,
@@ -20,21 +28,15 @@ def _serialize_post(p: Post, user) -> dict:
         "image_url": p.image.url if p.image else None,
         "created_at": p.created_at.isoformat(),
         # USUNIĘTO likes_count i liked, ponieważ model PostLike już nie istnieje
-        "comments_count": p.comments.count(),
+        "comments_count": p.comments_count,
         "is_global": p.is_global,
         "reaction_counts": _reaction_counts(p),
-        "user_reactions": _user_reactions(p, user),
+        "user_reactions": user_reactions,
     }
 
 
-ALLOWED_REACTIONS = ["love", "fire", "party"]  # likes removed; use reactions
-
-
 def _reaction_counts(p: Post) -> dict:
-	counts = {}
-	for rtype in ALLOWED_REACTIONS:
-		counts[rtype] = p.reactions.filter(reaction_type=rtype).count()
-	return counts
+	return {rtype: getattr(p, Post.reaction_counter(rtype)) for rtype in Post.REACTION_TYPES}
 
 
 def _user_reactions(p: Post, user) -> list:
@@ -43,29 +45,46 @@ def _user_reactions(p: Post, user) -> list:
 	return list(p.reactions.filter(user=user).values_list("reaction_type", flat=True))
 
 
+def _viewer_reactions(post_ids, user) -> dict:
+	"""Reakcje widza dla wielu postów naraz: {post_id: [reaction_type, ...]}."""
+	result = {}
+	if not user.is_authenticated or not post_ids:
+		return result
+	rows = PostReaction.objects.filter(user=user, post_id__in=post_ids).values_list("post_id", "reaction_type")
+	for post_id, rtype in rows:
+		result.setdefault(post_id, []).append(rtype)
+	return result
+
+
 @login_required
 def list_or_create_posts(request: HttpRequest) -> JsonResponse:
 	if request.method == "GET":
 		scope = request.GET.get("scope", "global").lower()
-		limit = 50
+		limit = page_size(request.GET.get("limit"))
 		if scope == "friends":
-			friend_ids = Friendship.friend_ids_for(request.user)
-			if not friend_ids:
-				legacy_qs = FriendRequest.objects.filter(status="accepted")
-				legacy_ids = set()
-				for fr in legacy_qs.filter(from_user=request.user):
-					legacy_ids.add(fr.to_user_id)
-				for fr in legacy_qs.filter(to_user=request.user):
-					legacy_ids.add(fr.from_user_id)
-				friend_ids = legacy_ids
-			from django.db.models import Q
-			# Friends feed shows ONLY friends-only posts (is_global False) from friends or self.
-			qs = Post.objects.filter(is_global=False).filter(Q(user_id__in=friend_ids) | Q(user=request.user))
-		else:
-			# Global feed shows ONLY global posts.
-			qs = Post.objects.filter(is_global=True)
-		posts = [_serialize_post(p, request.user) for p in qs.select_related("user", "workout")[:limit]]
-		return JsonResponse({"posts": posts, "scope": scope})
+			# Friends feed shows ONLY friends-only posts (is_global False) from friends or self,
+			# read from the viewer's materialized timeline.
+			try:
+				entries, next_cursor = keyset_page(
+					TimelineEntry.objects.filter(owner=request.user).select_related("post__user", "post__workout"),
+					request.GET.get("cursor"),
+					limit,
+				)
+			except ValueError:
+				return JsonResponse({"error": "Nieprawidłowy kursor"}, status=400)
+			page = [e.post for e in entries]
+			viewer_reactions = _viewer_reactions([p.id for p in page], request.user)
+			posts = [_serialize_post(p, request.user, viewer_reactions) for p in page]
+			return JsonResponse({"posts": posts, "scope": scope, "next_cursor": next_cursor})
+		# Global feed shows ONLY global posts.
+		qs = Post.objects.filter(is_global=True)
+		try:
+			page, next_cursor = keyset_page(qs.select_related("user", "workout"), request.GET.get("cursor"), limit)
+		except ValueError:
+			return JsonResponse({"error": "Nieprawidłowy kursor"}, status=400)
+		viewer_reactions = _viewer_reactions([p.id for p in page], request.user)
+		posts = [_serialize_post(p, request.user, viewer_reactions) for p in page]
+		return JsonResponse({"posts": posts, "scope": scope, "next_cursor": next_cursor})
 
 	if request.method == "POST":
 		content_type = request.content_type or ""
@@ -99,7 +118,9 @@ def list_or_create_posts(request: HttpRequest) -> JsonResponse:
 		if not text and not workout and not image:
 			return JsonResponse({"error": "Post musi mieć tekst, obraz lub powiązany trening."}, status=400)
 		privacy = "public" if is_global else "friends"
-		post = Post.objects.create(user=request.user, workout=workout, text=text, image=image, is_global=is_global, privacy=privacy)
+		with transaction.atomic():
+			post = Post.objects.create(user=request.user, workout=workout, text=text, image=image, is_global=is_global, privacy=privacy)
+			timeline.fan_out_post(post)
 		return JsonResponse({"post": _serialize_post(post, request.user)}, status=201)
 
 	return JsonResponse({"error": "Method not allowed"}, status=405)
@@ -124,15 +145,20 @@ def toggle_reaction(request: HttpRequest, post_id: int) -> JsonResponse:
 	except Exception:
 		data = {}
 	reaction_type = (data.get("type") or "").lower()
-	if reaction_type not in ALLOWED_REACTIONS:
+	if reaction_type not in Post.REACTION_TYPES:
 		return JsonResponse({"error": "Nieprawidłowy typ reakcji"}, status=400)
-	existing = PostReaction.objects.filter(post=post, user=request.user, reaction_type=reaction_type).first()
-	if existing:
-		existing.delete()
-		active = False
-	else:
-		PostReaction.objects.create(post=post, user=request.user, reaction_type=reaction_type)
-		active = True
+	counter = Post.reaction_counter(reaction_type)
+	with transaction.atomic():
+		deleted, _ = PostReaction.objects.filter(post=post, user=request.user, reaction_type=reaction_type).delete()
+		if deleted:
+			Post.objects.filter(id=post.id, **{f"{counter}__gt": 0}).update(**{counter: F(counter) - 1})
+			active = False
+		else:
+			_, created = PostReaction.objects.get_or_create(post=post, user=request.user, reaction_type=reaction_type)
+			if created:
+				Post.objects.filter(id=post.id).update(**{counter: F(counter) + 1})
+			active = True
+	post.refresh_from_db(fields=[Post.reaction_counter(r) for r in Post.REACTION_TYPES])
 	return JsonResponse({
 		"type": reaction_type,
 		"active": active,
@@ -149,6 +175,15 @@ def comments(request: HttpRequest, post_id: int) -> JsonResponse:
 		return JsonResponse({"error": "Post not found"}, status=404)
 
 	if request.method == "GET":
+		try:
+			page, next_cursor = keyset_page(
+				post.comments.select_related("user"),
+				request.GET.get("cursor"),
+				page_size(request.GET.get("limit")),
+				descending=False,
+			)
+		except ValueError:
+			return JsonResponse({"error": "Nieprawidłowy kursor"}, status=400)
 		items = [
 			{
 				"id": c.id,
@@ -157,9 +192,9 @@ def comments(request: HttpRequest, post_id: int) -> JsonResponse:
 				"text": c.text,
 				"created_at": c.created_at.isoformat(),
 			}
-			for c in post.comments.select_related("user")
+			for c in page
 		]
-		return JsonResponse({"comments": items})
+		return JsonResponse({"comments": items, "next_cursor": next_cursor})
 
 	if request.method == "POST":
 		try:
@@ -169,7 +204,9 @@ def comments(request: HttpRequest, post_id: int) -> JsonResponse:
 		text = (data.get("text") or "").strip()
 		if not text:
 			return JsonResponse({"error": "Komentarz nie może być pusty."}, status=400)
-		c = PostComment.objects.create(post=post, user=request.user, text=text)
+		with transaction.atomic():
+			c = PostComment.objects.create(post=post, user=request.user, text=text)
+			Post.objects.filter(id=post.id).update(comments_count=F("comments_count") + 1)
 		return JsonResponse({"comment": {
 			"id": c.id, "user": c.user.username, "user_id": c.user.id, "text": c.text, "created_at": c.created_at.isoformat()
 		}}, status=201)
@@ -177,13 +214,31 @@ def comments(request: HttpRequest, post_id: int) -> JsonResponse:
 	return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+@login_required
+def delete_comment(request: HttpRequest, post_id: int, comment_id: int) -> JsonResponse:
+	"""Usuwa komentarz (autor komentarza lub autor posta)."""
+	if request.method not in ("DELETE", "POST"):
+		return JsonResponse({"error": "Only DELETE or POST allowed"}, status=405)
+	try:
+		c = PostComment.objects.select_related("post").get(id=comment_id, post_id=post_id)
+	except PostComment.DoesNotExist:
+		return JsonResponse({"error": "Komentarz nie znaleziony"}, status=404)
+	if request.user.id not in (c.user_id, c.post.user_id):
+		return JsonResponse({"error": "Brak uprawnień"}, status=403)
+	with transaction.atomic():
+		deleted, _ = PostComment.objects.filter(id=c.id).delete()
+		if deleted:
+			Post.objects.filter(id=post_id, comments_count__gt=0).update(comments_count=F("comments_count") - 1)
+	return JsonResponse({"deleted": True, "id": comment_id})
+
+
 @login_required
 def search_users(request: HttpRequest) -> JsonResponse:
 	q = (request.GET.get("q") or "").strip()
 	if not q:
 		return JsonResponse({"results": []})
-	users = User.objects.filter(username__icontains=q).exclude(id=request.user.id)[:10]
-	results = [{"id": u.id, "username": u.username} for u in users]
+	# Najpierw dopasowania prefiksowe, potem fragmenty nazwy (indeks username_lower / trigramy pod Postgres)
+	results = search_usernames(q, exclude_user_id=request.user.id)
 	return JsonResponse({"results": results})
 
 
@@ -192,11 +247,11 @@ def friend_requests(request: HttpRequest) -> JsonResponse:
 	if request.method == "GET":
 		incoming = [
 			{"id": fr.id, "from": fr.from_user.username, "status": fr.status, "created_at": fr.created_at.isoformat()}
-			for fr in FriendRequest.objects.filter(to_user=request.user, status="pending")
+			for fr in FriendRequest.objects.filter(to_user=request.user, status="pending").select_related("from_user")
 		]
 		outgoing = [
 			{"id": fr.id, "to": fr.to_user.username, "status": fr.status, "created_at": fr.created_at.isoformat()}
-			for fr in FriendRequest.objects.filter(from_user=request.user, status="pending")
+			for fr in FriendRequest.objects.filter(from_user=request.user, status="pending").select_related("to_user")
 		]
 		return JsonResponse({"incoming": incoming, "outgoing": outgoing})
 
@@ -255,17 +310,11 @@ def respond_friend_request(request: HttpRequest, fr_id: int) -> JsonResponse:
 def friends_list(request: HttpRequest) -> JsonResponse:
 	"""Return list of accepted friends for current user.
 
-	Uses Friendship model (normalized pairs). Falls back to accepted FriendRequest if no Friendship rows yet.
+	Uses Friendship model (normalized pairs); friend ids come from the per-user cache.
 	"""
 	if request.method != "GET":
 		return JsonResponse({"error": "Only GET allowed"}, status=405)
-	friend_ids = Friendship.friend_ids_for(request.user)
-	if not friend_ids:
-		legacy = FriendRequest.objects.filter(status="accepted")
-		for fr in legacy.filter(from_user=request.user):
-			friend_ids.add(fr.to_user_id)
-		for fr in legacy.filter(to_user=request.user):
-			friend_ids.add(fr.from_user_id)
+	friend_ids = timeline.friend_ids(request.user.id)
 	users = User.objects.filter(id__in=friend_ids).order_by('username')
 	data = [{"id": u.id, "username": u.username} for u in users]
 	return JsonResponse({"friends": data, "count": len(data)})
@@ -281,3 +330,23 @@ def delete_post(request: HttpRequest, post_id: int) -> JsonResponse:
 		return JsonResponse({"error": "Post nie znaleziony lub brak uprawnień"}, status=404)
 	post.delete()
 	return JsonResponse({"deleted": True, "id": post_id})
+
+
+@login_required
+def unfriend(request: HttpRequest, user_id: int) -> JsonResponse:
+	"""Usuwa znajomość (Friendship + zaakceptowane zaproszenia) i czyści wpisy z timeline obu stron."""
+	if request.method not in ("DELETE", "POST"):
+		return JsonResponse({"error": "Only DELETE or POST allowed"}, status=405)
+	u1, u2 = sorted([request.user.id, user_id])
+	with transaction.atomic():
+		removed, _ = Friendship.objects.filter(user1_id=u1, user2_id=u2).delete()
+		if not removed:
+			return JsonResponse({"error": "Nie jesteście znajomymi"}, status=404)
+		Friendship.invalidate_friend_ids(u1, u2)
+		# Zaakceptowane zaproszenie blokowałoby ponowne zaproszenie (unique from/to)
+		FriendRequest.objects.filter(
+			Q(from_user=request.user, to_user_id=user_id) | Q(from_user_id=user_id, to_user=request.user),
+			status="accepted",
+		).delete()
+		timeline.remove_friendship(request.user.id, user_id)
+	return JsonResponse({"removed": True, "friend_id": user_id})
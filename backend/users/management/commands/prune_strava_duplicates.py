@@ -1,7 +1,9 @@
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
+from django.db.models import Count
 from django.contrib.auth.models import User
 from users.models import UserProfile
-from workouts.models import Workout
 from users.models import ActivityLog
 from django.db import transaction
 
@@ -9,22 +11,30 @@ class Command(BaseCommand):
     help = "Merge and remove duplicate UserProfile rows sharing the same strava_athlete_id; keep the one with most workouts/tokens."
 
     def handle(self, *args, **options):
-        duplicates = (
+        duplicate_ids = (
             UserProfile.objects.exclude(strava_athlete_id__isnull=True)
             .exclude(strava_athlete_id="")
+            .values("strava_athlete_id")
+            .annotate(n=Count("id"))
+            .filter(n__gt=1)
             .values_list("strava_athlete_id", flat=True)
-            .distinct()
         )
+        # Jedno zapytanie: profile z duplikatami + liczba treningów (bez count() na profil)
+        grouped = defaultdict(list)
+        profiles_qs = (
+            UserProfile.objects.filter(strava_athlete_id__in=list(duplicate_ids))
+            .select_related("user")
+            .annotate(workout_count=Count("user__workouts"))
+            .order_by("id")
+        )
+        for p in profiles_qs:
+            grouped[p.strava_athlete_id].append(p)
         total_removed = 0
-        for athlete_id in duplicates:
-            profiles = list(UserProfile.objects.filter(strava_athlete_id=athlete_id))
-            if len(profiles) <= 1:
-                continue
+        for athlete_id, profiles in grouped.items():
             # Choose keeper: most workouts; if tie, has access token; else lowest id
             def profile_score(p):
-                workout_count = Workout.objects.filter(user=p.user).count()
                 token_score = 1 if p.strava_access_token else 0
-                return (workout_count, token_score, -p.id)
+                return (p.workout_count, token_score, -p.id)
             keeper = max(profiles, key=profile_score)
             others = [p for p in profiles if p != keeper]
             self.stdout.write(self.style.WARNING(f"Merging {len(others)} duplicates into profile id={keeper.id} for athlete {athlete_id}"))
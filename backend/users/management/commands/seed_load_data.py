@@ -0,0 +1,209 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from benchmarks import synthetic
+from social.models import Friendship, Post, PostComment, PostReaction, UserSearchEntry
+from social.timeline import rebuild_for_user
+from users.models import UserProfile
+from workouts.models import Workout
+
+POST_TEXTS = [
+    "Poranne rozbieganie", "Interwały na bieżni", "Długie wybieganie w niedzielę",
+    "Nowa życiówka na 5 km!", "Spokojny bieg regeneracyjny", "Trening tempowy nad Odrą",
+]
+COMMENT_TEXTS = ["Brawo!", "Super tempo", "Gratulacje 💪", "Gdzie biegałeś?", "Też tam biegam", "Dobra robota"]
+# Wagi losowania w kolejności Post.REACTION_TYPES
+REACTION_WEIGHTS = (3, 2, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users with GPX+HR workouts, friendships, posts, comments and reactions for load testing "
+        "(heavy-tailed activity: few very active users, many occasional ones). Pair with benchmarks/loadtest.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--workouts", type=float, default=20.0, help="Mean workouts per user")
+        parser.add_argument("--points", type=int, default=1800, help="Mean GPS samples per workout (1 s sampling)")
+        parser.add_argument("--friends", type=float, default=8.0, help="Mean friends per user")
+        parser.add_argument("--posts", type=float, default=4.0, help="Mean posts per user")
+        parser.add_argument("--days", type=int, default=180, help="Spread workouts and posts over this many days")
+        parser.add_argument("--prefix", default="load_", help="Username prefix of seeded users")
+        parser.add_argument("--password", default="LoadTest!2024")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--clear", action="store_true", help="Delete previously seeded users (same prefix) first")
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        prefix = opts["prefix"]
+        if opts["clear"]:
+            deleted, _ = User.objects.filter(username__startswith=prefix).delete()
+            self.stdout.write(f"Removed {deleted} rows of previously seeded data")
+        if User.objects.filter(username__startswith=prefix).exists():
+            self.stderr.write(self.style.ERROR(f"Users with prefix '{prefix}' already exist (use --clear)."))
+            return
+
+        now = timezone.now()
+        n = opts["users"]
+        # Aktywność użytkowników ma ciężki ogon (log-normal): mediana < średnia
+        activity = [rng.lognormvariate(0, 0.9) for _ in range(n)]
+        scale = n / sum(activity)
+        activity = [a * scale for a in activity]
+
+        with transaction.atomic():
+            users = self._seed_users(n, prefix, opts["password"], rng)
+            workouts = self._seed_workouts(users, activity, opts, rng, now)
+            friend_pairs = self._seed_friendships(users, activity, opts["friends"], rng)
+            posts = self._seed_posts(users, activity, workouts, friend_pairs, opts, rng, now)
+            for u in users:
+                rebuild_for_user(u)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {sum(len(w) for w in workouts.values())} workouts, "
+            f"{len(friend_pairs)} friendships, {posts['posts']} posts, {posts['comments']} comments, "
+            f"{posts['reactions']} reactions (password: {opts['password']})"
+        ))
+
+    def _seed_users(self, n, prefix, password, rng):
+        # Jeden hash dla wszystkich - make_password per user to sekundy na każde konto
+        hashed = make_password(password)
+        width = max(4, len(str(n - 1)))
+        User.objects.bulk_create([
+            User(username=f"{prefix}{i:0{width}d}", password=hashed, email=f"{prefix}{i}@example.com")
+            for i in range(n)
+        ], batch_size=500)
+        users = list(User.objects.filter(username__startswith=prefix).order_by("id"))
+        UserProfile.objects.bulk_create([
+            UserProfile(user=u, height_cm=rng.randint(155, 195), weight_kg=round(rng.uniform(50, 95), 1))
+            for u in users
+        ], batch_size=500)
+        # bulk_create pomija sygnał post_save, który zwykle utrzymuje indeks wyszukiwania
+        UserSearchEntry.objects.bulk_create(
+            [UserSearchEntry(user=u, username_lower=u.username.lower()) for u in users], batch_size=500
+        )
+        return users
+
+    def _seed_workouts(self, users, activity, opts, rng, now):
+        by_user = {}
+        for idx, (user, act) in enumerate(zip(users, activity)):
+            count = _poisson(rng, opts["workouts"] * act)
+            batch = []
+            for k in range(count):
+                points = max(120, int(rng.gauss(opts["points"], opts["points"] * 0.35)))
+                start = now - timedelta(days=rng.uniform(0, opts["days"]), hours=rng.uniform(0, 12))
+                track = synthetic.generate_track(
+                    points, hr=rng.random() < 0.85, cadence=rng.random() < 0.7,
+                    seed=opts["seed"] * 1_000_003 + idx * 1000 + k, start=start,
+                )
+                gpx = synthetic.to_gpx(track)
+                hrs = [int(p["hr"]) for p in track if p["hr"] is not None]
+                raw = {"source": "seed_load_data"}
+                if hrs:
+                    raw["hr_samples"] = [{"t": int(p["ts"] * 1000), "hr": int(p["hr"])} for p in track if p["hr"] is not None]
+                    raw["hr_stats"] = {"min": min(hrs), "max": max(hrs), "avg": round(sum(hrs) / len(hrs), 1), "count": len(hrs)}
+                workout = Workout(
+                    user=user,
+                    source="adidas",
+                    manual=True,
+                    performed_at=start,
+                    title=f"Trening {track[-1]['dist'] / 1000.0:.1f} km",
+                    distance_m=track[-1]["dist"],
+                    duration_ms=int((track[-1]["ts"] - track[0]["ts"]) * 1000),
+                    gpx_name="seed.gpx",
+                    gpx_mime="application/gpx+xml",
+                    raw_data=raw,
+                )
+                # Tak jak upload_gpx: GPX przechowywany skompresowany
+                workout.set_gpx(gpx)
+                batch.append(workout)
+            by_user[user.id] = Workout.objects.bulk_create(batch, batch_size=200)
+        return by_user
+
+    def _seed_friendships(self, users, activity, mean_friends, rng):
+        """Popular (active) users collect more friends - weighted choice approximates a power law."""
+        pairs = set()
+        ids = [u.id for u in users]
+        target = int(len(users) * mean_friends / 2)
+        attempts = 0
+        while len(pairs) < target and attempts < target * 20:
+            attempts += 1
+            a, b = rng.choices(ids, weights=activity, k=2)
+            if a != b:
+                pairs.add((min(a, b), max(a, b)))
+        Friendship.objects.bulk_create(
+            [Friendship(user1_id=a, user2_id=b) for a, b in pairs], batch_size=1000, ignore_conflicts=True
+        )
+        Friendship.invalidate_friend_ids(*ids)
+        return pairs
+
+    def _seed_posts(self, users, activity, workouts, friend_pairs, opts, rng, now):
+        friends = {u.id: [] for u in users}
+        for a, b in friend_pairs:
+            friends[a].append(b)
+            friends[b].append(a)
+        all_ids = [u.id for u in users]
+
+        posts, pending = [], []
+        for user, act in zip(users, activity):
+            own = workouts.get(user.id) or []
+            for _ in range(_poisson(rng, opts["posts"] * act)):
+                post = Post(
+                    user=user,
+                    workout=rng.choice(own) if own and rng.random() < 0.6 else None,
+                    text=rng.choice(POST_TEXTS),
+                    is_global=rng.random() < 0.7,
+                )
+                post.privacy = "public" if post.is_global else "friends"
+                # Komentarze i reakcje głównie od znajomych, liczba ~ geometryczna
+                audience = friends[user.id] or all_ids
+                commenters = [rng.choice(audience) for _ in range(_geometric(rng, 0.45))]
+                reactors = {}
+                for uid in rng.sample(audience, min(len(audience), _geometric(rng, 0.25))):
+                    reactors[uid] = rng.choices(Post.REACTION_TYPES, weights=REACTION_WEIGHTS)[0]
+                for rtype in reactors.values():
+                    counter = Post.reaction_counter(rtype)
+                    setattr(post, counter, getattr(post, counter) + 1)
+                post.comments_count = len(commenters)
+                posts.append(post)
+                pending.append((commenters, reactors))
+
+        Post.objects.bulk_create(posts, batch_size=500)
+        # created_at ma auto_now_add - rozkładamy posty w czasie osobnym UPDATE
+        for post in posts:
+            post.created_at = now - timedelta(days=rng.uniform(0, opts["days"]))
+        Post.objects.bulk_update(posts, ["created_at"], batch_size=500)
+
+        comments, reactions = [], []
+        for post, (commenters, reactors) in zip(posts, pending):
+            comments.extend(PostComment(post=post, user_id=uid, text=rng.choice(COMMENT_TEXTS)) for uid in commenters)
+            reactions.extend(PostReaction(post=post, user_id=uid, reaction_type=r) for uid, r in reactors.items())
+        PostComment.objects.bulk_create(comments, batch_size=1000)
+        PostReaction.objects.bulk_create(reactions, batch_size=1000)
+        return {"posts": len(posts), "comments": len(comments), "reactions": len(reactions)}
+
+
+def _poisson(rng, lam):
+    """Knuth for small lambda, normal approximation above 30."""
+    if lam <= 0:
+        return 0
+    if lam > 30:
+        return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+    limit, k, p = math.exp(-lam), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _geometric(rng, p):
+    """Number of failures before the first success (0 is the most common value)."""
+    return int(math.log(1.0 - rng.random()) / math.log(1.0 - p))
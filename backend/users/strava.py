@@ -0,0 +1,28 @@
+"""Async Strava API client shared by the OAuth callback and the workout import.
+
+Views await these calls instead of blocking a worker thread on the network,
+so under ASGI one worker can keep many slow Strava requests in flight.
+"""
+import httpx
+
+STRAVA_TOKEN_URL = "https://www.strava.com/oauth/token"
+STRAVA_ACTIVITIES_URL = "https://www.strava.com/api/v3/athlete/activities"
+HTTP_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+
+
+def client() -> httpx.AsyncClient:
+    """New AsyncClient for one view call (use as ``async with client() as http``)."""
+    return httpx.AsyncClient(timeout=HTTP_TIMEOUT)
+
+
+async def exchange_token(http: httpx.AsyncClient, data: dict) -> httpx.Response:
+    """POST to the token endpoint (authorization_code or refresh_token grant)."""
+    return await http.post(STRAVA_TOKEN_URL, data=data)
+
+
+async def list_activities(http: httpx.AsyncClient, access_token: str, page: int, per_page: int) -> httpx.Response:
+    return await http.get(
+        STRAVA_ACTIVITIES_URL,
+        params={"page": page, "per_page": per_page},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
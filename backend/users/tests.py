@@ -1,7 +1,12 @@
+from django.core.management import call_command
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
+from unittest.mock import patch
+import httpx
 import json
 
+from .models import UserProfile
+
 
 class UsersAuthTests(TestCase):
 	def setUp(self):
@@ -71,3 +76,56 @@ class UsersAuthTests(TestCase):
 		r4 = self.client.get('/api/check_email/?email=new@ex.pl')
 		self.assertEqual(r4.json().get('available'), True)
 
+
+class StravaCallbackTests(TestCase):
+	def _mock_client(self, handler):
+		return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+	@patch('users.views.STRAVA_CLIENT_SECRET', 'secret')
+	@patch('users.views.STRAVA_CLIENT_ID', '123')
+	def test_callback_creates_user_and_stores_tokens(self):
+		def handler(req):
+			self.assertEqual(str(req.url), 'https://www.strava.com/oauth/token')
+			return httpx.Response(200, json={
+				'access_token': 'acc', 'refresh_token': 'ref', 'expires_at': 1900000000,
+				'athlete': {'id': 777, 'firstname': 'Jan', 'lastname': 'Nowak'},
+			})
+
+		with patch('users.strava.client', self._mock_client(handler)):
+			res = self.client.get('/oauth/strava/callback/?code=abc')
+		self.assertEqual(res.status_code, 302)
+		profile = UserProfile.objects.get(strava_athlete_id='777')
+		self.assertEqual(profile.user.username, 'strava_777')
+		self.assertEqual(profile.strava_access_token, 'acc')
+		self.assertEqual(self.client.get('/api/session/').json().get('username'), 'strava_777')
+
+	@patch('users.views.STRAVA_CLIENT_SECRET', 'secret')
+	@patch('users.views.STRAVA_CLIENT_ID', '123')
+	def test_callback_reports_token_error(self):
+		with patch('users.strava.client', self._mock_client(lambda req: httpx.Response(400, text='bad code'))):
+			res = self.client.get('/oauth/strava/callback/?code=abc')
+		self.assertEqual(res.status_code, 502)
+		self.assertFalse(UserProfile.objects.exists())
+
+
+class SeedLoadDataTests(TestCase):
+	def test_seed_creates_consistent_social_graph(self):
+		from io import StringIO
+		from social.models import Friendship, Post, PostComment, PostReaction, UserSearchEntry
+		from workouts.models import Workout
+		from benchmarks.loadtest import percentile
+
+		call_command('seed_load_data', users=8, workouts=2, points=150, friends=3, posts=3, stdout=StringIO())
+		users = User.objects.filter(username__startswith='load_')
+		self.assertEqual(users.count(), 8)
+		self.assertEqual(UserSearchEntry.objects.filter(user__in=users).count(), 8)
+		self.assertTrue(Friendship.objects.exists())
+		w = Workout.objects.filter(user__in=users).first()
+		self.assertTrue(w.gpx_data)
+		for post in Post.objects.filter(user__in=users):
+			self.assertEqual(post.comments_count, PostComment.objects.filter(post=post).count())
+			self.assertEqual(post.fire_count, PostReaction.objects.filter(post=post, reaction_type='fire').count())
+		self.assertTrue(self.client.login(username=users.first().username, password='LoadTest!2024'))
+
+		self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+		self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
@@ -11,9 +11,11 @@ from django.db import IntegrityError
 import json
 import re
 import os
-import requests
+import httpx
+from asgiref.sync import sync_to_async
 from payments.models import Payment
 
+from . import strava
 from .models import UserProfile, ActivityLog
 
 # Funkcja pomocnicza do walidacji imion/nazwisk
@@ -219,23 +221,33 @@ def strava_login(request):
     return HttpResponseRedirect(auth_url)
 
 
-def strava_callback(request):
+async def strava_callback(request):
     code = request.GET.get("code")
     if not code:
         return JsonResponse({"error": "Missing code"}, status=400)
     if not STRAVA_CLIENT_ID or not STRAVA_CLIENT_SECRET:
         return JsonResponse({"error": "Client credentials not set"}, status=500)
 
-    token_resp = requests.post("https://www.strava.com/oauth/token", data={
-        "client_id": STRAVA_CLIENT_ID,
-        "client_secret": STRAVA_CLIENT_SECRET,
-        "code": code,
-        "grant_type": "authorization_code",
-    })
+    # Wymiana kodu nie blokuje wątku workera (async HTTP), reszta to ORM + sesja
+    try:
+        async with strava.client() as http:
+            token_resp = await strava.exchange_token(http, {
+                "client_id": STRAVA_CLIENT_ID,
+                "client_secret": STRAVA_CLIENT_SECRET,
+                "code": code,
+                "grant_type": "authorization_code",
+            })
+    except httpx.HTTPError as exc:
+        return JsonResponse({"error": "Strava token exchange failed", "details": str(exc)}, status=502)
     if token_resp.status_code != 200:
         return JsonResponse({"error": "Strava token exchange failed", "details": token_resp.text}, status=502)
-    token_data = token_resp.json()
 
+    await sync_to_async(_link_strava_account)(request, token_resp.json())
+    return HttpResponseRedirect(FRONTEND_REDIRECT_URL)
+
+
+def _link_strava_account(request, token_data):
+    """Log in / create the user for a Strava athlete and store the tokens on the profile."""
     athlete = token_data.get("athlete", {})
     access_token = token_data.get("access_token")
     refresh_token = token_data.get("refresh_token")
@@ -304,7 +316,6 @@ def strava_callback(request):
     profile.save()
     ActivityLog.objects.create(user=request.user, action="strava_link", metadata={"athlete_id": athlete.get("id")})
     request.session.save()
-    return HttpResponseRedirect(FRONTEND_REDIRECT_URL)
 
 
 @csrf_exempt
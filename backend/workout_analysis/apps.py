@@ -5,3 +5,6 @@ class WorkoutAnalysisConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "workout_analysis"
     verbose_name = "Workout Analysis"
+
+    def ready(self):
+        from . import signals  # noqa: F401
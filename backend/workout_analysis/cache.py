@@ -0,0 +1,86 @@
+"""Precompressed cache of workout analysis responses.
+
+An analysis is recomputed from the GPX on every request otherwise, and its
+JSON (full track and chart) is megabytes that compress ~5x. Entries hold the
+serialized body in every supported content coding (gzip, brotli when
+installed), so a hit is a cache read plus sending stored bytes.
+
+Keys combine the owner, a per-workout generation token and a digest of
+everything else the body depends on (response options, the user's height and
+weight, JSON_FLOAT_PRECISION). Every save or delete of the workout (GPX
+upload, attach_hr, ...) drops the generation token through a signal (see
+``signals``); old entries are never read again and expire on their own. A
+lost token (eviction, restart) only causes a recompute. Queryset
+``update()``/``bulk_update()`` bypass signals - call ``invalidate`` after them
+when they change anything the analysis shows.
+"""
+import hashlib
+import json
+import uuid
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from running_analyzer.compression import compress_variants
+
+# Liczone raz, wysyłane wielokrotnie - ale pierwsze żądanie czeka na kompresję
+ANALYSIS_LEVELS = {"gzip": 6, "br": 5}
+
+
+def enabled() -> bool:
+    return getattr(settings, "ANALYSIS_CACHE_SECONDS", 0) > 0
+
+
+def _generation_key(workout_id: int) -> str:
+    return f"analysis:gen:{workout_id}"
+
+
+def _generation(workout_id: int) -> str:
+    key = _generation_key(workout_id)
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        token = cache.get(key)
+    return token
+
+
+def _normalize(value):
+    # Kolejność zbiorów zależy od PYTHONHASHSEED - inaczej każdy worker miałby inny klucz
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def variant_digest(**parts) -> str:
+    """Stable digest (across processes) of the inputs besides the workout that shape the response."""
+    parts["float_precision"] = getattr(settings, "JSON_FLOAT_PRECISION", None)
+    normalized = _normalize(parts)
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _entry_key(user_id: int, workout_id: int, digest: str) -> str:
+    return f"analysis:body:{user_id}:{workout_id}:{_generation(workout_id)}:{digest}"
+
+
+def get(user_id: int, workout_id: int, digest: str) -> Optional[Dict[str, bytes]]:
+    """Stored {content coding: body} or None."""
+    if not enabled():
+        return None
+    return cache.get(_entry_key(user_id, workout_id, digest))
+
+
+def store(user_id: int, workout_id: int, digest: str, body: bytes) -> Dict[str, bytes]:
+    """Compress ``body`` once per coding and cache it; returns the encodings."""
+    encoded = compress_variants(body, ANALYSIS_LEVELS)
+    if enabled():
+        cache.set(_entry_key(user_id, workout_id, digest), encoded, settings.ANALYSIS_CACHE_SECONDS)
+    return encoded
+
+
+def invalidate(workout_id: int) -> None:
+    cache.delete(_generation_key(workout_id))
@@ -0,0 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from workouts.models import Workout
+from workout_analysis.records import efforts_from_best_segments, record_best_efforts
+from workout_analysis.utils import best_segments_from_gpx
+
+
+class Command(BaseCommand):
+    help = "Compute best efforts for all workouts with GPX and rebuild the PersonalBest index (GPX analysis runs in parallel)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+        parser.add_argument("--user", type=int, help="Only backfill workouts of this user id")
+        parser.add_argument("--batch-size", type=int, default=50, help="Workouts loaded from the DB per batch")
+
+    def handle(self, *args, **options):
+        qs = Workout.objects.exclude(gpx_data__isnull=True).order_by("id")
+        if options["user"]:
+            qs = qs.filter(user_id=options["user"])
+        ids = list(qs.values_list("id", flat=True))
+        batch_size = max(1, options["batch_size"])
+        workers = max(1, options["workers"])
+        self.stdout.write(f"Backfilling personal records for {len(ids)} workouts with {workers} workers...")
+
+        processed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for start in range(0, len(ids), batch_size):
+                batch = list(Workout.objects.filter(id__in=ids[start:start + batch_size]).order_by("id"))
+                blobs = [w.gpx_bytes() for w in batch]
+                # GPX parsing dominates; the DB writes below stay in the main process
+                for w, best_segments in zip(batch, pool.map(best_segments_from_gpx, blobs)):
+                    record_best_efforts(w, efforts_from_best_segments(best_segments))
+                    processed += 1
+                self.stdout.write(f"  {processed}/{len(ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfill complete. Processed {processed} workouts."))
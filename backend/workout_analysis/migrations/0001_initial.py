@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workouts', '0008_remove_workout_gpx_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalBest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance_m', models.PositiveIntegerField()),
+                ('pace_s', models.FloatField()),
+                ('time_s', models.FloatField()),
+                ('performed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_bests', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_bests', to='workouts.workout')),
+            ],
+            options={
+                'ordering': ['distance_m'],
+                'unique_together': {('user', 'distance_m')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutBestEffort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance_m', models.PositiveIntegerField()),
+                ('pace_s', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_efforts', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_efforts', to='workouts.workout')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'distance_m', 'pace_s'], name='workout_ana_user_id_27625a_idx')],
+                'unique_together': {('workout', 'distance_m')},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import models
+from django.contrib.auth.models import User
+from workouts.models import Workout
+
+
+class WorkoutBestEffort(models.Model):
+	"""Best pace over a fixed distance within a single workout (cache of analyze_track)."""
+
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="best_efforts")
+	workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name="best_efforts")
+	distance_m = models.PositiveIntegerField()
+	pace_s = models.FloatField()
+	computed_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		unique_together = ("workout", "distance_m")
+		indexes = [models.Index(fields=["user", "distance_m", "pace_s"])]
+
+	def __str__(self) -> str:
+		return f"WorkoutBestEffort(workout={self.workout_id}, {self.distance_m} m, {self.pace_s:.1f} s/km)"
+
+
+class PersonalBest(models.Model):
+	"""Current personal record of a user for a given distance."""
+
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="personal_bests")
+	distance_m = models.PositiveIntegerField()
+	pace_s = models.FloatField()
+	time_s = models.FloatField()
+	workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name="personal_bests")
+	performed_at = models.DateTimeField(blank=True, null=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		unique_together = ("user", "distance_m")
+		ordering = ["distance_m"]
+
+	def __str__(self) -> str:
+		return f"PersonalBest(user={self.user_id}, {self.distance_m} m, {self.time_s:.0f} s)"
+
+
+class TrainingLoadDay(models.Model):
+	"""Daily training stress and exponentially weighted load (ATL/CTL/TSB)."""
+
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="training_load_days")
+	date = models.DateField()
+	stress = models.FloatField(default=0.0)
+	atl = models.FloatField(default=0.0)
+	ctl = models.FloatField(default=0.0)
+	tsb = models.FloatField(default=0.0)
+
+	class Meta:
+		unique_together = ("user", "date")
+		ordering = ["date"]
+
+	def __str__(self) -> str:
+		return f"TrainingLoadDay(user={self.user_id}, {self.date}, ctl={self.ctl:.1f})"
+
+
+class TrainingLoadState(models.Model):
+	"""Bookkeeping for incremental TrainingLoadDay updates."""
+
+	user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="training_load_state")
+	# Last day with computed state
+	last_date = models.DateField(blank=True, null=True)
+	# Earliest day invalidated by a new, changed or deleted workout
+	dirty_from = models.DateField(blank=True, null=True)
+
+	def __str__(self) -> str:
+		return f"TrainingLoadState(user={self.user_id}, last={self.last_date}, dirty_from={self.dirty_from})"
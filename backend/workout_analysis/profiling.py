@@ -0,0 +1,101 @@
+"""Lightweight stage timings for the analysis pipeline.
+
+``collect()`` activates a per-request Timings object in a ContextVar and
+``span(name)`` adds the wall time of a block to it; without an active
+collector a span costs one ContextVar lookup. ``sampled_cprofile()`` runs a
+sample of requests under cProfile and keeps the dump only when the request
+was slower than ANALYSIS_PROFILE_MIN_MS (open with ``python -m pstats`` or
+snakeviz).
+"""
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+
+class Timings:
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        # name -> [total_ms, calls], w kolejności pierwszego wystąpienia
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, ms: float) -> None:
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [ms, 1]
+        else:
+            entry[0] += ms
+            entry[1] += 1
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, (ms, _calls) in self.spans.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms:.1f}" for name, (ms, _calls) in self.spans.items())
+
+
+_active: ContextVar[Optional[Timings]] = ContextVar("analysis_timings", default=None)
+
+
+def current() -> Optional[Timings]:
+    return _active.get()
+
+
+@contextmanager
+def collect():
+    timings = Timings()
+    token = _active.set(timings)
+    try:
+        yield timings
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    timings = _active.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - start) * 1000.0)
+
+
+def timings_enabled() -> bool:
+    return getattr(settings, "ANALYSIS_TIMINGS", settings.DEBUG)
+
+
+@contextmanager
+def sampled_cprofile(label: str):
+    """Profile a sample of requests; dump to ANALYSIS_PROFILE_DIR when slower than the threshold."""
+    directory = getattr(settings, "ANALYSIS_PROFILE_DIR", None)
+    rate = getattr(settings, "ANALYSIS_PROFILE_SAMPLE_RATE", 0.0)
+    if not directory or rate <= 0 or random.random() >= rate:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # inny profiler już działa (np. równoległe żądanie)
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        if elapsed_ms >= getattr(settings, "ANALYSIS_PROFILE_MIN_MS", 500):
+            os.makedirs(directory, exist_ok=True)
+            name = f"{label}-{time.strftime('%Y%m%d-%H%M%S')}-{elapsed_ms:.0f}ms.prof"
+            profiler.dump_stats(os.path.join(directory, name))
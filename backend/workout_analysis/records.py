@@ -0,0 +1,107 @@
+"""Personal records (PR) index maintained incrementally per workout.
+
+Each analysed workout stores its best efforts per distance in
+WorkoutBestEffort; PersonalBest keeps the current best per user and
+distance. Updates only touch the distances whose value actually changed.
+"""
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+
+from workouts.models import Workout
+from . import training_load
+from .models import PersonalBest, WorkoutBestEffort
+from .utils import PB_DISTANCES
+
+
+def efforts_from_best_segments(best_segments: Optional[dict]) -> Dict[int, float]:
+    """Map analyze_track()['best_segments'] onto {distance_m: pace_s}."""
+    efforts: Dict[int, float] = {}
+    for distance_m, key in PB_DISTANCES.items():
+        pace = (best_segments or {}).get(key)
+        if isinstance(pace, (int, float)) and pace > 0:
+            efforts[distance_m] = float(pace)
+    return efforts
+
+
+def _set_personal_best(user_id: int, distance_m: int, effort: Optional[WorkoutBestEffort]) -> None:
+    if effort is None:
+        PersonalBest.objects.filter(user_id=user_id, distance_m=distance_m).delete()
+        return
+    PersonalBest.objects.update_or_create(
+        user_id=user_id,
+        distance_m=distance_m,
+        defaults={
+            "pace_s": effort.pace_s,
+            "time_s": effort.pace_s * distance_m / 1000.0,
+            "workout_id": effort.workout_id,
+            "performed_at": effort.workout.performed_at or effort.workout.created_at,
+        },
+    )
+
+
+def recompute_personal_bests(user_id: int, distances: Iterable[int]) -> None:
+    """Rebuild PersonalBest rows for the given distances from stored efforts."""
+    distances = set(distances)
+    for distance_m in distances:
+        best = (
+            WorkoutBestEffort.objects.filter(user_id=user_id, distance_m=distance_m)
+            .select_related("workout")
+            .order_by("pace_s", "workout_id")
+            .first()
+        )
+        _set_personal_best(user_id, distance_m, best)
+    if training_load.THRESHOLD_PB_DISTANCE_M in distances:
+        training_load.mark_threshold_dirty(user_id)
+
+
+def record_best_efforts(workout: Workout, efforts: Dict[int, float]) -> None:
+    """Store a workout's best efforts and update PRs for changed distances only."""
+    existing = {e.distance_m: e for e in WorkoutBestEffort.objects.filter(workout=workout)}
+    changed = {
+        d for d in set(existing) | set(efforts)
+        if d not in existing or d not in efforts or abs(existing[d].pace_s - efforts[d]) > 1e-6
+    }
+    if not changed:
+        return
+
+    with transaction.atomic():
+        current = {
+            pb.distance_m: pb
+            for pb in PersonalBest.objects.select_for_update().filter(user_id=workout.user_id, distance_m__in=changed)
+        }
+        to_recompute = set()
+        for distance_m in changed:
+            pace = efforts.get(distance_m)
+            if pace is None:
+                WorkoutBestEffort.objects.filter(workout=workout, distance_m=distance_m).delete()
+            else:
+                WorkoutBestEffort.objects.update_or_create(
+                    workout=workout,
+                    distance_m=distance_m,
+                    defaults={"user_id": workout.user_id, "pace_s": pace},
+                )
+            pb = current.get(distance_m)
+            if pace is not None and (pb is None or pace < pb.pace_s):
+                if distance_m == training_load.THRESHOLD_PB_DISTANCE_M:
+                    # Nowy próg tempa zmienia stres wszystkich zapisanych dni
+                    training_load.mark_threshold_dirty(workout.user_id)
+                PersonalBest.objects.update_or_create(
+                    user_id=workout.user_id,
+                    distance_m=distance_m,
+                    defaults={
+                        "pace_s": pace,
+                        "time_s": pace * distance_m / 1000.0,
+                        "workout_id": workout.id,
+                        "performed_at": workout.performed_at or workout.created_at,
+                    },
+                )
+            elif pb is not None and pb.workout_id == workout.id:
+                # this workout held the PR and got slower (or lost the effort)
+                to_recompute.add(distance_m)
+        recompute_personal_bests(workout.user_id, to_recompute)
+
+
+def affected_distances(workout: Workout) -> list:
+    """Distances whose PR is held by ``workout`` (call before deleting it)."""
+    return list(PersonalBest.objects.filter(workout=workout).values_list("distance_m", flat=True))
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from workouts.models import Workout
+
+from . import cache as analysis_cache
+from . import records
+
+
+@receiver(post_save, sender=Workout)
+@receiver(post_delete, sender=Workout)
+def invalidate_cached_analysis(sender, instance: Workout, **kwargs):
+    # GPX (upload_gpx), tętno (attach_hr) i metadane trafiają do odpowiedzi analizy
+    analysis_cache.invalidate(instance.id)
+
+
+@receiver(pre_delete, sender=Workout)
+def remember_personal_bests(sender, instance: Workout, **kwargs):
+    # Kaskada usunie PersonalBest razem z treningiem - zapamiętujemy dystanse przed nią
+    instance._pr_distances = records.affected_distances(instance)
+
+
+@receiver(post_delete, sender=Workout)
+def recompute_personal_bests(sender, instance: Workout, **kwargs):
+    # Każde usunięcie (widok, queryset.delete(), admin, kaskada z usera): rekord przechodzi na kolejny najlepszy wysiłek
+    distances = getattr(instance, "_pr_distances", None)
+    if distances:
+        records.recompute_personal_bests(instance.user_id, distances)
@@ -0,0 +1,306 @@
+import gzip
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_tz
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from workouts.models import Workout
+from .models import PersonalBest, TrainingLoadDay, TrainingLoadState, WorkoutBestEffort
+from .records import record_best_efforts
+from .training_load import workout_stress
+from .utils import analyze_track, decimate_chart, encode_polyline, parse_gpx, simplify_track
+
+
+def _build_gpx(n_points: int, step_deg: float = 0.0001, wiggle_deg: float = 0.00002) -> bytes:
+    """Build a GPX track heading north-east with a small zig-zag, 1 s per point."""
+    t0 = datetime(2024, 4, 12, 7, 0, tzinfo=dt_tz.utc)
+    pts = []
+    for i in range(n_points):
+        lat = 50.0 + i * step_deg
+        lon = 20.0 + i * step_deg / 2 + (wiggle_deg if i % 2 else 0.0)
+        ts = (t0 + timedelta(seconds=i)).isoformat()
+        pts.append(f'<trkpt lat="{lat:.6f}" lon="{lon:.6f}"><ele>{200 + i % 7}</ele><time>{ts}</time></trkpt>')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>'
+        + "".join(pts)
+        + "</trkseg></trk></gpx>"
+    ).encode("utf-8")
+
+
+class AnalysisUtilsTests(TestCase):
+    def test_encode_polyline_matches_reference(self):
+        coords = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        self.assertEqual(encode_polyline(coords), "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+
+    def test_simplify_track_respects_budget_and_error_bound(self):
+        track = analyze_track(parse_gpx(_build_gpx(500)))["track"]
+        simplified, max_error = simplify_track(track, max_points=50)
+        self.assertLessEqual(len(simplified), 50)
+        self.assertIs(simplified[0], track[0])
+        self.assertIs(simplified[-1], track[-1])
+        # zig-zag amplitude is ~1.4 m; any dropped point stays within the reported bound
+        self.assertLess(max_error, 5.0)
+
+        loose, _ = simplify_track(track, tolerance_m=max_error + 1.0)
+        self.assertLessEqual(len(loose), len(simplified))
+
+    def test_decimate_chart_keeps_spikes(self):
+        n = 1000
+        seg_m = [10.0] * n
+        seg_s = [3.0] * n
+        pace = [300.0] * n
+        pace[437] = 900.0  # single slow GPS spike
+        ele = [100.0 + (i % 10) for i in range(n)]
+        hr = [None] * n
+        chart = decimate_chart(seg_m, seg_s, pace, ele, hr, buckets=20)
+        self.assertEqual(len(chart["km"]), 20)
+        self.assertAlmostEqual(chart["km"][-1], 10.0)
+        self.assertEqual(max(chart["pace_s_max"]), 900.0)
+        self.assertEqual(min(chart["elev_min"]), 100.0)
+        self.assertEqual(max(chart["elev_max"]), 109.0)
+        self.assertTrue(all(v is None for v in chart["hr"]))
+
+        by_distance = decimate_chart(seg_m, seg_s, pace, ele, hr, bucket_m=500.0)
+        self.assertEqual(len(by_distance["km"]), 20)
+
+    def test_analyze_track_computes_only_requested_fields(self):
+        result = analyze_track(parse_gpx(_build_gpx(50)), fields={"summary"})
+        self.assertEqual(set(result), {"summary"})
+        self.assertGreater(result["summary"]["distance_m"], 0)
+
+    def test_variant_digest_is_stable_across_hash_seeds(self):
+        # Workery dzielące FileBasedCache muszą liczyć ten sam klucz
+        script = (
+            "import django; django.setup()\n"
+            "from workout_analysis.cache import variant_digest\n"
+            "fields = {'summary', 'track', 'chart', 'splits', 'hr_stats', 'ai_note'}\n"
+            "print(variant_digest(options={'fields': fields, 'max_points': 500}, weight_kg=70.0, height_cm=None))\n"
+        )
+        digests = set()
+        for seed in ("1", "2", "3"):
+            env = dict(os.environ, PYTHONHASHSEED=seed, DJANGO_SETTINGS_MODULE="running_analyzer.settings")
+            out = subprocess.run([sys.executable, "-c", script], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+            digests.add(out.stdout.strip())
+        self.assertEqual(len(digests), 1)
+
+
+class WorkoutAnalysisViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("runner", password="GoodP@ss1", email="r@r.pl")
+        self.client.force_login(self.user)
+        self.workout = Workout.objects.create(
+            user=self.user, title="run", source="adidas", manual=True, raw_data={}, gpx_data=_build_gpx(600)
+        )
+        self.url = f"/api/workouts/{self.workout.id}/analysis/"
+
+    def test_default_response_contains_all_sections(self):
+        data = self.client.get(self.url).json()
+        for key in ("summary", "track", "splits", "best_segments", "pace_extremes", "chart"):
+            self.assertIn(key, data["analysis"])
+        self.assertIn("ai_note", data)
+        self.assertIn("adidas_meta", data)
+
+    def test_fields_selection_omits_other_sections(self):
+        data = self.client.get(self.url, {"fields": "summary,splits"}).json()
+        self.assertEqual(set(data["analysis"]), {"summary", "splits"})
+        self.assertNotIn("ai_note", data)
+        self.assertIsNotNone(data["calories_kcal"])
+
+    def test_unknown_field_is_rejected(self):
+        res = self.client.get(self.url, {"fields": "summary,bogus"})
+        self.assertEqual(res.status_code, 400)
+
+    def test_chart_resolution_and_json_hr(self):
+        t0 = datetime(2024, 4, 12, 7, 0, tzinfo=dt_tz.utc).timestamp()
+        self.workout.raw_data = [{"start_time": int((t0 + i) * 1000), "heart_rate": 140 + i % 20} for i in range(600)]
+        self.workout.save()
+        chart = self.client.get(self.url, {"fields": "chart", "chart_buckets": 12}).json()["analysis"]["chart"]
+        self.assertLessEqual(len(chart["km"]), 12)
+        self.assertEqual(max(chart["hr_max"]), 159)
+        self.assertEqual(self.client.get(self.url, {"chart_buckets": 0}).status_code, 400)
+
+    def test_max_points_and_polyline(self):
+        data = self.client.get(self.url, {"fields": "track", "max_points": 40}).json()
+        self.assertLessEqual(len(data["analysis"]["track"]), 40)
+        self.assertEqual(data["analysis"]["track_simplification"]["original_points"], 599)
+
+        data = self.client.get(self.url, {"fields": "track", "max_points": 40, "track_format": "polyline"}).json()
+        self.assertNotIn("track", data["analysis"])
+        self.assertIsInstance(data["analysis"]["track_polyline"], str)
+        self.assertFalse(math.isinf(data["analysis"]["track_simplification"]["max_error_m"]))
+
+    @override_settings(ANALYSIS_TIMINGS=True)
+    def test_stage_timings_in_header_and_field(self):
+        res = self.client.get(self.url, {"timings": "1"})
+        for stage in ("parse_gpx", "json_time_series", "analyze_track", "adidas_meta", "ai_note"):
+            self.assertIn(stage, res.json()["_timings"])
+            self.assertIn(f"{stage};dur=", res["Server-Timing"])
+        self.assertIn("analysis_total;dur=", res["Server-Timing"])
+        self.assertIn("serialize;dur=", res["Server-Timing"])
+        self.assertNotIn("_timings", self.client.get(self.url).json())
+
+    @override_settings(JSON_FLOAT_PRECISION=5)
+    def test_float_precision_setting_rounds_payload(self):
+        data = self.client.get(self.url, {"fields": "track,summary"}).json()
+        for p in data["analysis"]["track"]:
+            self.assertEqual(p["lat"], round(p["lat"], 5))
+        self.assertEqual(data["analysis"]["summary"]["distance_m"], round(data["analysis"]["summary"]["distance_m"], 5))
+
+    @override_settings(ANALYSIS_TIMINGS=True, ANALYSIS_CACHE_SECONDS=3600)
+    def test_cached_response_is_precompressed_and_invalidated_on_save(self):
+        first = self.client.get(self.url, {"fields": "summary"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["Content-Encoding"], "gzip")
+        self.assertIn("analyze_track;dur=", first["Server-Timing"])
+        second = self.client.get(self.url, {"fields": "summary"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("analyze_track", second["Server-Timing"])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.client.get(self.url, {"fields": "summary"}).json(), json.loads(gzip.decompress(first.content)))
+
+        other = User.objects.create_user("other", password="GoodP@ss1", email="o@r.pl")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url, {"fields": "summary"}).status_code, 404)
+        self.client.force_login(self.user)
+
+        # attach_hr zapisuje trening - kolejne żądanie liczy analizę od nowa
+        t0 = datetime(2024, 4, 12, 7, 0, tzinfo=dt_tz.utc).timestamp()
+        samples = [{"start_time": int((t0 + i) * 1000), "heart_rate": 150} for i in range(0, 600, 5)]
+        res = self.client.post(f"/api/workouts/{self.workout.id}/attach_hr/", json.dumps(samples), content_type="application/json")
+        self.assertEqual(res.status_code, 200)
+        res = self.client.get(self.url, {"fields": "summary"})
+        self.assertIn("analyze_track;dur=", res["Server-Timing"])
+        self.assertEqual(res.json()["hr_stats"]["max"], 150)
+
+    @override_settings(ANALYSIS_TIMINGS=False)
+    def test_stage_timings_disabled(self):
+        res = self.client.get(self.url, {"timings": "1"})
+        self.assertNotIn("_timings", res.json())
+        self.assertNotIn("parse_gpx", res.get("Server-Timing", ""))
+
+    def test_sampled_cprofile_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(ANALYSIS_PROFILE_DIR=tmp, ANALYSIS_PROFILE_SAMPLE_RATE=1.0, ANALYSIS_PROFILE_MIN_MS=0):
+                self.client.get(self.url, {"fields": "summary"})
+            dumps = os.listdir(tmp)
+        self.assertEqual(len(dumps), 1)
+        self.assertTrue(dumps[0].startswith(f"analysis-{self.workout.id}-"))
+
+
+class PersonalRecordsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("pr_runner", password="GoodP@ss1", email="pr@r.pl")
+        self.client.force_login(self.user)
+
+    def _workout(self, step_deg):
+        return Workout.objects.create(
+            user=self.user, title=f"run {step_deg}", source="adidas", manual=True, raw_data={},
+            gpx_data=_build_gpx(700, step_deg=step_deg),
+        )
+
+    def test_analysis_updates_index_and_delete_recomputes(self):
+        slow = self._workout(0.00003)
+        fast = self._workout(0.00004)
+        for w in (slow, fast):
+            self.client.get(f"/api/workouts/{w.id}/analysis/", {"fields": "best_segments"})
+
+        records = {r["distance_m"]: r for r in self.client.get("/api/workouts/records/").json()["records"]}
+        self.assertEqual(records[1000]["workout_id"], fast.id)
+        self.assertAlmostEqual(records[1000]["time_s"], records[1000]["pace_s"])
+
+        self.client.delete(f"/api/workouts/{fast.id}/")
+        records = {r["distance_m"]: r for r in self.client.get("/api/workouts/records/").json()["records"]}
+        self.assertEqual(records[1000]["workout_id"], slow.id)
+
+    def test_bulk_delete_falls_back_to_next_best_effort(self):
+        slow = self._workout(0.00003)
+        fast = self._workout(0.00004)
+        for w in (slow, fast):
+            self.client.get(f"/api/workouts/{w.id}/analysis/", {"fields": "best_segments"})
+
+        Workout.objects.filter(id=fast.id).delete()
+        self.assertEqual(
+            set(PersonalBest.objects.filter(user=self.user).values_list("distance_m", "workout_id")),
+            {(400, slow.id), (1000, slow.id)},
+        )
+
+    def test_analysis_without_best_segments_does_not_touch_index(self):
+        w = self._workout(0.00004)
+        self.client.get(f"/api/workouts/{w.id}/analysis/", {"fields": "summary"})
+        self.assertFalse(WorkoutBestEffort.objects.exists())
+
+    def test_backfill_command(self):
+        slow = self._workout(0.00003)
+        fast = self._workout(0.00004)
+        call_command("backfill_personal_records", workers=1, stdout=io.StringIO())
+        self.assertEqual(WorkoutBestEffort.objects.filter(workout=slow).count(), 2)
+        self.assertEqual(PersonalBest.objects.get(user=self.user, distance_m=400).workout_id, fast.id)
+
+
+class TrainingLoadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("load_runner", password="GoodP@ss1", email="load@r.pl")
+        self.client.force_login(self.user)
+        self.now = datetime.now(dt_tz.utc)
+
+    def _workout(self, days_ago, hr=None):
+        raw = {"hr_stats": {"avg": hr}} if hr else {}
+        return Workout.objects.create(
+            user=self.user, title="run", source="adidas", manual=True, raw_data=raw,
+            performed_at=self.now - timedelta(days=days_ago), distance_m=10000.0, duration_ms=3000 * 1000,
+        )
+
+    def test_stress_from_hr_and_pace(self):
+        threshold_hour = Workout(duration_ms=3600 * 1000, distance_m=10000.0, raw_data={"hr_stats": {"avg": 60 + 0.85 * 130}})
+        self.assertAlmostEqual(workout_stress(threshold_hour), 100.0)
+        at_threshold_pace = Workout(duration_ms=3300 * 1000, distance_m=10000.0, raw_data={})
+        self.assertAlmostEqual(workout_stress(at_threshold_pace, threshold_pace_s=330.0), 100.0 * 3300 / 3600)
+
+    def test_endpoint_builds_daily_series_and_updates_incrementally(self):
+        self._workout(10, hr=150)
+        self._workout(3)
+        data = self.client.get("/api/workouts/training_load/").json()
+        self.assertEqual(len(data["items"]), 11)
+        self.assertGreater(data["current"]["ctl"], 0)
+        self.assertGreater(data["items"][1]["atl"], data["items"][1]["ctl"])
+        before = {r.date: (r.id, r.atl) for r in TrainingLoadDay.objects.filter(user=self.user)}
+
+        payload = {
+            "id": "today",
+            "duration": 1800 * 1000,
+            "features": [
+                {"type": "initial_values", "attributes": {"start_time": int(self.now.timestamp() * 1000)}},
+                {"type": "track_metrics", "attributes": {"distance": 5000}},
+            ],
+        }
+        res = self.client.post("/api/workouts/upload/", json.dumps(payload), content_type="application/json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(TrainingLoadState.objects.get(user=self.user).dirty_from, self.now.date())
+
+        data = self.client.get("/api/workouts/training_load/").json()
+        after = {r.date: (r.id, r.atl) for r in TrainingLoadDay.objects.filter(user=self.user)}
+        # only today's row was rewritten
+        changed = [d for d in after if after[d] != before.get(d)]
+        self.assertEqual(changed, [self.now.date()])
+        self.assertGreater(data["current"]["stress"], 0)
+
+    def test_new_5k_record_recomputes_stored_stress(self):
+        first = self._workout(10)
+        self._workout(3)
+        self.client.get("/api/workouts/training_load/")
+        first_day = (self.now - timedelta(days=10)).date()
+        before = TrainingLoadDay.objects.get(user=self.user, date=first_day).stress
+
+        # Szybsza piątka = szybsze tempo progowe = niższy stres tego samego biegu
+        record_best_efforts(first, {5000: 240.0})
+        self.assertEqual(TrainingLoadState.objects.get(user=self.user).dirty_from, first_day)
+        self.client.get("/api/workouts/training_load/")
+        self.assertLess(TrainingLoadDay.objects.get(user=self.user, date=first_day).stress, before)
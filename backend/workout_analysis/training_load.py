@@ -0,0 +1,152 @@
+"""Training load model: per-workout stress and daily ATL/CTL/TSB.
+
+Stress is an hrTSS-like score from average heart rate (Banister TRIMP
+normalised to one hour at threshold = 100) or, without HR, an rTSS-like
+score from average pace relative to threshold pace. Acute (7 d) and
+chronic (42 d) load are exponentially weighted daily averages stored in
+TrainingLoadDay; refresh() only recomputes days from the earliest
+invalidated date (or the last stored day) up to today.
+"""
+import math
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from workouts.models import Workout
+from .models import PersonalBest, TrainingLoadDay, TrainingLoadState
+
+ATL_DAYS = 7
+CTL_DAYS = 42
+# Defaults used until the profile stores resting / maximum heart rate
+HR_REST_BPM = 60.0
+HR_MAX_BPM = 190.0
+# Lactate threshold as a fraction of heart-rate reserve
+THRESHOLD_HRR = 0.85
+# Threshold pace fallback and its ratio to the 5 km PR pace
+DEFAULT_THRESHOLD_PACE_S = 330.0
+THRESHOLD_TO_5K_PACE = 1.07
+THRESHOLD_PB_DISTANCE_M = 5000
+
+_ATL_DECAY = 1.0 - math.exp(-1.0 / ATL_DAYS)
+_CTL_DECAY = 1.0 - math.exp(-1.0 / CTL_DAYS)
+
+
+def _trimp(duration_min: float, hrr: float) -> float:
+    return duration_min * hrr * 0.64 * math.exp(1.92 * hrr)
+
+
+def _avg_hr(raw) -> Optional[float]:
+    if not isinstance(raw, dict):
+        return None
+    stats = raw.get("hr_stats")
+    if isinstance(stats, dict) and isinstance(stats.get("avg"), (int, float)):
+        return float(stats["avg"])
+    # Strava API activity payload
+    if isinstance(raw.get("average_heartrate"), (int, float)):
+        return float(raw["average_heartrate"])
+    return None
+
+
+def workout_stress(workout: Workout, threshold_pace_s: float = DEFAULT_THRESHOLD_PACE_S) -> float:
+    """Stress score of a single workout (100 ~ one hour at threshold)."""
+    duration_s = (workout.duration_ms or 0) / 1000.0
+    if duration_s <= 0:
+        return 0.0
+
+    avg_hr = _avg_hr(workout.raw_data)
+    if avg_hr:
+        hrr = (avg_hr - HR_REST_BPM) / (HR_MAX_BPM - HR_REST_BPM)
+        hrr = min(max(hrr, 0.0), 1.0)
+        return 100.0 * _trimp(duration_s / 60.0, hrr) / _trimp(60.0, THRESHOLD_HRR)
+
+    if workout.distance_m:
+        pace_s = duration_s / (float(workout.distance_m) / 1000.0)
+        intensity = threshold_pace_s / pace_s
+        return 100.0 * (duration_s / 3600.0) * intensity ** 2
+    return 0.0
+
+
+def _workout_day(workout: Workout) -> Optional[date]:
+    dt = workout.performed_at or workout.created_at
+    return dt.date() if dt else None
+
+
+def threshold_pace_for(user_id: int) -> float:
+    pb = PersonalBest.objects.filter(user_id=user_id, distance_m=THRESHOLD_PB_DISTANCE_M).only("pace_s").first()
+    return pb.pace_s * THRESHOLD_TO_5K_PACE if pb else DEFAULT_THRESHOLD_PACE_S
+
+
+def mark_dirty(user_id: int, day: Optional[date]) -> None:
+    """Invalidate stored load from ``day`` on (call after adding/changing/removing a workout)."""
+    if day is None:
+        return
+    state, _ = TrainingLoadState.objects.get_or_create(user_id=user_id)
+    if state.dirty_from is None or day < state.dirty_from:
+        state.dirty_from = day
+        state.save(update_fields=["dirty_from"])
+
+
+def mark_workout_dirty(workout: Workout) -> None:
+    mark_dirty(workout.user_id, _workout_day(workout))
+
+
+def mark_threshold_dirty(user_id: int) -> None:
+    """Invalidate all stored load (call when the 5 km PR, i.e. the threshold pace, changes)."""
+    first = TrainingLoadDay.objects.filter(user_id=user_id).order_by("date").values_list("date", flat=True).first()
+    if first is None:
+        return
+    # Bez get_or_create: wywoływane też z post_delete, gdy kaskada usuwa całego użytkownika
+    TrainingLoadState.objects.filter(user_id=user_id).filter(
+        Q(dirty_from__isnull=True) | Q(dirty_from__gt=first)
+    ).update(dirty_from=first)
+
+
+def refresh(user_id: int, today: Optional[date] = None) -> None:
+    """Bring TrainingLoadDay rows up to ``today`` in O(days since last valid day)."""
+    today = today or timezone.now().date()
+    with transaction.atomic():
+        state, _ = TrainingLoadState.objects.select_for_update().get_or_create(user_id=user_id)
+        start = state.dirty_from
+        if state.last_date is not None:
+            next_day = state.last_date + timedelta(days=1)
+            start = next_day if start is None else min(start, next_day)
+        else:
+            bounds = Workout.objects.filter(user_id=user_id).aggregate(p=Min("performed_at"), c=Min("created_at"))
+            days = [dt.date() for dt in (bounds["p"], bounds["c"]) if dt]
+            start = min(days) if days else None
+        if start is None or start > today:
+            return
+
+        prev = TrainingLoadDay.objects.filter(user_id=user_id, date__lt=start).order_by("-date").first()
+        atl = prev.atl if prev else 0.0
+        ctl = prev.ctl if prev else 0.0
+        day = (prev.date + timedelta(days=1)) if prev else start
+
+        threshold_pace_s = threshold_pace_for(user_id)
+        stress_by_day: Dict[date, float] = {}
+        workouts = Workout.objects.filter(user_id=user_id).filter(
+            Q(performed_at__date__gte=day, performed_at__date__lte=today)
+            | Q(performed_at__isnull=True, created_at__date__gte=day, created_at__date__lte=today)
+        ).only("performed_at", "created_at", "duration_ms", "distance_m", "raw_data")
+        for w in workouts:
+            d = _workout_day(w)
+            if d is not None:
+                stress_by_day[d] = stress_by_day.get(d, 0.0) + workout_stress(w, threshold_pace_s)
+
+        rows = []
+        while day <= today:
+            stress = stress_by_day.get(day, 0.0)
+            tsb = ctl - atl  # form = yesterday's fitness - yesterday's fatigue
+            atl += (stress - atl) * _ATL_DECAY
+            ctl += (stress - ctl) * _CTL_DECAY
+            rows.append(TrainingLoadDay(user_id=user_id, date=day, stress=stress, atl=atl, ctl=ctl, tsb=tsb))
+            day += timedelta(days=1)
+
+        TrainingLoadDay.objects.filter(user_id=user_id, date__gte=rows[0].date).delete()
+        TrainingLoadDay.objects.bulk_create(rows)
+        state.last_date = today
+        state.dirty_from = None
+        state.save(update_fields=["last_date", "dirty_from"])
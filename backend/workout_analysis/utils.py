@@ -1,6 +1,7 @@
+import heapq
 import math
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from xml.etree import ElementTree as ET
 
 
@@ -90,26 +91,152 @@ def parse_gpx(gpx_bytes: bytes) -> List[Dict[str, Optional[float]]]:
     return points
 
 
-def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
+# Distances tracked as personal records -> key in analyze_track()["best_segments"].
+PB_DISTANCES = {400: "best_400m_pace_s", 1000: "best_1k_pace_s", 5000: "best_5k_pace_s"}
+
+# Sections of the analyze_track() result that callers may request selectively.
+ANALYSIS_SECTIONS = ("summary", "track", "splits", "best_segments", "pace_extremes", "chart")
+
+
+# Default chart resolution: one bucket per 100 m of distance.
+DEFAULT_CHART_BUCKET_M = 100.0
+CHART_SERIES = ("pace_s", "elev", "hr")
+
+
+def _empty_chart() -> Dict[str, List[Any]]:
+    chart: Dict[str, List[Any]] = {"km": []}
+    for name in CHART_SERIES:
+        chart[name] = []
+        chart[f"{name}_min"] = []
+        chart[f"{name}_max"] = []
+    return chart
+
+
+def decimate_chart(
+    seg_m: List[float],
+    seg_s: List[float],
+    pace: List[Optional[float]],
+    ele: List[Optional[float]],
+    hr: List[Optional[float]],
+    buckets: Optional[int] = None,
+    bucket_m: Optional[float] = None,
+) -> Dict[str, List[Any]]:
+    """Reduce per-segment columns into fixed-size distance buckets in one pass.
+
+    Either ``buckets`` (number of buckets over the whole distance) or
+    ``bucket_m`` (bucket length in metres) sets the resolution. Each bucket
+    yields mean/min/max of pace, elevation and heart rate, so short spikes
+    survive decimation. The bucket mean pace is time over distance; ``km``
+    holds the cumulative distance at the end of each bucket.
+    """
+    chart = _empty_chart()
+    total = sum(seg_m)
+    if total <= 0:
+        return chart
+    n_buckets = None
+    if buckets:
+        n_buckets = int(buckets)
+        bucket_m = total / n_buckets
+    bucket_m = bucket_m or DEFAULT_CHART_BUCKET_M
+
+    cur_bucket = None
+    cum = 0.0
+    b_dist = b_time = 0.0
+    b_pace_min = b_pace_max = None
+    b_ele_sum = b_hr_sum = 0.0
+    b_ele_cnt = b_hr_cnt = 0
+    b_ele_min = b_ele_max = b_hr_min = b_hr_max = None
+
+    def flush():
+        chart["km"].append(cum_at_flush / 1000.0)
+        chart["pace_s"].append((b_time / (b_dist / 1000.0)) if b_dist > 0 and b_time > 0 else None)
+        chart["pace_s_min"].append(b_pace_min)
+        chart["pace_s_max"].append(b_pace_max)
+        chart["elev"].append((b_ele_sum / b_ele_cnt) if b_ele_cnt else None)
+        chart["elev_min"].append(b_ele_min)
+        chart["elev_max"].append(b_ele_max)
+        chart["hr"].append((b_hr_sum / b_hr_cnt) if b_hr_cnt else None)
+        chart["hr_min"].append(b_hr_min)
+        chart["hr_max"].append(b_hr_max)
+
+    cum_at_flush = 0.0
+    for i in range(len(seg_m)):
+        # a segment belongs to the bucket in which it starts
+        b = int(cum // bucket_m)
+        cum += seg_m[i]
+        if n_buckets is not None and b >= n_buckets:
+            b = n_buckets - 1
+        if cur_bucket is not None and b != cur_bucket:
+            flush()
+            b_dist = b_time = 0.0
+            b_pace_min = b_pace_max = None
+            b_ele_sum = b_hr_sum = 0.0
+            b_ele_cnt = b_hr_cnt = 0
+            b_ele_min = b_ele_max = b_hr_min = b_hr_max = None
+        cur_bucket = b
+        cum_at_flush = cum
+
+        b_dist += seg_m[i]
+        b_time += seg_s[i]
+        p = pace[i]
+        if p is not None:
+            b_pace_min = p if b_pace_min is None or p < b_pace_min else b_pace_min
+            b_pace_max = p if b_pace_max is None or p > b_pace_max else b_pace_max
+        e = ele[i]
+        if e is not None:
+            b_ele_sum += e
+            b_ele_cnt += 1
+            b_ele_min = e if b_ele_min is None or e < b_ele_min else b_ele_min
+            b_ele_max = e if b_ele_max is None or e > b_ele_max else b_ele_max
+        h = hr[i]
+        if h is not None:
+            b_hr_sum += h
+            b_hr_cnt += 1
+            b_hr_min = h if b_hr_min is None or h < b_hr_min else b_hr_min
+            b_hr_max = h if b_hr_max is None or h > b_hr_max else b_hr_max
+
+    if cur_bucket is not None:
+        flush()
+    return chart
+
+
+def analyze_track(
+    points: List[Dict[str, Optional[float]]],
+    fields: Optional[Iterable[str]] = None,
+    chart_buckets: Optional[int] = None,
+    chart_bucket_m: Optional[float] = None,
+    hr_lookup: Optional[Callable[[float], Optional[float]]] = None,
+) -> Dict[str, Any]:
     """Compute basic analysis metrics given parsed points.
 
     Returns dict with: summary, track (with pace per segment), splits,
     pace_changes, best_segments (1k, 5k, 400m, 60s), and chart series.
+
+    ``fields`` limits the result to the given sections (see ANALYSIS_SECTIONS);
+    sections that are not requested are not computed at all. The chart is
+    built by decimate_chart() with ``chart_buckets`` / ``chart_bucket_m``;
+    ``hr_lookup(ts)`` supplies chart heart rate for points without one.
     """
+    wanted = set(ANALYSIS_SECTIONS) if fields is None else set(fields)
     if len(points) < 2:
-        return {
+        empty = {
             "summary": {"distance_m": 0.0, "duration_s": 0.0, "avg_pace_s_per_km": None},
             "track": [],
             "splits": [],
             "best_segments": {},
             "pace_extremes": {"fastest": [], "slowest": []},
-            "chart": {"km": [], "pace_s": [], "elev": []},
+            "chart": _empty_chart(),
         }
+        return {k: v for k, v in empty.items() if k in wanted}
 
     # sort by timestamp when available to avoid shuffles
     pts = sorted(points, key=lambda p: (p.get("ts") is None, p.get("ts")))
 
+    build_track = "track" in wanted
     track: List[Dict[str, Optional[float]]] = []
+    # per-segment columns used by the sliding-window searches below
+    seg_m_col: List[float] = []
+    seg_s_col: List[float] = []
     total_dist = 0.0
     total_time = 0.0
     total_elev_gain = 0.0
@@ -130,13 +257,13 @@ def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
     km_index = 1
     splits: List[Dict[str, Any]] = []
 
-    # For charting we store samples each ~100 m
-    chart_km: List[float] = []
-    chart_pace: List[Optional[float]] = []
-    chart_ele: List[Optional[float]] = []
+    # Columns for the chart decimator
+    build_chart = "chart" in wanted
+    pace_col: List[Optional[float]] = []
+    ele_col: List[Optional[float]] = []
+    hr_col: List[Optional[float]] = []
 
     last = pts[0]
-    accum_since_sample = 0.0
 
     for cur in pts[1:]:
         d = _haversine_m(last["lat"], last["lon"], cur["lat"], cur["lon"])
@@ -148,16 +275,19 @@ def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
         if d and dt and d > 0 and dt > 0:
             pace_s = dt / (d / 1000.0)
 
-        track.append({
-            "lat": cur["lat"],
-            "lon": cur["lon"],
-            "ele": cur.get("ele"),
-            "ts": cur.get("ts"),
-            "cad": cur.get("cad"),
-            "pace_s": pace_s,
-            "seg_m": d,
-            "seg_s": dt,
-        })
+        if build_track:
+            track.append({
+                "lat": cur["lat"],
+                "lon": cur["lon"],
+                "ele": cur.get("ele"),
+                "ts": cur.get("ts"),
+                "cad": cur.get("cad"),
+                "pace_s": pace_s,
+                "seg_m": d,
+                "seg_s": dt,
+            })
+        seg_m_col.append(d or 0.0)
+        seg_s_col.append(dt or 0.0)
 
         total_dist += d
         if dt:
@@ -190,13 +320,15 @@ def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
             if max_hr is None or h > max_hr:
                 max_hr = h
 
-        # Sample for chart ~ every 100m
-        accum_since_sample += d
-        if accum_since_sample >= 100.0:
-            accum_since_sample = 0.0
-            chart_km.append(total_dist / 1000.0)
-            chart_pace.append(pace_s)
-            chart_ele.append(cur.get("ele"))
+        if build_chart:
+            pace_col.append(pace_s)
+            ele_col.append(float(cur["ele"]) if cur.get("ele") is not None else None)
+            if isinstance(hval, (int, float)):
+                hr_col.append(float(hval))
+            elif hr_lookup is not None and isinstance(cur.get("ts"), (int, float)):
+                hr_col.append(hr_lookup(float(cur["ts"])))
+            else:
+                hr_col.append(None)
 
         # Close 1 km splits
         while km_bucket_dist >= 1000.0:
@@ -233,67 +365,71 @@ def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
     avg_cadence = (cad_sum / cad_cnt) if cad_cnt else None
     avg_hr = (hr_sum / hr_cnt) if hr_cnt else None
 
-    # Compute ~200m fastest/slowest windows (by pace)
-    fast_200: List[Tuple[float, float]] = []
-    slow_200: List[Tuple[float, float]] = []
-    window_dist = 0.0
-    window_time = 0.0
-    start_idx = 0
-    # sliding over segments
-    for i in range(len(track)):
-        window_dist += track[i]["seg_m"] or 0.0
-        window_time += track[i]["seg_s"] or 0.0
-        while window_dist >= 200.0 and start_idx <= i:
-            if window_time and window_dist:
-                pace = window_time / (window_dist / 1000.0)
-                fast_200.append((pace, i))
-                slow_200.append((pace, i))
-            # pop from left
-            window_dist -= track[start_idx]["seg_m"] or 0.0
-            window_time -= track[start_idx]["seg_s"] or 0.0
-            start_idx += 1
-
-    fast_200.sort(key=lambda x: x[0])
-    slow_200.sort(key=lambda x: x[0], reverse=True)
-    pace_extremes = {
-        "fastest": [
-            {"pace_s": p, "window": "~200m"} for p, _ in fast_200[:5]
-        ],
-        "slowest": [
-            {"pace_s": p, "window": "~200m"} for p, _ in slow_200[:5]
-        ],
-    }
+    result: Dict[str, Any] = {}
+
+    if "pace_extremes" in wanted:
+        # Compute ~200m fastest/slowest windows (by pace)
+        fast_200: List[Tuple[float, float]] = []
+        slow_200: List[Tuple[float, float]] = []
+        window_dist = 0.0
+        window_time = 0.0
+        start_idx = 0
+        # sliding over segments
+        for i in range(len(seg_m_col)):
+            window_dist += seg_m_col[i]
+            window_time += seg_s_col[i]
+            while window_dist >= 200.0 and start_idx <= i:
+                if window_time and window_dist:
+                    pace = window_time / (window_dist / 1000.0)
+                    fast_200.append((pace, i))
+                    slow_200.append((pace, i))
+                # pop from left
+                window_dist -= seg_m_col[start_idx]
+                window_time -= seg_s_col[start_idx]
+                start_idx += 1
+
+        fast_200.sort(key=lambda x: x[0])
+        slow_200.sort(key=lambda x: x[0], reverse=True)
+        result["pace_extremes"] = {
+            "fastest": [
+                {"pace_s": p, "window": "~200m"} for p, _ in fast_200[:5]
+            ],
+            "slowest": [
+                {"pace_s": p, "window": "~200m"} for p, _ in slow_200[:5]
+            ],
+        }
 
     def best_by_distance(target_m: float) -> Optional[float]:
         wd = 0.0
         wt = 0.0
         best: Optional[float] = None
         s = 0
-        for i in range(len(track)):
-            wd += track[i]["seg_m"] or 0.0
-            wt += track[i]["seg_s"] or 0.0
+        for i in range(len(seg_m_col)):
+            wd += seg_m_col[i]
+            wt += seg_s_col[i]
             while wd >= target_m and s <= i:
                 if wt and wd:
                     pace = wt / (wd / 1000.0)
                     best = pace if best is None or pace < best else best
-                wd -= track[s]["seg_m"] or 0.0
-                wt -= track[s]["seg_s"] or 0.0
+                wd -= seg_m_col[s]
+                wt -= seg_s_col[s]
                 s += 1
         return best
 
-    best_segments = {
-        "best_1k_pace_s": best_by_distance(1000.0),
-        "best_5k_pace_s": best_by_distance(5000.0),
-        "best_400m_pace_s": best_by_distance(400.0),
-        "best_60s_pace_s": None,  # optional: needs time-window search
-    }
+    if "best_segments" in wanted:
+        result["best_segments"] = {
+            "best_1k_pace_s": best_by_distance(1000.0),
+            "best_5k_pace_s": best_by_distance(5000.0),
+            "best_400m_pace_s": best_by_distance(400.0),
+            "best_60s_pace_s": None,  # optional: needs time-window search
+        }
 
     # crude calories estimate ~ 1.036 kcal per kg per km
     def estimate_calories(distance_m: float, weight_kg: float = 70.0) -> float:
         return 1.036 * weight_kg * (distance_m / 1000.0)
 
-    return {
-        "summary": {
+    if "summary" in wanted:
+        result["summary"] = {
             "distance_m": total_dist,
             "duration_s": total_time,
             "avg_pace_s_per_km": avg_pace,
@@ -302,10 +438,101 @@ def analyze_track(points: List[Dict[str, Optional[float]]]) -> Dict[str, Any]:
             "avg_hr_bpm": avg_hr,
             "max_hr_bpm": max_hr,
             "calories_kcal": estimate_calories(total_dist),
-        },
-        "track": track,
-        "splits": splits,
-        "best_segments": best_segments,
-        "pace_extremes": pace_extremes,
-        "chart": {"km": chart_km, "pace_s": chart_pace, "elev": chart_ele},
-    }
+        }
+    if build_track:
+        result["track"] = track
+    if "splits" in wanted:
+        result["splits"] = splits
+    if build_chart:
+        result["chart"] = decimate_chart(
+            seg_m_col, seg_s_col, pace_col, ele_col, hr_col,
+            buckets=chart_buckets, bucket_m=chart_bucket_m,
+        )
+    return result
+
+
+def simplify_track(
+    track: List[Dict[str, Any]],
+    max_points: Optional[int] = None,
+    tolerance_m: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Reduce track geometry with Ramer-Douglas-Peucker.
+
+    Every point gets an RDP significance (the largest tolerance at which the
+    point would still be kept), so the result for ``max_points`` is exactly
+    the RDP simplification at the tightest tolerance that fits the budget.
+    Returns ``(points, max_error_m)`` where ``max_error_m`` bounds the
+    distance of any dropped point from the simplified line.
+    """
+    n = len(track)
+    if n <= 2 or (max_points is None and tolerance_m is None):
+        return list(track), 0.0
+
+    # local equirectangular projection is accurate enough at route scale
+    lat0 = math.radians(sum(p["lat"] for p in track) / n)
+    kx = 111320.0 * math.cos(lat0)
+    ky = 110540.0
+    xs = [p["lon"] * kx for p in track]
+    ys = [p["lat"] * ky for p in track]
+
+    significance = [0.0] * n
+    significance[0] = significance[-1] = math.inf
+    stack = [(0, n - 1, math.inf)]
+    while stack:
+        a, b, cap = stack.pop()
+        if b - a < 2:
+            continue
+        ax, ay = xs[a], ys[a]
+        dx, dy = xs[b] - ax, ys[b] - ay
+        seg_len2 = dx * dx + dy * dy
+        best_i, best_d2 = a + 1, -1.0
+        for i in range(a + 1, b):
+            px, py = xs[i] - ax, ys[i] - ay
+            if seg_len2 > 0:
+                t = (px * dx + py * dy) / seg_len2
+                t = 0.0 if t < 0 else (1.0 if t > 1 else t)
+                px -= t * dx
+                py -= t * dy
+            d2 = px * px + py * py
+            if d2 > best_d2:
+                best_i, best_d2 = i, d2
+        # clamp to the parent so significance is monotone down the recursion
+        sig = min(math.sqrt(best_d2), cap)
+        significance[best_i] = sig
+        stack.append((a, best_i, sig))
+        stack.append((best_i, b, sig))
+
+    keep = range(n)
+    if tolerance_m is not None:
+        keep = [i for i in keep if significance[i] > tolerance_m]
+    if max_points is not None and len(keep) > max(2, max_points):
+        keep = sorted(heapq.nlargest(max(2, max_points), keep, key=significance.__getitem__))
+    kept = set(keep)
+    max_error = max((significance[i] for i in range(n) if i not in kept), default=0.0)
+    return [track[i] for i in keep], max_error
+
+
+def encode_polyline(coords: Iterable[Tuple[float, float]], precision: int = 5) -> str:
+    """Encode (lat, lon) pairs with the Google encoded polyline algorithm."""
+    factor = 10 ** precision
+    out: List[str] = []
+    prev_lat = prev_lon = 0
+    for lat, lon in coords:
+        ilat = int(round(lat * factor))
+        ilon = int(round(lon * factor))
+        for delta in (ilat - prev_lat, ilon - prev_lon):
+            v = ~(delta << 1) if delta < 0 else (delta << 1)
+            while v >= 0x20:
+                out.append(chr((0x20 | (v & 0x1F)) + 63))
+                v >>= 5
+            out.append(chr(v + 63))
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(out)
+
+
+def best_segments_from_gpx(gpx_bytes: bytes) -> Dict[str, Optional[float]]:
+    """Parse a GPX blob and return only its best_segments.
+
+    Kept free of Django imports so it can run in worker processes.
+    """
+    return analyze_track(parse_gpx(gpx_bytes), fields={"best_segments"}).get("best_segments", {})
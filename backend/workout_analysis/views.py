@@ -4,8 +4,21 @@ import math
 from bisect import bisect_left
 from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, JsonResponse
+from running_analyzer.compression import IDENTITY, precompressed_response
+from running_analyzer.responses import FastJsonResponse
 from workouts.models import Workout
-from .utils import analyze_track, parse_gpx
+from .models import PersonalBest, TrainingLoadDay
+from . import cache as analysis_cache
+from . import profiling
+from . import training_load as training_load_model
+from .records import efforts_from_best_segments, record_best_efforts
+from .utils import ANALYSIS_SECTIONS, analyze_track, encode_polyline, parse_gpx, simplify_track
+
+# Sekcje odpowiedzi, które klient może wybrać parametrem ?fields=
+RESPONSE_FIELDS = ANALYSIS_SECTIONS + ("adidas_meta", "ai_note")
+TRACK_FORMATS = ("points", "polyline")
+MAX_CHART_BUCKETS = 5000
+MIN_CHART_BUCKET_M = 10.0
 
 def _safe_float(value):
     """Zwraca float albo None, jeżeli nie da się przekonwertować."""
@@ -59,13 +72,17 @@ def _extract_time_series_from_json(raw_data):
     hr_points.sort(key=lambda x: x[0])
     return hr_points
 
-def _interpolate_hr(target_ts, hr_series):
-    """Znajduje tętno dla danego znacznika czasu (najbliższy sąsiad)."""
+def _interpolate_hr(target_ts, hr_series, keys=None):
+    """Znajduje tętno dla danego znacznika czasu (najbliższy sąsiad).
+
+    ``keys`` to opcjonalnie wcześniej wyliczona lista czasów z hr_series.
+    """
     if not hr_series:
         return None
     
     # hr_series to lista [(ts, hr), ...]
-    keys = [x[0] for x in hr_series]
+    if keys is None:
+        keys = [x[0] for x in hr_series]
     idx = bisect_left(keys, target_ts)
     
     # Sprawdź granice
@@ -83,157 +100,14 @@ def _interpolate_hr(target_ts, hr_series):
     else:
         return after[1]
 
-@login_required
-def workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
-    try:
-        w = Workout.objects.get(id=workout_id, user=request.user)
-    except Workout.DoesNotExist:
-        return JsonResponse({"error": "Workout not found"}, status=404)
-
-    # 1) ZBIERAMY PUNKTY Z GPX (Geometria trasy)
-    points = []
-    if w.gpx_data:
-        points = parse_gpx(bytes(w.gpx_data))
-
-    # 2) ANALIZA PODSTAWOWA (z GPX)
-    analysis = analyze_track(points)
-
-    # 3) WZBOGACENIE O DANE Z JSON (TĘTNO)
-    # Jeśli raw_data jest stringiem JSON, parsujemy go
-    raw = w.raw_data
-    if isinstance(raw, str):
-        try:
-            raw = json.loads(raw)
-        except Exception:
-            raw = []
-    
-    # Wyciągamy serię czasową tętna z pliku JSON
-    hr_series = _extract_time_series_from_json(raw)
-
-    summary = analysis.get("summary", {})
-    # Ensure these are always defined (used later even without HR data)
-    track = analysis.get("track", [])
-    chart = analysis.get("chart", {})
-    splits = analysis.get("splits", [])
-    
-    # JEŚLI MAMY DANE HR Z PLIKU JSON:
-    if hr_series:
-        # A. Statystyki ogólne (jeśli GPX ich nie dostarczył)
-        hrs = [x[1] for x in hr_series]
-        if not summary.get("avg_hr_bpm") and hrs:
-            summary["avg_hr_bpm"] = sum(hrs) / len(hrs)
-        if not summary.get("max_hr_bpm") and hrs:
-            summary["max_hr_bpm"] = max(hrs)
-        if "min_hr_bpm" not in summary and hrs: # Dodatkowe pole
-            summary["min_hr_bpm"] = min(hrs)
-
-        # B. Synchronizacja z wykresem i splitami (Data Fusion)
-        # Jeśli mamy trasę (GPX) z czasami, możemy "dokleić" tętno do punktów trasy
-        
-        # B.1 Uzupełnij 'track' o HR (jeśli brakuje)
-        # To pozwoli na poprawne mapowanie, jeśli frontend tego używa
-        has_track_timestamps = track and track[0].get("ts") is not None
-        
-        if has_track_timestamps:
-            # Uzupełnij tablicę wykresu (chart)
-            # chart['km'] to oś X (dystans). Musimy wiedzieć, jaki czas odpowiada danemu dystansowi.
-            # analyze_track nie zwraca czasu dla punktów wykresu wprost, ale możemy to przybliżyć
-            # iterując po 'track' i próbkując co ~100m.
-            
-            # Zróbmy regenerację tablicy 'hr' do wykresu
-            new_chart_hr = []
-            current_dist = 0.0
-            next_sample_dist = 0.0
-            
-            # Jeśli chart['km'] istnieje, spróbujmy dopasować HR
-            if chart.get("km"):
-                # Ponieważ analyze_track już zbudował chart['km'], musimy zrobić trudniejszą interpolację
-                # albo (prościej) nadpisać logikę zbierania danych do wykresu,
-                # iterując po 'track' jeszcze raz.
-                
-                chart_hr_values = []
-                sample_indices = [] # indeksy w 'track', które trafiły do wykresu
-                
-                accum_dist = 0.0
-                accum_since_last = 0.0
-                
-                # Symulacja logiki z analyze_track żeby zgrać się z chart['km']
-                # (zakładamy, że analyze_track próbkuje co ok 100m)
-                for pt in track:
-                    segment = pt.get("seg_m") or 0.0
-                    ts = pt.get("ts")
-                    
-                    accum_dist += segment
-                    accum_since_last += segment
-                    
-                    if accum_since_last >= 100.0:
-                        accum_since_last = 0.0
-                        # Mamy punkt wykresu. Znajdź tętno dla czasu 'ts'
-                        val = None
-                        if ts:
-                            val = _interpolate_hr(float(ts), hr_series)
-                        chart_hr_values.append(val)
-                
-                # Nadpisz/Dodaj do wykresu
-                # Uwaga: długość musi się zgadzać. Jeśli symulacja wyjdzie inna o 1 element,
-                # przytnij lub dopełnij.
-                target_len = len(chart["km"])
-                current_len = len(chart_hr_values)
-                
-                if current_len > target_len:
-                    chart_hr_values = chart_hr_values[:target_len]
-                elif current_len < target_len:
-                    chart_hr_values.extend([None] * (target_len - current_len))
-                
-                analysis["chart"]["hr"] = chart_hr_values
-
-            # B.2 Uzupełnij splity o średnie tętno
-            # Splity mają pole 'km' (1, 2, 3...).
-            # Musimy obliczyć średnie HR dla każdego kilometra.
-            # Użyjmy punktów 'track' jako odniesienia czasu i dystansu.
-            km_idx = 1
-            curr_km_hr_sum = 0.0
-            curr_km_hr_count = 0
-            curr_km_dist = 0.0
-            
-            # Mapa splitów do szybkiego dostępu
-            split_map = {s["km"]: s for s in splits}
-            
-            for pt in track:
-                dist = pt.get("seg_m") or 0.0
-                ts = pt.get("ts")
-                curr_km_dist += dist
-                
-                if ts:
-                    hr_val = _interpolate_hr(float(ts), hr_series)
-                    if hr_val:
-                        curr_km_hr_sum += hr_val
-                        curr_km_hr_count += 1
-                
-                if curr_km_dist >= 1000.0:
-                    if km_idx in split_map:
-                        avg = (curr_km_hr_sum / curr_km_hr_count) if curr_km_hr_count > 0 else None
-                        # Nadpisz tylko jeśli split nie ma HR z GPX
-                        if split_map[km_idx].get("hr_bpm") is None:
-                            split_map[km_idx]["hr_bpm"] = avg
-                    
-                    km_idx += 1
-                    curr_km_dist -= 1000.0
-                    curr_km_hr_sum = 0.0
-                    curr_km_hr_count = 0
-
-    # Reszta kodu (kalorie, antropometria, meta) bez zmian...
-    user_profile = getattr(request.user, "profile", None)
-    user_weight = user_profile.weight_kg if user_profile and user_profile.weight_kg else None
-    user_height_cm = user_profile.height_cm if user_profile and user_profile.height_cm else None
+def _make_hr_lookup(hr_series):
+    """Zwraca funkcję ts -> tętno z jednorazowo zbudowanym indeksem czasów."""
+    keys = [x[0] for x in hr_series]
+    return lambda ts: _interpolate_hr(ts, hr_series, keys)
 
-    if user_weight and summary.get("distance_m"):
-         dist_km = summary["distance_m"] / 1000.0
-         # Proste szacowanie jeśli nie ma kalorii
-         if not summary.get("calories_kcal"):
-             summary["calories_kcal"] = 1.036 * float(user_weight) * dist_km
 
-    # Ekstrakcja metadanych Adidas (pogoda, kroki, urządzenie, utrata płynów)
+def _extract_adidas_meta(raw):
+    """Wyciąga metadane Adidas (pogoda, kroki, urządzenie, utrata płynów) z raw_data."""
     adidas_meta = {}
     if isinstance(raw, dict):
         features = raw.get("features")
@@ -329,7 +203,6 @@ def workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
                                 pass
                         break
 
-    # Budowanie odpowiedzi JSON
     # Add top-level dehydration if not captured
     if isinstance(raw, dict) and adidas_meta.get("dehydration_volume_ml") is None:
         top_dehydration = raw.get("dehydration_volume") or raw.get("dehydration_volume_ml")
@@ -338,25 +211,11 @@ def workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
                 adidas_meta["dehydration_volume_ml"] = float(top_dehydration)
             except Exception:
                 pass
-    resp = {
-        "id": w.id,
-        "title": w.title,
-        "performed_at": (w.performed_at.isoformat() if w.performed_at else None),
-        "distance_m": w.distance_m,
-        "duration_ms": w.duration_ms,
-        "has_track": bool(points),
-        "analysis": analysis,
-        "calories_kcal": summary.get("calories_kcal"),
-        "user_anthropometrics": {
-            "height_cm": user_height_cm,
-            "weight_kg": float(user_weight) if user_weight else None,
-        },
-        "adidas_meta": adidas_meta,
-        "hr_stats": (raw.get("hr_stats") if isinstance(raw, dict) else None),
-        "hr_alignment": (raw.get("hr_alignment") if isinstance(raw, dict) else None),
-    }
+    return adidas_meta
+
 
-    # --- Generowanie notatki AI (uproszczone pod nową logikę) ---
+def _build_ai_note(summary, splits, chart, adidas_meta, user_weight, user_height_cm):
+    """Buduje notatkę tekstową (podsumowanie, obserwacje, wskazówki) dla treningu."""
     avg_pace = summary.get("avg_pace_s_per_km")
     avg_hr = summary.get("avg_hr_bpm")
     max_hr = summary.get("max_hr_bpm")
@@ -593,6 +452,321 @@ def workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
             else:
                 lines.append("- Dla zdrowia stawów kluczowa jest teraz regularność w bardzo spokojnym tempie (np. marszobiegi), bez presji na prędkość.")
 
-    resp["ai_note"] = "\n".join(lines)
+    return "\n".join(lines)
+
+
+def _parse_output_options(request: HttpRequest):
+    """Czyta parametry ?fields=, ?max_points=, ?track_format=, ?chart_buckets= i ?chart_bucket_m=.
+
+    Zwraca słownik opcji albo JsonResponse z błędem 400.
+    """
+    fields = set(RESPONSE_FIELDS)
+    fields_param = (request.GET.get("fields") or "").strip()
+    if fields_param:
+        fields = {f.strip() for f in fields_param.split(",") if f.strip()}
+        unknown = sorted(fields - set(RESPONSE_FIELDS))
+        if unknown:
+            return JsonResponse(
+                {"error": f"Unknown fields: {', '.join(unknown)}", "allowed": list(RESPONSE_FIELDS)},
+                status=400,
+            )
+
+    max_points = None
+    if request.GET.get("max_points"):
+        try:
+            max_points = int(request.GET["max_points"])
+        except ValueError:
+            max_points = 0
+        if max_points < 2:
+            return JsonResponse({"error": "max_points must be an integer >= 2"}, status=400)
+
+    track_format = request.GET.get("track_format", "points")
+    if track_format not in TRACK_FORMATS:
+        return JsonResponse({"error": f"track_format must be one of: {', '.join(TRACK_FORMATS)}"}, status=400)
+
+    # Rozdzielczość wykresu: liczba kubełków albo długość kubełka w metrach
+    chart_buckets = None
+    chart_bucket_m = None
+    if request.GET.get("chart_buckets"):
+        try:
+            chart_buckets = int(request.GET["chart_buckets"])
+        except ValueError:
+            chart_buckets = 0
+        if not 1 <= chart_buckets <= MAX_CHART_BUCKETS:
+            return JsonResponse({"error": f"chart_buckets must be an integer between 1 and {MAX_CHART_BUCKETS}"}, status=400)
+    elif request.GET.get("chart_bucket_m"):
+        try:
+            chart_bucket_m = float(request.GET["chart_bucket_m"])
+        except ValueError:
+            chart_bucket_m = 0.0
+        if not chart_bucket_m >= MIN_CHART_BUCKET_M:
+            return JsonResponse({"error": f"chart_bucket_m must be a number >= {MIN_CHART_BUCKET_M:g}"}, status=400)
+
+    return {
+        "fields": fields,
+        "max_points": max_points,
+        "track_format": track_format,
+        "chart_buckets": chart_buckets,
+        "chart_bucket_m": chart_bucket_m,
+    }
+
+
+@login_required
+def workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
+    """Analiza treningu; przy ANALYSIS_TIMINGS czasy etapów trafiają do Server-Timing (i `_timings` z ?timings=1)."""
+    with profiling.collect() as timings, profiling.sampled_cprofile(f"analysis-{workout_id}"):
+        with profiling.span("analysis_total"):
+            response = _workout_analysis(request, workout_id)
+    if profiling.timings_enabled():
+        response["Server-Timing"] = timings.server_timing()
+    return response
+
+
+def _workout_analysis(request: HttpRequest, workout_id: int) -> JsonResponse:
+    options = _parse_output_options(request)
+    if isinstance(options, JsonResponse):
+        return options
+    fields = options["fields"]
+    max_points = options["max_points"]
+    track_format = options["track_format"]
+
+    user_profile = getattr(request.user, "profile", None)
+    user_weight = user_profile.weight_kg if user_profile and user_profile.weight_kg else None
+    user_height_cm = user_profile.height_cm if user_profile and user_profile.height_cm else None
 
-    return JsonResponse(resp)
\ No newline at end of file
+    # Gotowa, skompresowana odpowiedź z cache (bez _timings - te są per żądanie)
+    use_cache = analysis_cache.enabled() and not (request.GET.get("timings") == "1" and profiling.timings_enabled())
+    if use_cache:
+        digest = analysis_cache.variant_digest(options=options, weight_kg=user_weight, height_cm=user_height_cm)
+        with profiling.span("cache"):
+            encoded = analysis_cache.get(request.user.id, workout_id, digest)
+        if encoded is not None:
+            return precompressed_response(request, encoded, "application/json")
+
+    try:
+        w = Workout.objects.get(id=workout_id, user=request.user)
+    except Workout.DoesNotExist:
+        return JsonResponse({"error": "Workout not found"}, status=404)
+
+    # 1) ZBIERAMY PUNKTY Z GPX (Geometria trasy)
+    points = []
+    if w.gpx_data:
+        with profiling.span("parse_gpx"):
+            points = parse_gpx(w.gpx_bytes())
+
+    # Jeśli raw_data jest stringiem JSON, parsujemy go
+    raw = w.raw_data
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except Exception:
+            raw = []
+
+    # Wyciągamy serię czasową tętna z pliku JSON
+    with profiling.span("json_time_series"):
+        hr_series = _extract_time_series_from_json(raw)
+
+    hr_lookup = _make_hr_lookup(hr_series) if hr_series else None
+
+    # Sekcje potrzebne wewnętrznie: podsumowanie zawsze (kalorie), notatka AI korzysta
+    # ze splitów i wykresu, a doklejanie tętna z JSON do splitów wymaga 'track'.
+    needed = (fields & set(ANALYSIS_SECTIONS)) | {"summary"}
+    if "ai_note" in fields:
+        needed |= {"splits", "chart"}
+    if hr_series and "splits" in needed:
+        needed.add("track")
+
+    # 2) ANALIZA PODSTAWOWA (z GPX)
+    with profiling.span("analyze_track"):
+        analysis = analyze_track(
+            points,
+            fields=needed,
+            chart_buckets=options["chart_buckets"],
+            chart_bucket_m=options["chart_bucket_m"],
+            hr_lookup=hr_lookup,
+        )
+
+    # Indeks rekordów życiowych aktualizujemy przy każdej analizie z najlepszymi odcinkami
+    if points and "best_segments" in analysis:
+        record_best_efforts(w, efforts_from_best_segments(analysis["best_segments"]))
+
+    # 3) WZBOGACENIE O DANE Z JSON (TĘTNO)
+    summary = analysis.get("summary", {})
+    # Ensure these are always defined (used later even without HR data)
+    track = analysis.get("track", [])
+    chart = analysis.get("chart", {})
+    splits = analysis.get("splits", [])
+    
+    # JEŚLI MAMY DANE HR Z PLIKU JSON:
+    with profiling.span("hr_fusion"):
+        if hr_series:
+            # A. Statystyki ogólne (jeśli GPX ich nie dostarczył)
+            hrs = [x[1] for x in hr_series]
+            if not summary.get("avg_hr_bpm") and hrs:
+                summary["avg_hr_bpm"] = sum(hrs) / len(hrs)
+            if not summary.get("max_hr_bpm") and hrs:
+                summary["max_hr_bpm"] = max(hrs)
+            if "min_hr_bpm" not in summary and hrs: # Dodatkowe pole
+                summary["min_hr_bpm"] = min(hrs)
+
+            # B. Synchronizacja z wykresem i splitami (Data Fusion)
+            # Jeśli mamy trasę (GPX) z czasami, możemy "dokleić" tętno do punktów trasy
+        
+            # B.1 Tętno na wykresie uzupełnia analyze_track (hr_lookup) podczas decymacji.
+            has_track_timestamps = track and track[0].get("ts") is not None
+
+            if has_track_timestamps:
+                # B.2 Uzupełnij splity o średnie tętno
+                # Splity mają pole 'km' (1, 2, 3...).
+                # Musimy obliczyć średnie HR dla każdego kilometra.
+                # Użyjmy punktów 'track' jako odniesienia czasu i dystansu.
+                km_idx = 1
+                curr_km_hr_sum = 0.0
+                curr_km_hr_count = 0
+                curr_km_dist = 0.0
+            
+                # Mapa splitów do szybkiego dostępu
+                split_map = {s["km"]: s for s in splits}
+            
+                for pt in track:
+                    dist = pt.get("seg_m") or 0.0
+                    ts = pt.get("ts")
+                    curr_km_dist += dist
+                
+                    if ts:
+                        hr_val = hr_lookup(float(ts))
+                        if hr_val:
+                            curr_km_hr_sum += hr_val
+                            curr_km_hr_count += 1
+                
+                    if curr_km_dist >= 1000.0:
+                        if km_idx in split_map:
+                            avg = (curr_km_hr_sum / curr_km_hr_count) if curr_km_hr_count > 0 else None
+                            # Nadpisz tylko jeśli split nie ma HR z GPX
+                            if split_map[km_idx].get("hr_bpm") is None:
+                                split_map[km_idx]["hr_bpm"] = avg
+                    
+                        km_idx += 1
+                        curr_km_dist -= 1000.0
+                        curr_km_hr_sum = 0.0
+                        curr_km_hr_count = 0
+
+    # Reszta kodu (kalorie, antropometria, meta) bez zmian...
+    if user_weight and summary.get("distance_m"):
+         dist_km = summary["distance_m"] / 1000.0
+         # Proste szacowanie jeśli nie ma kalorii
+         if not summary.get("calories_kcal"):
+             summary["calories_kcal"] = 1.036 * float(user_weight) * dist_km
+
+    # Ekstrakcja metadanych Adidas (pogoda, kroki, urządzenie, utrata płynów)
+    adidas_meta = {}
+    if fields & {"adidas_meta", "ai_note"}:
+        with profiling.span("adidas_meta"):
+            adidas_meta = _extract_adidas_meta(raw)
+
+    # Notatka AI liczona na pełnych danych, przed odchudzeniem odpowiedzi
+    ai_note = None
+    if "ai_note" in fields:
+        with profiling.span("ai_note"):
+            ai_note = _build_ai_note(summary, splits, chart, adidas_meta, user_weight, user_height_cm)
+
+    # Usuwamy sekcje policzone tylko na potrzeby wewnętrzne
+    for section in ANALYSIS_SECTIONS:
+        if section not in fields:
+            analysis.pop(section, None)
+
+    # Geometria trasy: upraszczanie (RDP) i/lub kompaktowy zapis polyline
+    if "track" in fields:
+        if max_points is not None:
+            original_count = len(track)
+            track, max_error_m = simplify_track(track, max_points=max_points)
+            analysis["track"] = track
+            analysis["track_simplification"] = {
+                "original_points": original_count,
+                "points": len(track),
+                "max_error_m": max_error_m,
+            }
+        if track_format == "polyline":
+            analysis.pop("track", None)
+            analysis["track_polyline"] = encode_polyline((p["lat"], p["lon"]) for p in track)
+
+    # Budowanie odpowiedzi JSON
+    resp = {
+        "id": w.id,
+        "title": w.title,
+        "performed_at": (w.performed_at.isoformat() if w.performed_at else None),
+        "distance_m": w.distance_m,
+        "duration_ms": w.duration_ms,
+        "has_track": bool(points),
+        "analysis": analysis,
+        "calories_kcal": summary.get("calories_kcal"),
+        "user_anthropometrics": {
+            "height_cm": user_height_cm,
+            "weight_kg": float(user_weight) if user_weight else None,
+        },
+        "hr_stats": (raw.get("hr_stats") if isinstance(raw, dict) else None),
+        "hr_alignment": (raw.get("hr_alignment") if isinstance(raw, dict) else None),
+    }
+    if "adidas_meta" in fields:
+        resp["adidas_meta"] = adidas_meta
+    if "ai_note" in fields:
+        resp["ai_note"] = ai_note
+    timings = profiling.current()
+    if timings is not None and request.GET.get("timings") == "1" and profiling.timings_enabled():
+        resp["_timings"] = timings.as_dict()
+
+    # Dziesiątki tysięcy floatów w wykresach/trasie - orjson + opcjonalne zaokrąglanie
+    with profiling.span("serialize"):
+        response = FastJsonResponse(resp)
+    if not use_cache:
+        return response
+    # Kompresja raz przy zapisie; kolejne żądania dostają te same bajty
+    with profiling.span("compress"):
+        encoded = analysis_cache.store(request.user.id, w.id, digest, response.content)
+    return precompressed_response(request, {**encoded, IDENTITY: response.content}, "application/json")
+
+
+@login_required
+def personal_records(request: HttpRequest) -> JsonResponse:
+    """Rekordy życiowe użytkownika (400 m / 1 km / 5 km) z tabeli PersonalBest."""
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+    records = [
+        {
+            "distance_m": pb.distance_m,
+            "pace_s": pb.pace_s,
+            "time_s": pb.time_s,
+            "workout_id": pb.workout_id,
+            "workout_title": pb.workout.title,
+            "performed_at": pb.performed_at.isoformat() if pb.performed_at else None,
+        }
+        for pb in PersonalBest.objects.filter(user=request.user).select_related("workout")
+    ]
+    return JsonResponse({"records": records})
+
+
+@login_required
+def training_load(request: HttpRequest) -> JsonResponse:
+    """Seria dzienna obciążenia treningowego (ATL/CTL/TSB).
+
+    Query param "days" (domyślnie 90, max 730) – długość zwracanej historii.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Only GET allowed"}, status=405)
+    try:
+        days = int(request.GET.get("days", "90"))
+    except ValueError:
+        days = 90
+    days = max(1, min(730, days))
+
+    from datetime import timedelta
+    from django.utils import timezone
+
+    today = timezone.now().date()
+    training_load_model.refresh(request.user.id, today=today)
+    rows = TrainingLoadDay.objects.filter(user=request.user, date__gt=today - timedelta(days=days))
+    items = [
+        {"date": r.date.isoformat(), "stress": r.stress, "atl": r.atl, "ctl": r.ctl, "tsb": r.tsb}
+        for r in rows
+    ]
+    return FastJsonResponse({"items": items, "current": items[-1] if items else None})
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from workouts.models import Workout
+
+
+class Command(BaseCommand):
+    help = "Gzip GPX blobs stored uncompressed (rows from before compressed storage); safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Workouts loaded from the DB per batch")
+
+    def handle(self, *args, **options):
+        qs = Workout.objects.exclude(gpx_data__isnull=True).filter(gpx_encoding="").order_by("id")
+        ids = list(qs.values_list("id", flat=True))
+        batch_size = max(1, options["batch_size"])
+        self.stdout.write(f"Compressing GPX of {len(ids)} workouts...")
+
+        before = after = 0
+        for start in range(0, len(ids), batch_size):
+            batch = list(Workout.objects.filter(id__in=ids[start:start + batch_size]).only("id", "gpx_data", "gpx_encoding", "gpx_size"))
+            for w in batch:
+                raw = w.gpx_bytes()
+                before += len(raw)
+                w.set_gpx(raw)
+                after += len(w.gpx_data or b"")
+            # Treść GPX się nie zmienia, więc cache analiz i indeksy zostają ważne
+            Workout.objects.bulk_update(batch, ["gpx_data", "gpx_encoding", "gpx_size"])
+            self.stdout.write(f"  {min(start + batch_size, len(ids))}/{len(ids)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Compression complete. {before} -> {after} bytes."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_remove_workout_gpx_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workout',
+            name='gpx_encoding',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from running_analyzer.compression import IDENTITY, STORED_LEVELS, compress, decompress
+
 
 class Workout(models.Model):
 	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="workouts")
@@ -17,8 +19,26 @@ class Workout(models.Model):
 	gpx_mime = models.CharField(max_length=120, blank=True, null=True)
 	gpx_size = models.IntegerField(blank=True, null=True)
 	gpx_data = models.BinaryField(blank=True, null=True, editable=False)
+	# Kodowanie gpx_data: "gzip" dla nowych plików, puste = surowy XML (starsze wiersze)
+	gpx_encoding = models.CharField(max_length=16, blank=True, default="")
 	raw_data = models.JSONField()
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	def set_gpx(self, data) -> None:
+		"""Store GPX bytes gzip-compressed; gpx_size keeps the original size."""
+		if not data:
+			self.gpx_data, self.gpx_encoding = data, ""
+			self.gpx_size = len(data) if data is not None else None
+			return
+		self.gpx_data = compress(data, "gzip", STORED_LEVELS["gzip"])
+		self.gpx_encoding = "gzip"
+		self.gpx_size = len(data)
+
+	def gpx_bytes(self) -> bytes:
+		"""Plain GPX XML regardless of how it is stored (b"" when there is none)."""
+		if not self.gpx_data:
+			return b""
+		return decompress(bytes(self.gpx_data), self.gpx_encoding or IDENTITY)
+
 	def __str__(self) -> str:
 		return f"{self.title} ({self.user.username})"
@@ -2,11 +2,18 @@ from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+import gzip
 import json
 import io
+import os
+from unittest.mock import patch
+
+import httpx
 from datetime import datetime, timedelta, timezone as dt_tz
 
 from . import views as workout_views
+from users.models import UserProfile
 from .models import Workout
 
 
@@ -117,6 +124,35 @@ class WorkoutImportTests(TestCase):
         # Alignment should be present
         self.assertIn('hr_alignment', data)
 
+    def test_gpx_stored_compressed_and_downloaded_as_is(self):
+        from benchmarks import synthetic
+
+        gpx = synthetic.to_gpx(synthetic.generate_track(200, seed=3))
+        w = Workout.objects.create(user=self.user, title='gz', source='adidas', manual=True, raw_data={})
+        res = self.client.post(f'/api/workouts/{w.id}/gpx/', {'file': SimpleUploadedFile('run.gpx', gpx)})
+        self.assertEqual(res.status_code, 200)
+        w.refresh_from_db()
+        self.assertEqual(w.gpx_encoding, 'gzip')
+        self.assertEqual(w.gpx_size, len(gpx))
+        self.assertLess(len(w.gpx_data), len(gpx) / 4)
+        self.assertEqual(w.gpx_bytes(), gpx)
+
+        res = self.client.get(f'/api/workouts/{w.id}/gpx/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res.content, bytes(w.gpx_data))
+        res = self.client.get(f'/api/workouts/{w.id}/gpx/')
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, gpx)
+
+        # Starsze wiersze z surowym XML: pobieranie działa, komenda je kompresuje
+        legacy = Workout.objects.create(user=self.user, title='old', source='adidas', manual=True, raw_data={}, gpx_data=gpx)
+        res = self.client.get(f'/api/workouts/{legacy.id}/gpx/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzip.decompress(res.content), gpx)
+        call_command('compress_stored_gpx', stdout=io.StringIO())
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.gpx_encoding, legacy.gpx_size), ('gzip', len(gpx)))
+        self.assertEqual(legacy.gpx_bytes(), gpx)
+
     def test_attach_hr_without_samples_returns_error(self):
         w = Workout.objects.create(user=self.user, title='w2', source='adidas', manual=True, raw_data={})
         hf = SimpleUploadedFile('hr.json', b'[]', content_type='application/json')
@@ -130,3 +166,68 @@ class WorkoutImportTests(TestCase):
         # Ensure it's gone
         with self.assertRaises(Workout.DoesNotExist):
             Workout.objects.get(id=w.id)
+
+
+class StravaImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('runner', password='GoodP@ss1', email='r@t.pl')
+        UserProfile.objects.create(
+            user=self.user,
+            strava_access_token='old',
+            strava_refresh_token='ref',
+            strava_token_expires_at=timezone.now() - timedelta(hours=1),
+        )
+        self.client.force_login(self.user)
+
+    def test_import_refreshes_token_and_skips_duplicates(self):
+        Workout.objects.create(user=self.user, external_id='2', source='strava', raw_data={})
+        seen_tokens = []
+
+        def handler(req):
+            if req.url.path == '/oauth/token':
+                return httpx.Response(200, json={'access_token': 'new', 'refresh_token': 'ref2', 'expires_at': 1900000000})
+            seen_tokens.append(req.headers['Authorization'])
+            return httpx.Response(200, json=[
+                {'id': 1, 'type': 'Run', 'distance': 5000, 'moving_time': 1500, 'start_date': '2026-05-01T07:00:00Z'},
+                {'id': 2, 'type': 'Run', 'distance': 8000, 'moving_time': 2400},
+                {'id': 3, 'type': 'Ride', 'distance': 20000},
+            ])
+
+        client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch.dict(os.environ, {'STRAVA_CLIENT_ID': '1', 'STRAVA_CLIENT_SECRET': 's'}), \
+                patch('users.strava.client', client):
+            res = self.client.post('/api/workouts/import_strava/')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json(), {'imported': 1})
+        self.assertEqual(seen_tokens, ['Bearer new'])
+        self.assertEqual(UserProfile.objects.get(user=self.user).strava_access_token, 'new')
+        w = Workout.objects.get(user=self.user, external_id='1')
+        self.assertEqual(w.title, 'Strava bieg 2026-05-01')
+        self.assertEqual(w.duration_ms, 1500000)
+
+
+class SyntheticBenchmarkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('bench', password='GoodP@ss1', email='b@t.pl')
+        self.client.force_login(self.user)
+
+    def test_synthetic_fit_upload(self):
+        from benchmarks import synthetic
+
+        track = synthetic.generate_track(300, seed=7)
+        self.assertEqual(track, synthetic.generate_track(300, seed=7))
+        upload = SimpleUploadedFile('synthetic.fit', synthetic.to_fit(track))
+        res = self.client.post('/api/workouts/upload/', {'file': upload})
+        self.assertEqual(res.status_code, 201)
+        w = Workout.objects.get(id=res.json()['id'])
+        self.assertAlmostEqual(w.distance_m, track[-1]['dist'], delta=0.01)
+        self.assertEqual(w.duration_ms, 299000)
+
+    def test_benchmark_cases_run_and_compare(self):
+        from benchmarks.run import CASES, compare, run_benchmarks
+
+        results = run_benchmarks(sizes=[120], repeat=1, log=None)
+        self.assertEqual(set(results), {f'{name}/120' for name in CASES})
+        baseline = {key: {'min_s': r['min_s'] / 2} for key, r in results.items()}
+        self.assertEqual(sorted(compare(results, baseline, 0.25)), sorted(results))
+        self.assertEqual(compare(results, results, 0.25), [])
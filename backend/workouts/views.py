@@ -5,13 +5,20 @@ from io import BytesIO
 
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-from django.http import JsonResponse, HttpRequest, HttpResponse
+from django.http import JsonResponse, HttpRequest
 from django.core.files.storage import default_storage
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 
+import httpx
+from asgiref.sync import sync_to_async
 from fitparse import FitFile
+from running_analyzer.compression import IDENTITY, precompressed_response
+from running_analyzer.responses import FastJsonResponse
+from users import strava
 from users.models import UserProfile, ActivityLog
+from workout_analysis import training_load
+from segments.indexing import index_workout, unindex_workout
 
 from .models import Workout
 
@@ -42,7 +49,7 @@ def list_workouts(request: HttpRequest) -> JsonResponse:
                 "hr_stats": hr_stats,
             }
         )
-    return JsonResponse({"workouts": items})
+    return FastJsonResponse({"workouts": items})
 
 
 @login_required
@@ -220,9 +227,13 @@ def upload_gpx(request: HttpRequest, workout_id: int) -> JsonResponse:
         except Workout.DoesNotExist:
             return JsonResponse({"error": "Workout not found"}, status=404)
 
-        # Prefer inline DB storage
+        # Prefer inline DB storage; skompresowany blob idzie do klienta bez przepakowania
         if workout.gpx_data:
-            resp = HttpResponse(workout.gpx_data, content_type=workout.gpx_mime or "application/gpx+xml")
+            resp = precompressed_response(
+                request,
+                {workout.gpx_encoding or IDENTITY: bytes(workout.gpx_data)},
+                content_type=workout.gpx_mime or "application/gpx+xml",
+            )
             disp_name = (workout.gpx_name or f"workout_{workout.id}.gpx").replace('"', '')
             resp["Content-Disposition"] = f"inline; filename=\"{disp_name}\""
             return resp
@@ -260,14 +271,16 @@ def upload_gpx(request: HttpRequest, workout_id: int) -> JsonResponse:
 
     workout.gpx_name = name
     workout.gpx_mime = mime
-    workout.gpx_size = len(gpx_bytes) if gpx_bytes is not None else None
-    workout.gpx_data = gpx_bytes
+    workout.set_gpx(gpx_bytes)
     workout.save(update_fields=[
         "gpx_name",
         "gpx_mime",
         "gpx_size",
         "gpx_data",
+        "gpx_encoding",
     ])
+    # Geometria + indeks siatki dla segmentów (bez ponownego parsowania GPX później)
+    index_workout(workout)
 
     try:
         ActivityLog.objects.create(
@@ -288,17 +301,19 @@ def upload_gpx(request: HttpRequest, workout_id: int) -> JsonResponse:
 
 @csrf_exempt
 @login_required
-def import_strava_workouts(request: HttpRequest) -> JsonResponse:
+async def import_strava_workouts(request: HttpRequest) -> JsonResponse:
     """Import all Strava run activities for the current user using Strava API.
 
     Requires that the user has linked their Strava account (tokens stored in UserProfile).
+    Strava calls go through an async HTTP client; only the per-page inserts
+    run in the ORM thread.
     """
     if request.method != "POST":
         return JsonResponse({"error": "Only POST allowed"}, status=405)
 
-    try:
-        profile = request.user.profile
-    except UserProfile.DoesNotExist:
+    user = await request.auser()
+    profile = await UserProfile.objects.filter(user=user).afirst()
+    if profile is None:
         return JsonResponse(
             {
                 "error": "Brak powiązanego profilu Strava. Połącz konto w ustawieniach."
@@ -306,9 +321,7 @@ def import_strava_workouts(request: HttpRequest) -> JsonResponse:
             status=400,
         )
 
-    from django.utils import timezone
     import os
-    import requests
 
     client_id = os.environ.get("STRAVA_CLIENT_ID")
     client_secret = os.environ.get("STRAVA_CLIENT_SECRET")
@@ -323,130 +336,149 @@ def import_strava_workouts(request: HttpRequest) -> JsonResponse:
         return JsonResponse(
             {"error": "Konto Strava nie jest połączone."}, status=400
         )
-    if profile.strava_token_expires_at and profile.strava_token_expires_at <= now:
-        refresh_resp = requests.post(
-            "https://www.strava.com/oauth/token",
-            data={
-                "client_id": client_id,
-                "client_secret": client_secret,
-                "grant_type": "refresh_token",
-                "refresh_token": profile.strava_refresh_token,
-            },
-        )
-        if refresh_resp.status_code != 200:
-            return JsonResponse(
-                {
-                    "error": "Nie udało się odświeżyć tokenu Strava.",
-                    "details": refresh_resp.text,
-                },
-                status=502,
-            )
-        refresh_data = refresh_resp.json()
-        profile.strava_access_token = refresh_data.get(
-            "access_token", profile.strava_access_token
-        )
-        profile.strava_refresh_token = refresh_data.get(
-            "refresh_token", profile.strava_refresh_token
-        )
-        from datetime import datetime, timezone as dt_timezone
 
-        expires_at = refresh_data.get("expires_at")
-        if isinstance(expires_at, (int, float)):
-            profile.strava_token_expires_at = datetime.fromtimestamp(
-                int(expires_at), tz=dt_timezone.utc
-            )
-        profile.save()
-
-    access_token = profile.strava_access_token
-
-    headers = {"Authorization": f"Bearer {access_token}"}
     page = 1
     per_page = 50
     imported = 0
+    earliest_day = None
 
-    from datetime import datetime as dt
+    try:
+        async with strava.client() as http:
+            if profile.strava_token_expires_at and profile.strava_token_expires_at <= now:
+                refresh_resp = await strava.exchange_token(
+                    http,
+                    {
+                        "client_id": client_id,
+                        "client_secret": client_secret,
+                        "grant_type": "refresh_token",
+                        "refresh_token": profile.strava_refresh_token,
+                    },
+                )
+                if refresh_resp.status_code != 200:
+                    return JsonResponse(
+                        {
+                            "error": "Nie udało się odświeżyć tokenu Strava.",
+                            "details": refresh_resp.text,
+                        },
+                        status=502,
+                    )
+                refresh_data = refresh_resp.json()
+                profile.strava_access_token = refresh_data.get(
+                    "access_token", profile.strava_access_token
+                )
+                profile.strava_refresh_token = refresh_data.get(
+                    "refresh_token", profile.strava_refresh_token
+                )
+                from datetime import datetime, timezone as dt_timezone
 
-    while True:
-        resp = requests.get(
-            "https://www.strava.com/api/v3/athlete/activities",
-            params={"page": page, "per_page": per_page},
-            headers=headers,
+                expires_at = refresh_data.get("expires_at")
+                if isinstance(expires_at, (int, float)):
+                    profile.strava_token_expires_at = datetime.fromtimestamp(
+                        int(expires_at), tz=dt_timezone.utc
+                    )
+                await profile.asave()
+
+            while True:
+                resp = await strava.list_activities(http, profile.strava_access_token, page, per_page)
+                if resp.status_code != 200:
+                    return JsonResponse(
+                        {
+                            "error": "Błąd podczas pobierania aktywności ze Stravy.",
+                            "details": resp.text,
+                        },
+                        status=502,
+                    )
+                activities = resp.json()
+                if not activities:
+                    break
+
+                count, day = await sync_to_async(_import_strava_page)(user, activities)
+                imported += count
+                if day is not None and (earliest_day is None or day < earliest_day):
+                    earliest_day = day
+
+                if len(activities) < per_page:
+                    break
+                page += 1
+    except httpx.HTTPError as exc:
+        return JsonResponse(
+            {"error": "Błąd połączenia ze Stravą.", "details": str(exc)}, status=502
         )
-        if resp.status_code != 200:
-            return JsonResponse(
-                {
-                    "error": "Błąd podczas pobierania aktywności ze Stravy.",
-                    "details": resp.text,
-                },
-                status=502,
-            )
-        activities = resp.json()
-        if not activities:
-            break
 
-        for act in activities:
-            # Interesują nas tylko biegi
-            if act.get("type") != "Run":
-                continue
-
-            strava_id = act.get("id")
-            if not strava_id:
-                continue
-
-            # Unikamy duplikatów
-            if Workout.objects.filter(
-                user=request.user, external_id=str(strava_id), source="strava"
-            ).exists():
-                continue
-
-            distance_m = act.get("distance")  # w metrach
-            duration_ms = None
-            moving_time = act.get("moving_time")  # sekundy
-            if moving_time is not None:
-                duration_ms = int(moving_time) * 1000
-
-            performed_at = None
-            title = act.get("name") or "Strava bieg"
-            start_date_str = act.get("start_date")
-            if start_date_str:
-                try:
-                    start_dt = dt.fromisoformat(start_date_str.replace("Z", "+00:00"))
-                    performed_at = start_dt
-                    title = f"Strava bieg {start_dt.date()}"
-                except Exception:
-                    performed_at = None
-
-            w = Workout.objects.create(
-                user=request.user,
-                external_id=str(strava_id),
-                source="strava",
-                manual=False,
-                title=title,
-                performed_at=performed_at,
-                distance_m=distance_m,
-                duration_ms=duration_ms,
-                raw_data=act,
-            )
-            imported += 1
+    await sync_to_async(training_load.mark_dirty)(user.id, earliest_day)
+    return JsonResponse({"imported": imported}, status=201)
+
+
+def _import_strava_page(user, activities):
+    """Create workouts for new Strava runs on one API page. Returns (imported, earliest_day)."""
+    from datetime import datetime as dt
+
+    # Interesują nas tylko biegi
+    runs = [act for act in activities if act.get("type") == "Run" and act.get("id")]
+    # Unikamy duplikatów - jedno zapytanie na stronę zamiast exists() na aktywność
+    seen = set(
+        Workout.objects.filter(
+            user=user, source="strava", external_id__in=[str(act["id"]) for act in runs]
+        ).values_list("external_id", flat=True)
+    )
+
+    new_workouts = []
+    for act in runs:
+        strava_id = str(act["id"])
+        if strava_id in seen:
+            continue
+        seen.add(strava_id)
+
+        distance_m = act.get("distance")  # w metrach
+        duration_ms = None
+        moving_time = act.get("moving_time")  # sekundy
+        if moving_time is not None:
+            duration_ms = int(moving_time) * 1000
+
+        performed_at = None
+        title = act.get("name") or "Strava bieg"
+        start_date_str = act.get("start_date")
+        if start_date_str:
             try:
-                ActivityLog.objects.create(
-                    user=request.user,
-                    action="workout_imported_strava",
-                    metadata={
-                        "workout_id": w.id,
-                        "strava_id": str(strava_id),
-                        "distance_m": float(distance_m) if distance_m is not None else None,
-                        "duration_ms": int(duration_ms) if duration_ms is not None else None,
-                    },
-                )
+                start_dt = dt.fromisoformat(start_date_str.replace("Z", "+00:00"))
+                performed_at = start_dt
+                title = f"Strava bieg {start_dt.date()}"
             except Exception:
-                pass
-
-        if len(activities) < per_page:
-            break
-        page += 1
+                performed_at = None
 
-    return JsonResponse({"imported": imported}, status=201)
+        new_workouts.append(Workout(
+            user=user,
+            external_id=strava_id,
+            source="strava",
+            manual=False,
+            title=title,
+            performed_at=performed_at,
+            distance_m=distance_m,
+            duration_ms=duration_ms,
+            raw_data=act,
+        ))
+    if not new_workouts:
+        return 0, None
+
+    created = Workout.objects.bulk_create(new_workouts)
+    earliest_day = min((w.performed_at or w.created_at).date() for w in created)
+    try:
+        ActivityLog.objects.bulk_create([
+            ActivityLog(
+                user=user,
+                action="workout_imported_strava",
+                metadata={
+                    "workout_id": w.id,
+                    "strava_id": w.external_id,
+                    "distance_m": float(w.distance_m) if w.distance_m is not None else None,
+                    "duration_ms": int(w.duration_ms) if w.duration_ms is not None else None,
+                },
+            )
+            for w in created
+        ])
+    except Exception:
+        pass
+    return len(created), earliest_day
 
 
 @csrf_exempt
@@ -669,6 +701,7 @@ def _handle_trackpoints_json(request: HttpRequest, points) -> JsonResponse:
             "points_count": len(cleaned),
         },
     )
+    training_load.mark_workout_dirty(workout)
 
     try:
         ActivityLog.objects.create(
@@ -791,6 +824,7 @@ def _handle_adidas_json(request: HttpRequest, data) -> JsonResponse:
         duration_ms=duration_ms,
         raw_data=activity,
     )
+    training_load.mark_workout_dirty(workout)
 
     try:
         ActivityLog.objects.create(
@@ -882,6 +916,7 @@ def _handle_strava_fit(
         duration_ms=total_timer_time or None,
         raw_data=raw_summary,
     )
+    training_load.mark_workout_dirty(workout)
 
     try:
         ActivityLog.objects.create(
@@ -916,6 +951,9 @@ def delete_workout(request: HttpRequest, workout_id: int) -> JsonResponse:
 
     title = workout.title
     wid = workout.id
+    training_load.mark_workout_dirty(workout)
+    unindex_workout(workout)
+    # Rekordy tego treningu przelicza sygnał post_delete (workout_analysis.signals)
     workout.delete()
     try:
         ActivityLog.objects.create(
@@ -1119,7 +1157,7 @@ def attach_hr(request: HttpRequest, workout_id: int) -> JsonResponse:
 
     hr_alignment = None
     if workout.gpx_data:
-        gpx_pts = _parse_gpx_trackpoints(bytes(workout.gpx_data))
+        gpx_pts = _parse_gpx_trackpoints(workout.gpx_bytes())
         if gpx_pts:
             # Build sorted list of times for binary search
             time_index = [(p["t"], idx) for idx, p in enumerate(gpx_pts) if p.get("t") is not None]
@@ -1167,5 +1205,7 @@ def attach_hr(request: HttpRequest, workout_id: int) -> JsonResponse:
 
     workout.raw_data = raw
     workout.save(update_fields=["raw_data"])
+    # Średnie tętno zmienia obciążenie treningowe tego dnia
+    training_load.mark_workout_dirty(workout)
 
     return JsonResponse({"ok": True, "hr_stats": stats, "hr_alignment": hr_alignment})
@@ -3,15 +3,26 @@ import { getCSRFToken } from '../../utils/csrf';
 
 export default function CommentsPanel({ postId, onClose, onCommentAdded }) {
   const [comments, setComments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [text, setText] = useState('');
   const [loading, setLoading] = useState(false);
 
-  const fetchComments = async () => {
+  // Komentarze przychodzą stronami (od najstarszych); kolejne strony przez next_cursor
+  const fetchComments = async (cursor = null) => {
     setLoading(true);
     try {
-      const res = await fetch(`http://127.0.0.1:8000/api/social/posts/${postId}/comments/`, { credentials: 'include' });
+      const url = `http://127.0.0.1:8000/api/social/posts/${postId}/comments/`
+        + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
+      const res = await fetch(url, { credentials: 'include' });
       const data = await res.json();
-      setComments(Array.isArray(data.comments) ? data.comments : []);
+      const page = Array.isArray(data.comments) ? data.comments : [];
+      setComments((prev) => {
+        if (!cursor) return page;
+        // Własny komentarz dodany lokalnie mógł już trafić na listę
+        const seen = new Set(prev.map((c) => c.id));
+        return [...prev, ...page.filter((c) => !seen.has(c.id))];
+      });
+      setNextCursor(data.next_cursor || null);
     } catch (e) { /* ignore */ }
     setLoading(false);
   };
@@ -53,6 +64,11 @@ export default function CommentsPanel({ postId, onClose, onCommentAdded }) {
           </div>
         ))}
       </div>
+      {nextCursor && (
+        <button className="comments-more" onClick={() => fetchComments(nextCursor)} disabled={loading}>
+          Pokaż więcej komentarzy
+        </button>
+      )}
       <form onSubmit={submit} className="comment-form">
         <input value={text} onChange={e => setText(e.target.value)} placeholder="Dodaj komentarz" />
         <button type="submit">Wyślij</button>